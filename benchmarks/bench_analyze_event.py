@@ -0,0 +1,55 @@
+"""
+Micro-benchmark of betting option generation.
+
+Times the work !createbet does to turn a description into options
+(generate_options) and the work !sportsbet does to set up a bet from the
+options it was given (auto-resolve check and option matcher).
+
+Run from the repository root:
+    python benchmarks/bench_analyze_event.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bet_matcher import OptionMatcher
+from utils.bet_options import generate_options, is_auto_resolvable
+
+CREATEBET_DESCRIPTIONS = [
+    "Who will win today's IPL match, Mumbai vs Chennai?",
+    "Test match between England and Australia at Lord's",
+    "Champions League football final: Madrid vs Liverpool",
+    "NBA game tonight Lakers versus Celtics",
+    "Will it rain during the weekend festival?",
+    "Who takes the best picture award at the ceremony?",
+    "Something completely different happening next week",
+]
+
+SPORTSBETS = [
+    ("India vs Australia, T20 World Cup semi-final", ["India", "Australia"]),
+    ("Djokovic against Alcaraz, Wimbledon final", ["Djokovic", "Alcaraz", "Five sets", "Retirement"]),
+]
+
+
+def bench(label, func, number=20000):
+    """Print the mean time of one func() call in microseconds."""
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    print(f"{label:<60} {seconds / number * 1e6:8.2f} us")
+
+
+def main():
+    for description in CREATEBET_DESCRIPTIONS:
+        bench(f"createbet: {description[:48]}", lambda: generate_options(description))
+
+    for description, options in SPORTSBETS:
+        bench(
+            f"sportsbet: {description[:48]}",
+            lambda: (is_auto_resolvable(description), OptionMatcher(options))
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Check the LLM gateway against a local stub of the chat completions API.
+
+Starts an aiohttp server that answers /v1/chat/completions the way the
+current scenario asks (a JSON completion, HTTP 503, or a slow reply),
+points an LLMGateway at it and checks the per-caller concurrency limit,
+the deadline, retries and the circuit breaker, including that only one
+probe gets through while it is half-open. Nothing is sent to OpenAI.
+
+Run from the repository root:
+    python benchmarks/check_llm_gateway.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm import CircuitBreaker, CircuitOpenError, LLMError, LLMGateway
+
+
+class StubServer:
+    """Chat completions stub that counts requests and how many were in flight at once."""
+
+    def __init__(self):
+        self.mode = "ok"     # "ok", "error" (HTTP 503) or "slow"
+        self.delay = 0.05    # Seconds each reply takes ("slow" sleeps 10 times longer)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self, mode, delay=0.05):
+        self.mode = mode
+        self.delay = delay
+        self.requests = 0
+        self.max_in_flight = 0
+
+    async def completions(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay * (10 if self.mode == "slow" else 1))
+            if self.mode == "error":
+                return web.Response(status=503, text="stub outage")
+            content = json.dumps({"answer": "stub"})
+            return web.json_response({"choices": [{"message": {"content": content}}]})
+        finally:
+            self.in_flight -= 1
+
+
+async def call(gateway, caller="betting"):
+    """Make one completion call and return its result or the name of the error raised."""
+    try:
+        return await gateway.complete_json(caller, [{"role": "user", "content": "hi"}], required_keys=("answer",))
+    except CircuitOpenError:
+        return "CircuitOpenError"
+    except LLMError:
+        return "LLMError"
+
+
+def check(label, condition):
+    print(f"{'ok' if condition else 'FAILED':<7} {label}")
+    return condition
+
+
+async def main():
+    stub = StubServer()
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", stub.completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.5)
+    gateway = LLMGateway(
+        api_key="stub", base_url=f"http://127.0.0.1:{port}/v1",
+        limits={"betting": 4}, deadlines={"betting": 2}, max_retries=1, breaker=breaker
+    )
+    passed = True
+
+    try:
+        # Concurrency limit per caller
+        stub.reset("ok")
+        start = time.perf_counter()
+        results = await asyncio.gather(*(call(gateway) for _ in range(20)))
+        elapsed = time.perf_counter() - start
+        passed &= check("20 calls all succeed", all(r == {"answer": "stub"} for r in results))
+        passed &= check(f"at most 4 requests in flight (saw {stub.max_in_flight})", stub.max_in_flight <= 4)
+        print(f"        20 calls in {elapsed * 1000:.0f} ms")
+
+        # Deadline
+        stub.reset("slow", delay=0.5)
+        start = time.perf_counter()
+        result = await call(gateway)
+        elapsed = time.perf_counter() - start
+        passed &= check(f"slow reply hits the 2s deadline ({elapsed:.2f}s)", result == "LLMError" and elapsed < 3)
+        breaker.record_success()
+
+        # Retries, then the breaker opens after 3 failed calls
+        stub.reset("error")
+        results = [await call(gateway) for _ in range(3)]
+        passed &= check("failing calls are retried once each", stub.requests == 6)
+        passed &= check("breaker opens after 3 failures", breaker.state == "open")
+        requests = stub.requests
+        passed &= check("open breaker fails fast", await call(gateway) == "CircuitOpenError" and stub.requests == requests)
+
+        # Half-open lets exactly one probe through, and a failed probe reopens the breaker
+        await asyncio.sleep(0.6)
+        stub.reset("error", delay=0.2)
+        results = await asyncio.gather(*(call(gateway) for _ in range(10)))
+        passed &= check(f"one failing probe while half-open (saw {stub.max_in_flight} in flight)",
+                        stub.max_in_flight == 1 and results.count("CircuitOpenError") == 9)
+        passed &= check("failed probe reopens the breaker", breaker.state == "open")
+
+        # A successful probe closes it again
+        await asyncio.sleep(0.6)
+        stub.reset("ok", delay=0.2)
+        results = await asyncio.gather(*(call(gateway) for _ in range(10)))
+        passed &= check("one successful probe while half-open",
+                        stub.requests == 1 and results.count("CircuitOpenError") == 9)
+        passed &= check("successful probe closes the breaker", breaker.state == "closed")
+        passed &= check("closed breaker lets calls through", await call(gateway) == {"answer": "stub"})
+    finally:
+        await gateway.aclose()
+        await runner.cleanup()
+
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
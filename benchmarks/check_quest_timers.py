@@ -0,0 +1,86 @@
+"""
+Check that settled quest timers are removed in the same write as the payout.
+
+Runs the economy cog's quest handler through a TimerService on data files
+in a temporary directory. The timer service's own save after a batch is
+disabled, as if the bot crashed right after the handler returned, so the
+timer file on disk shows exactly what the handler committed: a quest whose
+roll is done must never be rolled again after a restart, whether it won
+or failed. Nothing touches the bot's real data/ directory.
+
+Run from the repository root:
+    python benchmarks/check_quest_timers.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs import economy
+from cogs.economy import Economy
+from utils.database import Database
+from utils.timers import TimerService
+
+
+def check(label, condition):
+    print(f"{'ok' if condition else 'FAILED':<7} {label}")
+    return condition
+
+
+def timers_on_disk():
+    with open("data/timers.json") as f:
+        return len(json.load(f)["timers"])
+
+
+def wallets():
+    with open("data/users.json") as f:
+        return {user_id: user["wallet"] for user_id, user in json.load(f).items()}
+
+
+async def settle_batch(roll):
+    """Schedule three due quests, settle them with every roll returning roll, and 'crash' after the handler."""
+    db = Database()
+    timers = TimerService(save_files=db.save_json_files)
+    cog = SimpleNamespace(db=db, timers=timers, bot=SimpleNamespace(get_channel=lambda channel_id: None))
+    timers.register_handler("quest", lambda due: Economy.settle_quests(cog, due))
+
+    due = datetime.now() - timedelta(seconds=1)
+    for user_id in (1, 2, 3):
+        timers.schedule("quest", due, {"user_id": user_id, "channel_id": 1, "reward": 50, "title": "Check"})
+
+    with mock.patch.object(economy.random, "random", return_value=roll), \
+            mock.patch.object(TimerService, "save_timers", lambda self: None):
+        await timers.process_due()
+
+
+async def main():
+    passed = True
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as root:
+        os.chdir(root)
+
+        # Every quest fails its roll
+        await settle_batch(0.99)
+        passed &= check("all-failed batch: timers removed on disk", timers_on_disk() == 0)
+        passed &= check("all-failed batch: nobody paid", all(wallet == 0 for wallet in wallets().values()))
+
+        # Every quest succeeds
+        await settle_batch(0.0)
+        passed &= check("all-won batch: timers removed on disk", timers_on_disk() == 0)
+        passed &= check("all-won batch: every quest paid", wallets() == {"1": 50, "2": 50, "3": 50})
+
+        os.chdir(cwd)
+
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
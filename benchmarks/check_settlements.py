@@ -0,0 +1,111 @@
+"""
+Check that bet payouts survive journal and archive write failures.
+
+Runs the betting cog's settlement path against data files in a temporary
+directory and breaks the disk on purpose: a settle record that can't be
+synced must not pay anyone, and a bet that can't be archived must keep its
+settlement pending until finish_settlements() archives it, paying nobody
+twice. Nothing touches the bot's real data/ directory.
+
+Run from the repository root:
+    python benchmarks/check_settlements.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.betting import Betting
+from utils import bet_store
+
+WINNER, LOSER = 1, 2
+
+
+def check(label, condition):
+    print(f"{'ok' if condition else 'FAILED':<7} {label}")
+    return condition
+
+
+def wallets():
+    with open("data/users.json") as f:
+        return {user_id: user["wallet"] for user_id, user in json.load(f).items()}
+
+
+def open_bet(cog):
+    """Create a bet with one stake on each option and return its ID."""
+    now = datetime.now()
+    bet_id = cog.store.create_bet({
+        "description": "Reds vs Blues", "options": ["Reds", "Blues"], "creator_id": WINNER,
+        "guild_id": 1, "participants": {}, "status": "open", "auto_resolve": False,
+        "created_at": now, "end_time": now + timedelta(hours=1)
+    })
+    cog.store.place_stake(bet_id, WINNER, "Reds", 50)
+    cog.store.place_stake(bet_id, LOSER, "Blues", 50)
+    return bet_id
+
+
+def summary():
+    """Resolution summary of a bet won by Reds."""
+    return {"description": "Reds vs Blues", "options": ["Reds", "Blues"], "winner": "Reds",
+            "total_pot": 100, "num_participants": 2, "num_winners": 1,
+            "created_at": datetime.now(), "resolved_at": datetime.now()}
+
+
+def main():
+    passed = True
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as root:
+        os.chdir(root)
+        cog = Betting(SimpleNamespace())
+        cog.db.get_or_create_user(WINNER)
+        cog.db.get_or_create_user(LOSER)
+
+        # The settle record can't be synced: nobody is paid and the bet stays open
+        bet_id = open_bet(cog)
+        before = wallets()
+        with mock.patch.object(bet_store.os, "fsync", side_effect=OSError("disk full")):
+            paid = cog.settle_bet(bet_id, {WINNER: 100}, summary())
+        passed &= check("settle_bet reports the failed journal write", paid is False)
+        passed &= check("no wallet changed", wallets() == before)
+        passed &= check("bet is still open with no pending settlement",
+                        cog.active_bets[bet_id]["status"] == "open" and not cog.store.pending_settlements)
+
+        # After a restart the bet is still open, so it can be settled normally
+        cog = Betting(SimpleNamespace())
+        passed &= check("bet reloads as open", cog.active_bets[bet_id]["status"] == "open")
+        passed &= check("settles once the disk is back", cog.settle_bet(bet_id, {WINNER: 100}, summary()))
+        passed &= check("winner paid once", wallets()[str(WINNER)] == before[str(WINNER)] + 100)
+
+        # The archive can't be written: the winner is paid, the settlement stays pending
+        bet_id = open_bet(cog)
+        before = wallets()
+        archive_file = cog.store.archive_file
+        cog.store.archive_file = os.path.join(root, "missing", "archive.jsonl")
+        passed &= check("settle_bet still pays", cog.settle_bet(bet_id, {WINNER: 100}, summary()))
+        passed &= check("bet stays live with its settlement pending",
+                        bet_id in cog.active_bets and bet_id in cog.store.pending_settlements)
+
+        # Retrying archives it without paying again
+        cog.store.archive_file = archive_file
+        passed &= check("unarchived bet is not in past bets",
+                        all(bet["bet_id"] != bet_id for bet in cog.store.past_bets(1, limit=10)[0]))
+        passed &= check("finish_settlements archives it", cog.finish_settlements())
+        passed &= check("bet left the live store", bet_id not in cog.active_bets and not cog.store.pending_settlements)
+        passed &= check("bet shows in past bets",
+                        any(bet["bet_id"] == bet_id for bet in cog.store.past_bets(1, limit=10)[0]))
+        passed &= check("winner paid once", wallets()[str(WINNER)] == before[str(WINNER)] + 100)
+
+        os.chdir(cwd)
+
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -7,7 +7,10 @@ import logging
 import json
 import datetime
 from utils.database import Database
-from utils.config import PREFIX
+from utils.config import PREFIX, SIDE_EFFECT_QUEUE_SIZE, SIDE_EFFECT_WORKERS
+from utils.message_pipeline import MessagePipeline, PRIORITY_FILTER, PRIORITY_USER, PRIORITY_ACTIVITY
+from utils.side_effects import SideEffectQueue, PRIORITY_LOW
+from utils.daily_resets import DailyResetScheduler
 
 # Initialize bot with all intents
 intents = discord.Intents.all()
@@ -19,6 +22,18 @@ os.makedirs('data', exist_ok=True)
 # Initialize database
 db = Database()
 
+# Message pipeline shared with the cogs (they register their own stages on load)
+message_pipeline = MessagePipeline()
+bot.message_pipeline = message_pipeline
+
+# Blocking per-message database work runs on these workers instead of the event loop
+side_effects = SideEffectQueue(maxsize=SIDE_EFFECT_QUEUE_SIZE, workers=SIDE_EFFECT_WORKERS)
+bot.side_effects = side_effects
+
+# Automatic daily rewards at each guild's local midnight
+daily_resets = DailyResetScheduler(bot, db)
+daily_reset_task = None
+
 @bot.event
 async def on_ready():
     """Event triggered when the bot is ready and connected to Discord."""
@@ -31,11 +46,16 @@ async def on_ready():
 
     logging.info(f'Bot logged in as {bot.user.name} (ID: {bot.user.id})')
 
+    # Start the message side-effect workers
+    side_effects.start()
+
     # Load cogs (extensions)
     await load_extensions()
 
-    # Start daily reward loop
-    bot.loop.create_task(daily_reward_loop())
+    # Start the per-guild daily reset scheduler (on_ready also fires after reconnects)
+    global daily_reset_task
+    if daily_reset_task is None or daily_reset_task.done():
+        daily_reset_task = asyncio.create_task(daily_resets.run())
 
     # Sync slash commands with Discord
     try:
@@ -67,30 +87,32 @@ async def on_ready():
 
 async def load_extensions():
     """Load all cog extensions."""
-    for extension in ['cogs.economy', 'cogs.company', 'cogs.moderation', 'cogs.betting', 'cogs.items_new']:
+    for extension in ['cogs.economy', 'cogs.company', 'cogs.moderation', 'cogs.betting', 'cogs.items_new', 'cogs.events']:
         try:
             await bot.load_extension(extension)
             logging.info(f'Loaded extension: {extension}')
         except Exception as e:
             logging.error(f'Failed to load extension {extension}: {e}')
 
-async def daily_reward_loop():
-    """Loop that gives daily rewards to all users."""
-    while True:
-        # Wait until midnight
-        now = datetime.datetime.now()
-        tomorrow = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        seconds_until_midnight = (tomorrow - now).total_seconds()
+def ignore_bots_stage(ctx):
+    """Stop processing messages sent by bots (including this one)."""
+    if ctx.message.author.bot:
+        ctx.stop()
 
-        logging.info(f"Daily reward loop will run in {seconds_until_midnight} seconds")
-        await asyncio.sleep(seconds_until_midnight)
+async def ensure_user_stage(ctx):
+    """Check if user exists in database, if not create them."""
+    await side_effects.submit(db.get_or_create_user, ctx.author_id)
 
-        # Give daily rewards
-        logging.info("Giving daily rewards to all users")
-        db.give_daily_rewards_to_all()
+async def activity_stage(ctx):
+    """If user is in a company, give them activity bonus (merged or dropped under load)."""
+    await side_effects.submit(
+        db.update_activity, ctx.author_id,
+        priority=PRIORITY_LOW, merge_key=("activity", ctx.author_id)
+    )
 
-        # Sleep for a minute to avoid multiple triggers
-        await asyncio.sleep(60)
+message_pipeline.register("ignore-bots", ignore_bots_stage, PRIORITY_FILTER)
+message_pipeline.register("ensure-user", ensure_user_stage, PRIORITY_USER)
+message_pipeline.register("activity", activity_stage, PRIORITY_ACTIVITY)
 
 @bot.event
 async def on_message(message):
@@ -99,14 +121,16 @@ async def on_message(message):
     if message.author == bot.user:
         return
 
+    # Only the filter stages hold up command dispatch
+    ctx = await message_pipeline.filter(message)
+    if ctx.stopped:
+        return
+
     # Process commands
     await bot.process_commands(message)
 
-    # Check if user exists in database, if not create them
-    db.get_or_create_user(message.author.id)
-
-    # If user is in a company, give them activity bonus
-    db.update_activity(message.author.id)
+    # Run the economy stages (user creation, activity bonus, event rewards) in the background
+    message_pipeline.run_in_background(ctx)
 
 @bot.command(name="help")
 async def help_command(ctx, category=None):
@@ -175,8 +199,11 @@ async def help_command(ctx, category=None):
                     ("invite <@user>", "Invite a user to your company"),
                     ("leave", "Leave your current company"),
                     ("kick <@user>", "Kick a member from your company (owner only)"),
+                    ("payroll <total> [treasury]", "Split a payment between your employees (owner only)"),
+                    ("payroll <@user> <amount> ... [treasury]", "Pay set amounts to members (owner only)"),
+                    ("treasury [amount]", "Check or add money to your company's treasury"),
                     ("disband", "Disband your company as the owner"),
-                    ("companies", "List all companies on the server")
+                    ("companies [wealth|members|activity|name] [page]", "List companies on the server")
                 ]
             elif cat == "moderation":
                 commands = [
@@ -199,6 +226,7 @@ async def help_command(ctx, category=None):
                     ("activebets", "View all active betting events"),
                     ("pastbets [limit]", "View past resolved betting events"),
                     ("mybet <bet_id>", "View your bet on an event"),
+                    ("odds <bet_id>", "View the current odds of a bet"),
                     ("cancelbet <bet_id>", "Cancel your bet and get a refund")
                 ]
             elif cat == "items":
@@ -390,6 +418,54 @@ async def sync_commands_slash(interaction: discord.Interaction):
         embed.set_footer(text="Discord Economy Bot")
         await interaction.followup.send(embed=embed, ephemeral=True)
 
+@bot.command(name="pipeline")
+@commands.has_permissions(administrator=True)
+async def pipeline_stats(ctx):
+    """Show per-stage message pipeline latency (admin only)."""
+    embed = discord.Embed(
+        title="Message Pipeline",
+        description="Latency per stage since the bot started",
+        color=discord.Color.blue()
+    )
+
+    for name, stats in message_pipeline.stats().items():
+        embed.add_field(
+            name=name,
+            value=f"Runs: {stats['count']}\n"
+                  f"Avg: {stats['avg_ms']:.2f}ms | p50: {stats['p50_ms']}ms | p99: {stats['p99_ms']}ms\n"
+                  f"Max: {stats['max_ms']:.2f}ms",
+            inline=False
+        )
+
+    queue = side_effects.metrics()
+    embed.add_field(
+        name="Side-effect queue",
+        value=f"Depth: {queue['depth']}/{queue['maxsize']} | Processed: {queue['processed']}\n"
+              f"Dropped: {queue['dropped']} | Merged: {queue['merged']} | Failed: {queue['failed']}\n"
+              f"Lag p50: {queue['lag']['p50_ms']}ms | p99: {queue['lag']['p99_ms']}ms",
+        inline=False
+    )
+
+    embed.set_footer(text="Discord Economy Bot")
+    await ctx.send(embed=embed)
+
+@bot.command(name="dailytimezone")
+@commands.guild_only()
+@commands.has_permissions(administrator=True)
+async def daily_timezone(ctx, timezone_name: str = None):
+    """Show or set the timezone this server's daily reset runs in (admin only)."""
+    if timezone_name is None:
+        zone = daily_resets.get_timezone(ctx.guild.id)
+        next_reset = daily_resets.next_reset(ctx.guild.id, discord.utils.utcnow())
+        await ctx.send(f"Daily rewards reset at midnight {zone.key}, next reset {discord.utils.format_dt(next_reset, 'R')}.")
+        return
+
+    result = daily_resets.set_timezone(ctx.guild.id, timezone_name)
+    if result["success"]:
+        await ctx.send(f"Daily rewards now reset at midnight {timezone_name}, next reset {discord.utils.format_dt(result['next_reset'], 'R')}.")
+    else:
+        await ctx.send(f"Error: {result['message']}. Use a name like `Europe/London` or `America/New_York`.")
+
 # Error handlers for permission checks
 @sync_commands.error
 async def sync_error(ctx, error):
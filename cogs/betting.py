@@ -7,86 +7,123 @@ import os
 import re
 import aiohttp
 import asyncio
+import heapq
+import random
 from datetime import datetime, timedelta
 from utils.database import Database
+from utils.llm import llm_gateway, LLMError
+from utils.bet_store import BetStore
+from utils.bet_matcher import OptionMatcher
+from utils.bet_options import generate_options, is_auto_resolvable
+from utils.match_results import MatchResultCache, match_key
+from utils.config import (
+    BET_RESOLVE_CONCURRENCY, BET_RESOLVE_DEADLINE, BET_RESOLVE_RETRY_BASE, BET_RESOLVE_RETRY_DELAY,
+    BET_WINNER_MIN_SIMILARITY, MATCH_RESULT_MIN_SIMILARITY
+)
 from cogs.base_cog import BaseCog
-import openai
 import logging
 
+class PastBetsView(discord.ui.View):
+    """Newer/Older buttons that page through a guild's archived bets by cursor."""
+
+    def __init__(self, cog, owner, guild, page_size, timeout=120):
+        super().__init__(timeout=timeout)
+        self.cog = cog
+        self.owner = owner
+        self.guild_id = guild.id if guild else None
+        self.page_size = page_size
+        self.cursors = [None]  # Archive cursor of every page visited so far
+        self.page = 0
+        self.has_older = False
+
+    def render(self):
+        """Fetch the current page and build its embed (None if there is nothing to show)."""
+        bets, next_cursor = self.cog.store.past_bets(self.guild_id, before=self.cursors[self.page], limit=self.page_size)
+        self.has_older = next_cursor is not None
+        if not bets:
+            return None
+
+        if self.has_older and len(self.cursors) == self.page + 1:
+            self.cursors.append(next_cursor)
+
+        embed = discord.Embed(
+            title="Past Betting Events",
+            description="Recently resolved bets",
+            color=discord.Color.gold()
+        )
+
+        for bet in bets:
+            resolved_time = bet.get('resolved_at', 'Unknown')
+            if isinstance(resolved_time, datetime):
+                resolved_time = resolved_time.strftime('%Y-%m-%d %H:%M UTC')
+                
+            embed.add_field(
+                name=f"Bet #{bet['bet_id']}",
+                value=f"**Description:** {bet['description']}\n"
+                      f"**Winner:** {bet['winner']}\n"
+                      f"**Total Pot:** ${bet['total_pot']}\n"
+                      f"**Participants:** {bet['num_participants']}\n"
+                      f"**Resolved:** {resolved_time}",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {self.page + 1}")
+        self.newer_button.disabled = self.page == 0
+        self.older_button.disabled = not self.has_older
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner.id:
+            await interaction.response.send_message("Use !pastbets to browse past bets yourself.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.secondary)
+    async def newer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.primary)
+    async def older_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_older:
+            self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+
 class Betting(BaseCog):
     def __init__(self, bot):
         super().__init__(bot)
         self.db = Database()
-        self.bets_file = "data/bets.json"
-        self._load_bets()
-        self.openai_client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self.store = BetStore()
+        # View onto the store's open bets, keyed by bet ID
+        self.active_bets = self.store.active_bets
+
+        # Min-heap of (due time, bet_id) for auto-resolve bets; resolve_at holds each bet's live entry
+        self.resolve_queue = []
+        self.resolve_at = {}
+        self.resolve_wakeup = asyncio.Event()
+        # Bets being resolved right now, and how often each one has failed
+        self.resolve_slots = asyncio.Semaphore(BET_RESOLVE_CONCURRENCY)
+        self.resolving = {}  # {bet_id: task}
+        self.resolve_failures = {}
+        self.match_results = MatchResultCache()
+        self.matchers = {}  # {bet_id: OptionMatcher}
+        # Users remember the last settlement they were paid, so numbering must never restart below it
+        self.store.number_settlements_after(self.db.get_max_settlement_seq())
+        self.finish_settlements()
+        for bet_id, bet in self.active_bets.items():
+            self.matcher(bet_id, bet)
+            if 'auto_resolve' not in bet:
+                # Bets created before eligibility was stored on the bet
+                bet['auto_resolve'] = is_auto_resolvable(bet['description'])
+            if bet['status'] == 'open' and bet['auto_resolve']:
+                self._schedule_auto_resolve(bet_id, bet['end_time'])
+        self.llm = llm_gateway
         
         # Start auto-resolve bets background task when the bot is ready
         # We'll start this in on_ready to ensure the bot is fully initialized
         self.auto_resolve_task = None
         
-    def _load_bets(self):
-        """Load bets from the JSON file."""
-        try:
-            if os.path.exists(self.bets_file):
-                with open(self.bets_file, 'r') as f:
-                    data = json.load(f)
-                    self.active_bets = data.get('active_bets', {})
-                    self.bet_results = data.get('resolved_bets', {})
-                    
-                # Convert string keys to integers
-                self.active_bets = {int(k): v for k, v in self.active_bets.items()}
-                self.bet_results = {int(k): v for k, v in self.bet_results.items()}
-                
-                # Convert datetime strings back to datetime objects
-                for bet_id, bet in self.active_bets.items():
-                    bet['created_at'] = datetime.fromisoformat(bet['created_at']) if isinstance(bet['created_at'], str) else bet['created_at']
-                    bet['end_time'] = datetime.fromisoformat(bet['end_time']) if isinstance(bet['end_time'], str) else bet['end_time']
-                    for user_id, user_bet in bet['participants'].items():
-                        user_bet['placed_at'] = datetime.fromisoformat(user_bet['placed_at']) if isinstance(user_bet['placed_at'], str) else user_bet['placed_at']
-            else:
-                self.active_bets = {}
-                self.bet_results = {}
-                self._save_bets()
-        except Exception as e:
-            logging.error(f"Error loading bets data: {e}")
-            self.active_bets = {}
-            self.bet_results = {}
-            
-    def _save_bets(self):
-        """Save bets to the JSON file."""
-        try:
-            # Create a copy to avoid modifying the original data
-            active_bets_copy = {}
-            for bet_id, bet in self.active_bets.items():
-                bet_copy = bet.copy()
-                # Convert datetime objects to ISO format for JSON serialization
-                bet_copy['created_at'] = bet_copy['created_at'].isoformat() if isinstance(bet_copy['created_at'], datetime) else bet_copy['created_at']
-                bet_copy['end_time'] = bet_copy['end_time'].isoformat() if isinstance(bet_copy['end_time'], datetime) else bet_copy['end_time']
-                
-                # Deep copy participants
-                participants_copy = {}
-                for user_id, user_bet in bet_copy['participants'].items():
-                    user_bet_copy = user_bet.copy()
-                    user_bet_copy['placed_at'] = user_bet_copy['placed_at'].isoformat() if isinstance(user_bet_copy['placed_at'], datetime) else user_bet_copy['placed_at']
-                    participants_copy[user_id] = user_bet_copy
-                    
-                bet_copy['participants'] = participants_copy
-                active_bets_copy[str(bet_id)] = bet_copy
-                
-            # Also serialize the bet results
-            resolved_bets_copy = {}
-            for bet_id, bet in self.bet_results.items():
-                resolved_bets_copy[str(bet_id)] = bet
-                
-            with open(self.bets_file, 'w') as f:
-                json.dump({
-                    'active_bets': active_bets_copy,
-                    'resolved_bets': resolved_bets_copy
-                }, f, indent=2)
-        except Exception as e:
-            logging.error(f"Error saving bets data: {e}")
-
     @commands.command(name="createbet")
     async def createbet_prefix(self, ctx, *, event_description: str):
         """Create a new betting event with AI-generated options."""
@@ -98,18 +135,21 @@ class Betting(BaseCog):
             await ctx.send("Could not analyze the event. Please be more specific!")
             return
 
-        # Generate a unique bet ID by finding the highest ID and adding 1
-        bet_id = max(list(self.active_bets.keys()) + list(self.bet_results.keys()) + [-1]) + 1
-        self.active_bets[bet_id] = {
+        bet_id = self.store.create_bet({
             'creator_id': creator_id,
+            'guild_id': ctx.guild.id if ctx.guild else None,
             'description': event_description,
             'options': event_info['options'],
             'participants': {},
             'status': 'open',
             'created_at': datetime.now(),
             'end_time': event_info['estimated_end_time'],
-            'result': None
-        }
+            'result': None,
+            'auto_resolve': is_auto_resolvable(event_description)
+        })
+        self.matcher(bet_id, self.active_bets[bet_id])
+        if self.active_bets[bet_id]['auto_resolve']:
+            self._schedule_auto_resolve(bet_id, event_info['estimated_end_time'])
 
         embed = discord.Embed(
             title="New Betting Event!",
@@ -121,8 +161,6 @@ class Betting(BaseCog):
         embed.add_field(name="Created by", value=ctx.author.mention, inline=True)
         embed.add_field(name="Estimated End", value=event_info['estimated_end_time'].strftime("%Y-%m-%d %H:%M UTC"), inline=False)
 
-        # Save the bet
-        self._save_bets()
         await ctx.send(embed=embed)
 
     @app_commands.command(name="createbet", description="Create a new betting event")
@@ -137,18 +175,21 @@ class Betting(BaseCog):
             await interaction.response.send_message("Could not analyze the event. Please be more specific!", ephemeral=True)
             return
 
-        # Generate a unique bet ID by finding the highest ID and adding 1
-        bet_id = max(list(self.active_bets.keys()) + list(self.bet_results.keys()) + [-1]) + 1
-        self.active_bets[bet_id] = {
+        bet_id = self.store.create_bet({
             'creator_id': creator_id,
+            'guild_id': interaction.guild.id if interaction.guild else None,
             'description': event_description,
             'options': event_info['options'],
             'participants': {},
             'status': 'open',
             'created_at': datetime.now(),
             'end_time': event_info['estimated_end_time'],
-            'result': None
-        }
+            'result': None,
+            'auto_resolve': is_auto_resolvable(event_description)
+        })
+        self.matcher(bet_id, self.active_bets[bet_id])
+        if self.active_bets[bet_id]['auto_resolve']:
+            self._schedule_auto_resolve(bet_id, event_info['estimated_end_time'])
 
         embed = discord.Embed(
             title="New Betting Event!",
@@ -160,14 +201,13 @@ class Betting(BaseCog):
         embed.add_field(name="Created by", value=interaction.user.mention, inline=True)
         embed.add_field(name="Estimated End", value=event_info['estimated_end_time'].strftime("%Y-%m-%d %H:%M UTC"), inline=False)
 
-        # Save the bet
-        self._save_bets()
         await interaction.response.send_message(embed=embed)
 
     @commands.command(name="placebet")
     async def placebet_prefix(self, ctx, bet_id_str, *args):
         """Place a bet on an event.
         Usage: !placebet <bet_id> <choice> <amount>
+        The choice can be the option text (any case) or its number.
         Example: !placebet #1 "Team A" 100
         """
         # Handle bet_id that might be formatted as #123
@@ -192,6 +232,10 @@ class Betting(BaseCog):
         except ValueError:
             await ctx.send("Invalid amount! The amount must be a number.")
             return
+
+        if amount <= 0:
+            await ctx.send("Amount must be positive!")
+            return
             
         if bet_id not in self.active_bets:
             await ctx.send("Bet not found!")
@@ -202,8 +246,9 @@ class Betting(BaseCog):
             await ctx.send("This bet is no longer accepting entries!")
             return
 
-        if choice not in bet['options']:
-            await ctx.send(f"Invalid choice! Options are: {', '.join(bet['options'])}")
+        choice = self.matcher(bet_id, bet).match_choice(choice)
+        if choice is None:
+            await ctx.send(f"Invalid choice! Options are: {self.numbered_options(bet)}")
             return
 
         user_id = ctx.author.id
@@ -213,14 +258,7 @@ class Betting(BaseCog):
             return
 
         self.db.remove_money(user_id, amount)
-        bet['participants'][user_id] = {
-            'option': choice,
-            'amount': amount,
-            'placed_at': datetime.now()
-        }
-        
-        # Save the changes
-        self._save_bets()
+        self.store.place_stake(bet_id, user_id, choice, amount)
         await ctx.send(f"Bet placed! You bet ${amount} on {choice}")
 
     @app_commands.command(name="placebet", description="Place a bet on an event")
@@ -230,6 +268,10 @@ class Betting(BaseCog):
         amount="Amount to bet"
     )
     async def place_bet(self, interaction: discord.Interaction, bet_id: int, choice: str, amount: int):
+        if amount <= 0:
+            await interaction.response.send_message("Amount must be positive!", ephemeral=True)
+            return
+
         if bet_id not in self.active_bets:
             await interaction.response.send_message("Bet not found!", ephemeral=True)
             return
@@ -239,8 +281,9 @@ class Betting(BaseCog):
             await interaction.response.send_message("This bet is no longer accepting entries!", ephemeral=True)
             return
 
-        if choice not in bet['options']:
-            await interaction.response.send_message(f"Invalid choice! Options are: {', '.join(bet['options'])}", ephemeral=True)
+        choice = self.matcher(bet_id, bet).match_choice(choice)
+        if choice is None:
+            await interaction.response.send_message(f"Invalid choice! Options are: {self.numbered_options(bet)}", ephemeral=True)
             return
 
         user_id = interaction.user.id
@@ -250,14 +293,7 @@ class Betting(BaseCog):
             return
 
         self.db.remove_money(user_id, amount)
-        bet['participants'][user_id] = {
-            'option': choice,
-            'amount': amount,
-            'placed_at': datetime.now()
-        }
-        
-        # Save the changes
-        self._save_bets()
+        self.store.place_stake(bet_id, user_id, choice, amount)
         await interaction.response.send_message(f"Bet placed! You bet ${amount} on {choice}")
 
     @commands.command(name="activebets")
@@ -278,8 +314,8 @@ class Betting(BaseCog):
             embed.add_field(
                 name=f"Bet #{bid}",
                 value=f"Description: {bet['description']}\n"
-                      f"Options: {', '.join(bet['options'])}\n"
-                      f"Total Pot: ${sum(p['amount'] for p in bet['participants'].values())}\n"
+                      f"Options:\n" + "\n".join(self._odds_lines(bid, bet)) + "\n"
+                      f"Total Pot: ${self.store.pool(bid)['total']}\n"
                       f"Ends: {bet['end_time'].strftime('%Y-%m-%d %H:%M UTC')}",
                 inline=False
             )
@@ -303,8 +339,8 @@ class Betting(BaseCog):
             embed.add_field(
                 name=f"Bet #{bid}",
                 value=f"Description: {bet['description']}\n"
-                      f"Options: {', '.join(bet['options'])}\n"
-                      f"Total Pot: ${sum(p['amount'] for p in bet['participants'].values())}\n"
+                      f"Options:\n" + "\n".join(self._odds_lines(bid, bet)) + "\n"
+                      f"Total Pot: ${self.store.pool(bid)['total']}\n"
                       f"Ends: {bet['end_time'].strftime('%Y-%m-%d %H:%M UTC')}",
                 inline=False
             )
@@ -313,79 +349,28 @@ class Betting(BaseCog):
         
     @commands.command(name="pastbets")
     async def pastbets_prefix(self, ctx, limit: int = 5):
-        """View past resolved betting events."""
-        if not self.bet_results:
+        """View past resolved betting events, page by page."""
+        view = PastBetsView(self, ctx.author, ctx.guild, max(1, min(limit, 10)))
+        embed = view.render()
+
+        if embed is None:
             await ctx.send("No past bets found!")
             return
-            
-        embed = discord.Embed(
-            title="Past Betting Events",
-            description="Recently resolved bets",
-            color=discord.Color.gold()
-        )
-        
-        # Sort by resolved_at time, newest first
-        sorted_bets = sorted(
-            self.bet_results.items(), 
-            key=lambda x: x[1].get('resolved_at', datetime.now()), 
-            reverse=True
-        )
-        
-        # Take only the requested number
-        for bid, bet in sorted_bets[:limit]:
-            resolved_time = bet.get('resolved_at', 'Unknown')
-            if isinstance(resolved_time, datetime):
-                resolved_time = resolved_time.strftime('%Y-%m-%d %H:%M UTC')
-                
-            embed.add_field(
-                name=f"Bet #{bid}",
-                value=f"**Description:** {bet['description']}\n"
-                      f"**Winner:** {bet['winner']}\n"
-                      f"**Total Pot:** ${bet['total_pot']}\n"
-                      f"**Participants:** {bet['num_participants']}\n"
-                      f"**Resolved:** {resolved_time}",
-                inline=False
-            )
-            
-        await ctx.send(embed=embed)
+
+        await ctx.send(embed=embed, view=view)
 
     @app_commands.command(name="pastbets", description="View past resolved betting events")
+    @app_commands.describe(limit="Number of bets per page (default: 5)")
     async def view_past_bets(self, interaction: discord.Interaction, limit: int = 5):
         """View past betting events that have been resolved."""
-        if not self.bet_results:
+        view = PastBetsView(self, interaction.user, interaction.guild, max(1, min(limit, 10)))
+        embed = view.render()
+
+        if embed is None:
             await interaction.response.send_message("No past bets found!", ephemeral=True)
             return
-            
-        embed = discord.Embed(
-            title="Past Betting Events",
-            description="Recently resolved bets",
-            color=discord.Color.gold()
-        )
-        
-        # Sort by resolved_at time, newest first
-        sorted_bets = sorted(
-            self.bet_results.items(), 
-            key=lambda x: x[1].get('resolved_at', datetime.now()), 
-            reverse=True
-        )
-        
-        # Take only the requested number
-        for bid, bet in sorted_bets[:limit]:
-            resolved_time = bet.get('resolved_at', 'Unknown')
-            if isinstance(resolved_time, datetime):
-                resolved_time = resolved_time.strftime('%Y-%m-%d %H:%M UTC')
-                
-            embed.add_field(
-                name=f"Bet #{bid}",
-                value=f"**Description:** {bet['description']}\n"
-                      f"**Winner:** {bet['winner']}\n"
-                      f"**Total Pot:** ${bet['total_pot']}\n"
-                      f"**Participants:** {bet['num_participants']}\n"
-                      f"**Resolved:** {resolved_time}",
-                inline=False
-            )
-            
-        await interaction.response.send_message(embed=embed)
+
+        await interaction.response.send_message(embed=embed, view=view)
 
     @commands.command(name="resolvebet")
     @commands.has_permissions(administrator=True)
@@ -413,25 +398,24 @@ class Betting(BaseCog):
             await ctx.send("This bet has already been resolved!")
             return
 
-        if winner not in bet['options']:
-            await ctx.send(f"Invalid winner! Options were: {', '.join(bet['options'])}")
+        winner = self.matcher(bet_id, bet).match_choice(winner)
+        if winner is None:
+            await ctx.send(f"Invalid winner! Options were: {self.numbered_options(bet)}")
             return
 
-        total_pot = sum(p['amount'] for p in bet['participants'].values())
+        pool = self.store.pool(bet_id)
+        total_pot = pool['total']
+        winning_total = pool['amounts'].get(winner, 0)
         winning_bets = {uid: data for uid, data in bet['participants'].items() if data['option'] == winner}
-        winning_total = sum(data['amount'] for data in winning_bets.values())
 
+        credits = {}
         if winning_total > 0:
             for user_id, data in winning_bets.items():
                 win_share = (data['amount'] / winning_total) * total_pot
-                self.db.add_money(user_id, int(win_share))
+                credits[user_id] = int(win_share)
 
-        bet['status'] = 'closed'
-        bet['result'] = winner
-        bet['resolved_at'] = datetime.now()
-        
-        # Move the bet to the resolved bets dict
-        self.bet_results[bet_id] = {
+        # Pay the winners, close the bet and record its summary
+        paid = self.settle_bet(bet_id, credits, {
             'description': bet['description'],
             'options': bet['options'],
             'winner': winner,
@@ -440,10 +424,10 @@ class Betting(BaseCog):
             'num_winners': len(winning_bets),
             'created_at': bet['created_at'],
             'resolved_at': datetime.now()
-        }
-        
-        # Save the changes
-        self._save_bets()
+        })
+        if not paid:
+            await ctx.send("The payout couldn't be recorded right now, please try again later.")
+            return
 
         embed = discord.Embed(
             title="Bet Resolved!",
@@ -472,25 +456,24 @@ class Betting(BaseCog):
             await interaction.response.send_message("This bet has already been resolved!", ephemeral=True)
             return
 
-        if winner not in bet['options']:
-            await interaction.response.send_message(f"Invalid winner! Options were: {', '.join(bet['options'])}", ephemeral=True)
+        winner = self.matcher(bet_id, bet).match_choice(winner)
+        if winner is None:
+            await interaction.response.send_message(f"Invalid winner! Options were: {self.numbered_options(bet)}", ephemeral=True)
             return
 
-        total_pot = sum(p['amount'] for p in bet['participants'].values())
+        pool = self.store.pool(bet_id)
+        total_pot = pool['total']
+        winning_total = pool['amounts'].get(winner, 0)
         winning_bets = {uid: data for uid, data in bet['participants'].items() if data['option'] == winner}
-        winning_total = sum(data['amount'] for data in winning_bets.values())
 
+        credits = {}
         if winning_total > 0:
             for user_id, data in winning_bets.items():
                 win_share = (data['amount'] / winning_total) * total_pot
-                self.db.add_money(user_id, int(win_share))
+                credits[user_id] = int(win_share)
 
-        bet['status'] = 'closed'
-        bet['result'] = winner
-        bet['resolved_at'] = datetime.now()
-        
-        # Move the bet to the resolved bets dict
-        self.bet_results[bet_id] = {
+        # Pay the winners, close the bet and record its summary
+        paid = self.settle_bet(bet_id, credits, {
             'description': bet['description'],
             'options': bet['options'],
             'winner': winner,
@@ -499,10 +482,10 @@ class Betting(BaseCog):
             'num_winners': len(winning_bets),
             'created_at': bet['created_at'],
             'resolved_at': datetime.now()
-        }
-        
-        # Save the changes
-        self._save_bets()
+        })
+        if not paid:
+            await interaction.response.send_message("The payout couldn't be recorded right now, please try again later.", ephemeral=True)
+            return
 
         embed = discord.Embed(
             title="Bet Resolved!",
@@ -548,6 +531,10 @@ class Betting(BaseCog):
         embed.add_field(name="Your Choice", value=user_bet['option'], inline=True)
         embed.add_field(name="Amount Bet", value=f"${user_bet['amount']}", inline=True)
         embed.add_field(name="Placed At", value=user_bet['placed_at'].strftime("%Y-%m-%d %H:%M UTC"), inline=True)
+        if bet['status'] == 'open':
+            _, payout = self.store.odds(bet_id, user_bet['option'])
+            value = f"${int(user_bet['amount'] * payout)} ({payout:.2f}x at current odds)" if payout else "n/a"
+            embed.add_field(name="Payout If You Win", value=value, inline=False)
 
         await ctx.send(embed=embed)
 
@@ -574,9 +561,74 @@ class Betting(BaseCog):
         embed.add_field(name="Your Choice", value=user_bet['option'], inline=True)
         embed.add_field(name="Amount Bet", value=f"${user_bet['amount']}", inline=True)
         embed.add_field(name="Placed At", value=user_bet['placed_at'].strftime("%Y-%m-%d %H:%M UTC"), inline=True)
+        if bet['status'] == 'open':
+            _, payout = self.store.odds(bet_id, user_bet['option'])
+            value = f"${int(user_bet['amount'] * payout)} ({payout:.2f}x at current odds)" if payout else "n/a"
+            embed.add_field(name="Payout If You Win", value=value, inline=False)
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    def _odds_lines(self, bet_id, bet):
+        """Format each option of a bet with its pool and current payout per $1."""
+        pool = self.store.pool(bet_id)
+        lines = []
+        for option in bet['options']:
+            probability, payout = self.store.odds(bet_id, option)
+            quote = f"{payout:.2f}x" if payout else "no bets yet"
+            lines.append(f"{option}: ${pool['amounts'].get(option, 0)} from {pool['counts'].get(option, 0)} bets ({probability:.0%}, {quote})")
+        return lines
+
+    def _odds_embed(self, bet_id, bet):
+        """Build the current odds embed for a bet."""
+        pool = self.store.pool(bet_id)
+        embed = discord.Embed(
+            title=f"Odds for Bet #{bet_id}",
+            description=bet['description'],
+            color=discord.Color.blue()
+        )
+        for option in bet['options']:
+            probability, payout = self.store.odds(bet_id, option)
+            embed.add_field(
+                name=option,
+                value=f"Pool: ${pool['amounts'].get(option, 0)} ({pool['counts'].get(option, 0)} bets)\n"
+                      f"Implied Chance: {probability:.0%}\n"
+                      f"Payout: {f'{payout:.2f}x (${payout:.2f} per $1)' if payout else 'No bets yet'}",
+                inline=True
+            )
+        embed.add_field(name="Total Pot", value=f"${pool['total']}", inline=False)
+        embed.set_footer(text="Odds change as bets are placed and cancelled")
+        return embed
+
+    @commands.command(name="odds")
+    async def odds_prefix(self, ctx, bet_id_str):
+        """View the current odds and payouts of an open bet."""
+        # Handle bet_id that might be formatted as #123
+        try:
+            if bet_id_str.startswith('#'):
+                bet_id = int(bet_id_str[1:])
+            else:
+                bet_id = int(bet_id_str)
+        except ValueError:
+            await ctx.send("Invalid bet ID! Please provide a number.")
+            return
+
+        bet = self.store.get(bet_id)
+        if bet is None or bet['status'] != 'open':
+            await ctx.send("Open bet not found!")
+            return
+
+        await ctx.send(embed=self._odds_embed(bet_id, bet))
+
+    @app_commands.command(name="odds", description="View the current odds and payouts of an open bet")
+    @app_commands.describe(bet_id="The ID of the bet")
+    async def view_odds(self, interaction: discord.Interaction, bet_id: int):
+        bet = self.store.get(bet_id)
+        if bet is None or bet['status'] != 'open':
+            await interaction.response.send_message("Open bet not found!", ephemeral=True)
+            return
+
+        await interaction.response.send_message(embed=self._odds_embed(bet_id, bet))
+
     @commands.command(name="sportsbet")
     async def sportsbet_prefix(self, ctx, end_time: int, option1: str, option2: str, *, match_description: str):
         """Create a sports bet that will be auto-resolved.
@@ -587,15 +639,13 @@ class Betting(BaseCog):
         # Create options list
         options = [option1, option2]
             
-        # Generate a unique bet ID
-        bet_id = max(list(self.active_bets.keys()) + list(self.bet_results.keys()) + [-1]) + 1
-        
         # Calculate end time
         estimated_end_time = datetime.now() + timedelta(hours=end_time)
         
         # Create the bet
-        self.active_bets[bet_id] = {
+        bet_id = self.store.create_bet({
             'creator_id': creator_id,
+            'guild_id': ctx.guild.id if ctx.guild else None,
             'description': match_description,
             'options': options,
             'participants': {},
@@ -604,7 +654,9 @@ class Betting(BaseCog):
             'end_time': estimated_end_time,
             'result': None,
             'auto_resolve': True  # Flag for auto-resolution
-        }
+        })
+        self.matcher(bet_id, self.active_bets[bet_id])
+        self._schedule_auto_resolve(bet_id, estimated_end_time)
         
         # Create the embed
         embed = discord.Embed(
@@ -634,8 +686,6 @@ class Betting(BaseCog):
         
         embed.set_footer(text="Sports bets are automatically resolved after their end time • AI-powered betting system")
         
-        # Save the bet
-        self._save_bets()
         await ctx.send(embed=embed)
 
     @app_commands.command(name="sportsbet", description="Create a sports bet that will be auto-resolved")
@@ -664,15 +714,13 @@ class Betting(BaseCog):
         if option4:
             options.append(option4)
             
-        # Generate a unique bet ID
-        bet_id = max(list(self.active_bets.keys()) + list(self.bet_results.keys()) + [-1]) + 1
-        
         # Calculate end time
         estimated_end_time = datetime.now() + timedelta(hours=end_time)
         
         # Create the bet
-        self.active_bets[bet_id] = {
+        bet_id = self.store.create_bet({
             'creator_id': creator_id,
+            'guild_id': interaction.guild.id if interaction.guild else None,
             'description': match_description,
             'options': options,
             'participants': {},
@@ -681,7 +729,9 @@ class Betting(BaseCog):
             'end_time': estimated_end_time,
             'result': None,
             'auto_resolve': True  # Flag for auto-resolution
-        }
+        })
+        self.matcher(bet_id, self.active_bets[bet_id])
+        self._schedule_auto_resolve(bet_id, estimated_end_time)
         
         # Create the embed
         embed = discord.Embed(
@@ -711,8 +761,6 @@ class Betting(BaseCog):
         
         embed.set_footer(text="Sports bets are automatically resolved after their end time • AI-powered betting system")
         
-        # Save the bet
-        self._save_bets()
         await interaction.response.send_message(embed=embed)
             
     @commands.command(name="cancelbet")
@@ -744,12 +792,8 @@ class Betting(BaseCog):
             return
 
         # Refund the bet amount
-        refund_amount = bet['participants'][user_id]['amount']
+        refund_amount = self.store.cancel_stake(bet_id, user_id)['amount']
         self.db.add_money(user_id, refund_amount)
-        del bet['participants'][user_id]
-        
-        # Save the changes
-        self._save_bets()
 
         await ctx.send(f"Your bet has been cancelled and ${refund_amount} has been refunded to your wallet.")
 
@@ -772,323 +816,278 @@ class Betting(BaseCog):
             return
 
         # Refund the bet amount
-        refund_amount = bet['participants'][user_id]['amount']
+        refund_amount = self.store.cancel_stake(bet_id, user_id)['amount']
         self.db.add_money(user_id, refund_amount)
-        del bet['participants'][user_id]
-        
-        # Save the changes
-        self._save_bets()
 
         await interaction.response.send_message(f"Your bet has been cancelled and ${refund_amount} has been refunded to your wallet.")
 
     async def analyze_event(self, description):
         """Analyze event description to generate smart betting options."""
         try:
-            sports_keywords = {
-                'cricket': ['win by runs', 'win by wickets', 'match tied', 'century scored', 'no century'],
-                'football': ['win by goals', 'draw', 'clean sheet', 'both teams score', 'penalty shootout'],
-                'soccer': ['win by goals', 'draw', 'clean sheet', 'both teams score', 'first half win'],
-                'basketball': ['win by 10+', 'close win', 'overtime', 'record broken'],
-                'tennis': ['straight sets', 'comeback win', 'tiebreak', 'grand slam'],
-                'baseball': ['shutout', 'extra innings', 'grand slam', 'no-hitter'],
-                'hockey': ['shutout', 'overtime', 'hat trick', 'power play goal'],
-                'golf': ['under par', 'hole in one', 'playoff', 'eagle on final hole'],
-                'racing': ['pole position wins', 'crash', 'safety car', 'record lap'],
-                'boxing': ['knockout', 'technical knockout', 'decision', 'draw'],
-                'ufc': ['knockout', 'submission', 'decision', 'first round finish'],
-                'ipl': ['win by runs', 'win by wickets', 'super over', 'century scored'],
-                'match': ['home win', 'away win', 'draw', 'high scoring', 'low scoring']
-            }
-
-            desc_lower = description.lower()
-            options = []
-            
-            # Extract potential team names using simple pattern matching
-            team_patterns = re.findall(r'(\w+)\s+(?:vs\.?|versus|against|and)\s+(\w+)', desc_lower)
-            teams = []
-            if team_patterns:
-                for match in team_patterns:
-                    teams.extend([name.title() for name in match])
-            
-            # Check for specific sports and customize options
-            if 'ipl' in desc_lower or ('cricket' in desc_lower and 't20' in desc_lower):
-                # IPL or T20 cricket
-                if len(teams) >= 2:
-                    options.extend([
-                        f"{teams[0]} wins by 20+ runs",
-                        f"{teams[0]} wins by <20 runs",
-                        f"{teams[1]} wins by 20+ runs",
-                        f"{teams[1]} wins by <20 runs",
-                        "Match goes to Super Over"
-                    ])
-                else:
-                    options.extend([
-                        "Win by 30+ runs",
-                        "Win by 10-29 runs",
-                        "Win by 6+ wickets",
-                        "Win by 1-5 wickets",
-                        "Super Over finish"
-                    ])
-            elif 'test match' in desc_lower or 'test cricket' in desc_lower:
-                # Test cricket
-                options.extend([
-                    "Win by innings",
-                    "Win by <100 runs",
-                    "Win by 100+ runs",
-                    "Draw",
-                    "Match tied"
-                ])
-            elif 'football' in desc_lower or 'soccer' in desc_lower:
-                # Football/Soccer
-                if len(teams) >= 2:
-                    options.extend([
-                        f"{teams[0]} wins",
-                        f"{teams[1]} wins",
-                        "Draw",
-                        "Both teams score",
-                        "Clean sheet for either team"
-                    ])
-                else:
-                    options.extend([
-                        "Home win",
-                        "Away win",
-                        "Draw",
-                        "Both teams score",
-                        "Clean sheet"
-                    ])
-            elif 'basketball' in desc_lower or 'nba' in desc_lower:
-                # Basketball
-                if len(teams) >= 2:
-                    options.extend([
-                        f"{teams[0]} wins by 10+",
-                        f"{teams[0]} wins by <10",
-                        f"{teams[1]} wins by 10+",
-                        f"{teams[1]} wins by <10",
-                        "Game goes to overtime"
-                    ])
-                else:
-                    options.extend([
-                        "Win by 15+ points",
-                        "Win by 5-14 points",
-                        "Win by <5 points",
-                        "Double-double performance",
-                        "Triple-double performance"
-                    ])
-            elif 'tennis' in desc_lower:
-                # Tennis
-                if len(teams) >= 2:
-                    options.extend([
-                        f"{teams[0]} wins in straight sets",
-                        f"{teams[0]} wins in deciding set",
-                        f"{teams[1]} wins in straight sets",
-                        f"{teams[1]} wins in deciding set",
-                        "Match has a tiebreak"
-                    ])
-                else:
-                    options.extend([
-                        "Win in straight sets",
-                        "Win after losing first set",
-                        "Three-set match",
-                        "Five-set match",
-                        "Tiebreak in final set"
-                    ])
-            
-            # If no specific sports options were set, use generic ones based on keywords
-            if not options:
-                for sport, outcomes in sports_keywords.items():
-                    if sport in desc_lower:
-                        # If we have team names, customize options
-                        if len(teams) >= 2:
-                            options.extend([
-                                f"{teams[0]} wins",
-                                f"{teams[1]} wins",
-                                "Draw/Tie",
-                                "Unexpected outcome"
-                            ])
-                        else:
-                            options.extend(outcomes)
-                        break
-
-            # General event options if no sports detected
-            if not options:
-                if 'election' in desc_lower or 'vote' in desc_lower or 'poll' in desc_lower:
-                    options = ['Candidate A wins by large margin', 'Candidate A wins narrowly', 
-                              'Candidate B wins narrowly', 'Candidate B wins by large margin', 'Exact tie/Recount']
-                elif 'weather' in desc_lower or 'temperature' in desc_lower or 'rain' in desc_lower:
-                    options = ['Sunny all day', 'Mostly cloudy', 'Light rain/drizzle', 'Heavy rainfall', 'Mixed conditions']
-                elif 'game' in desc_lower or 'tournament' in desc_lower:
-                    options = ['Player 1 dominates', 'Player 1 wins close game', 'Player 2 wins close game', 
-                              'Player 2 dominates', 'Draw/Stalemate']
-                elif 'award' in desc_lower or 'ceremony' in desc_lower or 'prize' in desc_lower:
-                    options = ['Favorite wins', 'Upset winner', 'Multiple winners tie', 'Award delayed/postponed', 'Controversy occurs']
-
-            # Default options if nothing else matched
-            if not options:
-                options = ["Decisive Victory", "Close Win", "Draw/Tie", "Upset Result", "No Clear Outcome"]
-
-            # Determine appropriate end time based on event type
-            end_time_hours = 24  # Default 24 hours
-            if 'test match' in desc_lower or 'test cricket' in desc_lower:
-                end_time_hours = 120  # 5 days
-            elif 'tournament' in desc_lower or 'championship' in desc_lower:
-                end_time_hours = 72  # 3 days
-            elif 'today' in desc_lower:
-                end_time_hours = 12  # Today's event
-            
-            return {
-                'options': options,
-                'estimated_end_time': datetime.now() + timedelta(hours=end_time_hours),
-                'event_type': 'sports' if any(k in desc_lower for k in sports_keywords) else 'general',
-                'description': description
-            }
-
+            return generate_options(description)
         except Exception as e:
             logging.error(f"Error in event analysis: {str(e)}")
             return None
 
+    def settle_bet(self, bet_id, credits, result):
+        """Pay out a bet exactly once and archive it.
+
+        The settlement is journaled before any money moves, then every credit
+        is applied in one users.json write. finish_settlements() replays the
+        same steps after a crash without paying anyone twice.
+
+        Returns:
+            bool: False, with no money moved, if the settlement could not be
+            journaled or an earlier settlement can't be finished (a later one
+            would make it skip its winners)
+        """
+        if not self.finish_settlements():
+            return False
+        seq = self.store.record_settlement(bet_id, result, credits)
+        if seq is None:
+            return False
+        if not self._finish_settlement(bet_id, seq, result, credits):
+            # The winners are paid, finish_settlements() retries archiving the bet
+            logging.error(f"Could not archive bet #{bet_id}, its settlement stays pending")
+        return True
+
+    def _finish_settlement(self, bet_id, seq, result, credits):
+        """Apply a recorded settlement's credits (skipping any already applied) and resolve the bet.
+
+        Returns False if the bet could not be archived; its settlement then stays pending.
+        """
+        applied = self.db.apply_settlement(seq, credits)["applied"]
+        if applied:
+            self.db.log_transactions([
+                {"sender_id": None, "recipient_id": user_id, "amount": amount,
+                 "type": "bet_payout", "message": f"Won bet #{bet_id}"}
+                for user_id, amount in applied.items()
+            ])
+        if not self.store.resolve_bet(bet_id, result):
+            return False
+        self.matchers.pop(bet_id, None)
+        return True
+
+    def finish_settlements(self):
+        """Complete settlements that were interrupted before their bets were resolved, in order.
+
+        Stops at the first one that fails and returns False: users skip any
+        settlement numbered below the last one they were paid.
+        """
+        for bet_id, seq, result, credits in self.store.unfinished_settlements():
+            try:
+                if not self._finish_settlement(bet_id, seq, result, credits):
+                    logging.error(f"Could not archive bet #{bet_id}, its settlement stays pending")
+                    return False
+                logging.info(f"Finished interrupted settlement of bet #{bet_id}")
+            except Exception as e:
+                logging.error(f"Error finishing settlement of bet #{bet_id}: {e}")
+                return False
+        return True
+
+    def matcher(self, bet_id, bet):
+        """Get the option matcher of a bet, building it the first time."""
+        matcher = self.matchers.get(bet_id)
+        if matcher is None:
+            matcher = self.matchers[bet_id] = OptionMatcher(bet['options'])
+        return matcher
+
+    @staticmethod
+    def numbered_options(bet):
+        """Format a bet's options as a numbered list (users may bet by number)."""
+        return ", ".join(f"{number}. {option}" for number, option in enumerate(bet['options'], 1))
+
+    def _schedule_auto_resolve(self, bet_id, due):
+        """Queue a bet to be auto-resolved at due (replacing any earlier entry)."""
+        self.resolve_at[bet_id] = due
+        heapq.heappush(self.resolve_queue, (due, bet_id))
+        # The loop may be sleeping towards a later deadline
+        self.resolve_wakeup.set()
+
+    def _pop_due_bets(self, now):
+        """Pop every queued bet whose deadline has passed."""
+        due = []
+        while self.resolve_queue and self.resolve_queue[0][0] <= now:
+            due_at, bet_id = heapq.heappop(self.resolve_queue)
+            # Skip entries that were rescheduled or whose bet was resolved by hand
+            if self.resolve_at.get(bet_id) != due_at:
+                continue
+            del self.resolve_at[bet_id]
+            bet = self.active_bets.get(bet_id)
+            if bet is not None and bet['status'] == 'open':
+                due.append((bet_id, bet))
+        return due
+
+    async def auto_resolve_bet(self, bet_id, bet):
+        """Look up a bet's result, pay out the winners and announce it. Returns False if no result was found."""
+        now = datetime.now()
+
+        # Query OpenAI to get the result (or reuse one for the same match)
+        result = await self.lookup_match_result(bet_id, bet)
+        if not result:
+            return False
+
+        # An admin may have resolved the bet while we were waiting
+        if bet['status'] != 'open':
+            return True
+
+        # Get notification channel
+        notification_channel = None
+        for guild in self.bot.guilds:
+            channel = discord.utils.get(guild.text_channels, name="betting")
+            if channel:
+                notification_channel = channel
+                break
+
+        if not notification_channel:
+            for guild in self.bot.guilds:
+                if guild.system_channel:
+                    notification_channel = guild.system_channel
+                    break
+
+        # Resolve the bet
+        pool = self.store.pool(bet_id)
+        total_pot = pool['total']
+
+        # Map the reported winner onto the bet's options
+        winning_option, _ = self.matcher(bet_id, bet).best_match(result['winning_option'], BET_WINNER_MIN_SIMILARITY)
+        if winning_option is None:
+            logging.warning(f"Result for bet #{bet_id} ({result['winning_option']}) matches none of its options")
+            return False
+
+        winning_total = pool['amounts'].get(winning_option, 0)
+        winning_bets = {uid: data for uid, data in bet['participants'].items() 
+                       if data['option'] == winning_option}
+
+        credits = {}
+        if winning_total > 0:
+            for user_id, data in winning_bets.items():
+                win_share = (data['amount'] / winning_total) * total_pot
+                credits[user_id] = int(win_share)
+
+        # Pay the winners, close the bet and record its summary
+        paid = self.settle_bet(bet_id, credits, {
+            'description': bet['description'],
+            'options': bet['options'],
+            'winner': winning_option,
+            'total_pot': total_pot,
+            'num_participants': len(bet['participants']),
+            'num_winners': len(winning_bets),
+            'created_at': bet['created_at'],
+            'resolved_at': now,
+            'auto_resolved': True,
+            'result_details': result['details']
+        })
+        if not paid:
+            return False
+
+        # Send notification if channel available
+        if notification_channel:
+            embed = discord.Embed(
+                title="🎮 Bet Auto-Resolved!",
+                description=bet['description'],
+                color=discord.Color.green()
+            )
+
+            # Show winning option with trophy emoji
+            embed.add_field(name="🏆 Winning Option", value=f"**{winning_option}**", inline=False)
+
+            # Show result details
+            embed.add_field(name="📊 Match Result", value=result['details'], inline=False)
+
+            # Bet statistics
+            embed.add_field(name="💰 Total Pot", value=f"${total_pot}", inline=True)
+            embed.add_field(name="👥 Total Participants", value=str(len(bet['participants'])), inline=True)
+            embed.add_field(name="🎯 Number of Winners", value=str(len(winning_bets)), inline=True)
+
+            # Winnings per $1 bet
+            if winning_total > 0:
+                win_multiplier = total_pot / winning_total
+                embed.add_field(name="💵 Payout Multiplier", 
+                              value=f"{win_multiplier:.2f}x (${win_multiplier:.2f} per $1 bet)", 
+                              inline=False)
+
+            # Set footer with timestamp
+            embed.set_footer(text="Bet resolved automatically by AI • Sports results fetched in real-time")
+            embed.timestamp = now
+
+            await notification_channel.send(embed=embed)
+
+        logging.info(f"Auto-resolved bet #{bet_id}: {bet['description']} with winner {winning_option}")
+        return True
+
+    async def _resolve_with_retry(self, bet_id, bet):
+        """Resolve one bet within its deadline, rescheduling it with backoff if that fails."""
+        resolved = False
+        try:
+            async with self.resolve_slots:
+                resolved = await asyncio.wait_for(self.auto_resolve_bet(bet_id, bet), timeout=BET_RESOLVE_DEADLINE)
+        except asyncio.TimeoutError:
+            logging.error(f"Auto-resolving bet #{bet_id} exceeded its {BET_RESOLVE_DEADLINE}s deadline")
+        except Exception as e:
+            logging.error(f"Error auto-resolving bet #{bet_id}: {e}")
+        finally:
+            self.resolving.pop(bet_id, None)
+
+        if resolved:
+            self.resolve_failures.pop(bet_id, None)
+            return
+
+        # Exponential backoff with jitter, capped at the retry delay
+        failures = self.resolve_failures.get(bet_id, 0)
+        self.resolve_failures[bet_id] = failures + 1
+        delay = min(BET_RESOLVE_RETRY_BASE * 2 ** failures, BET_RESOLVE_RETRY_DELAY)
+        delay += random.uniform(0, delay / 10)
+        logging.info(f"No result for bet #{bet_id} yet, retrying in {delay:.0f} seconds")
+        self._schedule_auto_resolve(bet_id, datetime.now() + timedelta(seconds=delay))
+
     async def auto_resolve_bets_loop(self):
-        """Background task that checks for bets that need to be resolved automatically."""
+        """Background task that resolves auto-resolve bets as their end times pass."""
         await self.bot.wait_until_ready()  # Wait until the bot is ready before starting the loop
         
         while not self.bot.is_closed():
+            self.resolve_wakeup.clear()
             try:
-                # Check for expired bets
-                now = datetime.now()
-                expired_bets = []
-                
-                for bet_id, bet in self.active_bets.items():
-                    # Only auto-resolve sports bets that have passed their end time
-                    sports_keywords = ['cricket', 'football', 'soccer', 'basketball', 'tennis', 'baseball',
-                                  'hockey', 'golf', 'racing', 'boxing', 'ufc', 'ipl', 'match', 'vs', 'versus',
-                                  'tournament', 'championship', 'game', 'series', 'league']
-                    if (bet['status'] == 'open' and 
-                        bet['end_time'] < now and 
-                        (bet.get('auto_resolve', False) or 
-                         any(keyword in bet['description'].lower() for keyword in sports_keywords))):
-                        expired_bets.append((bet_id, bet))
-                
-                # Process expired bets
-                for bet_id, bet in expired_bets:
-                    try:
-                        # Query OpenAI to get the result
-                        result = await self.get_sports_match_result(bet['description'], bet['options'])
-                        
-                        if result:
-                            # Get notification channel
-                            notification_channel = None
-                            for guild in self.bot.guilds:
-                                channel = discord.utils.get(guild.text_channels, name="betting")
-                                if channel:
-                                    notification_channel = channel
-                                    break
-                            
-                            if not notification_channel:
-                                for guild in self.bot.guilds:
-                                    if guild.system_channel:
-                                        notification_channel = guild.system_channel
-                                        break
-                            
-                            # Resolve the bet
-                            total_pot = sum(p['amount'] for p in bet['participants'].values())
-                            winning_option = result['winning_option']
-                            
-                            # Check if winning option is in the bet options
-                            if winning_option not in bet['options']:
-                                # Find closest matching option
-                                similarities = [(option, self._calculate_similarity(option.lower(), winning_option.lower())) 
-                                              for option in bet['options']]
-                                winning_option = max(similarities, key=lambda x: x[1])[0]
-                            
-                            winning_bets = {uid: data for uid, data in bet['participants'].items() 
-                                           if data['option'] == winning_option}
-                            winning_total = sum(data['amount'] for data in winning_bets.values())
-                            
-                            if winning_total > 0:
-                                for user_id, data in winning_bets.items():
-                                    win_share = (data['amount'] / winning_total) * total_pot
-                                    self.db.add_money(user_id, int(win_share))
-                            
-                            bet['status'] = 'closed'
-                            bet['result'] = winning_option
-                            bet['resolved_at'] = now
-                            bet['auto_resolved'] = True
-                            bet['result_details'] = result['details']
-                            
-                            # Move to resolved bets
-                            self.bet_results[bet_id] = {
-                                'description': bet['description'],
-                                'options': bet['options'],
-                                'winner': winning_option,
-                                'total_pot': total_pot,
-                                'num_participants': len(bet['participants']),
-                                'num_winners': len(winning_bets),
-                                'created_at': bet['created_at'],
-                                'resolved_at': now,
-                                'auto_resolved': True,
-                                'result_details': result['details']
-                            }
-                            
-                            # Save changes
-                            self._save_bets()
-                            
-                            # Send notification if channel available
-                            if notification_channel:
-                                embed = discord.Embed(
-                                    title="🎮 Bet Auto-Resolved!",
-                                    description=bet['description'],
-                                    color=discord.Color.green()
-                                )
-                                
-                                # Show winning option with trophy emoji
-                                embed.add_field(name="🏆 Winning Option", value=f"**{winning_option}**", inline=False)
-                                
-                                # Show result details
-                                embed.add_field(name="📊 Match Result", value=result['details'], inline=False)
-                                
-                                # Bet statistics
-                                embed.add_field(name="💰 Total Pot", value=f"${total_pot}", inline=True)
-                                embed.add_field(name="👥 Total Participants", value=str(len(bet['participants'])), inline=True)
-                                embed.add_field(name="🎯 Number of Winners", value=str(len(winning_bets)), inline=True)
-                                
-                                # Winnings per $1 bet
-                                if winning_total > 0:
-                                    win_multiplier = total_pot / winning_total
-                                    embed.add_field(name="💵 Payout Multiplier", 
-                                                  value=f"{win_multiplier:.2f}x (${win_multiplier:.2f} per $1 bet)", 
-                                                  inline=False)
-                                                  
-                                # Set footer with timestamp
-                                embed.set_footer(text="Bet resolved automatically by AI • Sports results fetched in real-time")
-                                embed.timestamp = now
-                                
-                                await notification_channel.send(embed=embed)
-                            
-                            logging.info(f"Auto-resolved bet #{bet_id}: {bet['description']} with winner {winning_option}")
-                    
-                    except Exception as e:
-                        logging.error(f"Error auto-resolving bet #{bet_id}: {e}")
+                for bet_id, bet in self._pop_due_bets(datetime.now()):
+                    if bet_id in self.resolving:
+                        continue
+                    # Each bet resolves on its own so a slow one never holds up the rest
+                    self.resolving[bet_id] = asyncio.create_task(self._resolve_with_retry(bet_id, bet))
                         
             except Exception as e:
                 logging.error(f"Error in auto_resolve_bets_loop: {e}")
-            
-            # Run every 30 minutes
-            await asyncio.sleep(1800)
-    
-    def _calculate_similarity(self, str1, str2):
-        """Calculate basic similarity between two strings."""
-        if not str1 or not str2:
-            return 0
-            
-        # Convert to sets of words
-        set1 = set(str1.split())
-        set2 = set(str2.split())
-        
-        # Calculate Jaccard similarity
-        intersection = len(set1.intersection(set2))
-        union = len(set1.union(set2))
-        
-        return intersection / union if union > 0 else 0
+
+            # Sleep until the next deadline, or until a new bet is scheduled
+            timeout = None
+            if self.resolve_queue:
+                timeout = max((self.resolve_queue[0][0] - datetime.now()).total_seconds(), 0)
+            try:
+                await asyncio.wait_for(self.resolve_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
     
+    async def lookup_match_result(self, bet_id, bet):
+        """Get a bet's match result, reusing the result fetched for another bet on the same fixture."""
+        key = match_key(bet['description'])
+        if key is None:
+            return await self.get_sports_match_result(bet['description'], bet['options'])
+
+        fetched = []
+
+        async def fetch():
+            fetched.append(True)
+            return await self.get_sports_match_result(bet['description'], bet['options'])
+
+        result = await self.match_results.get_or_fetch(key, bet['end_time'], fetch)
+        if result is None or fetched or result['winning_option'] in bet['options']:
+            return result
+
+        # The result was picked from another bet's options, only reuse it if it clearly maps onto ours
+        option, _ = self.matcher(bet_id, bet).best_match(result['winning_option'], MATCH_RESULT_MIN_SIMILARITY)
+        if option is not None:
+            return result
+        return await self.get_sports_match_result(bet['description'], bet['options'])
+
     async def get_sports_match_result(self, match_description, options):
         """Query OpenAI to get sports match results."""
         try:
@@ -1112,34 +1111,20 @@ class Betting(BaseCog):
             - details: A 1-2 sentence explanation of the match result and why this option won
             """
             
-            # Call OpenAI API
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
+            # Call OpenAI API through the shared gateway
+            return await self.llm.complete_json(
+                "betting",
+                [
                     {"role": "system", "content": "You are a virtual betting assistant that analyzes sports data and resolves bets."},
                     {"role": "user", "content": prompt}
                 ],
+                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+                required_keys=("winning_option", "details"),
                 response_format={"type": "json_object"},
                 temperature=0.3  # Lower temperature for more factual responses
             )
-            
-            # Process the response
-            result_text = response.choices[0].message.content
-            try:
-                result = json.loads(result_text)
                 
-                # Validate the result
-                if 'winning_option' not in result or 'details' not in result:
-                    logging.error(f"Invalid response format from OpenAI: {result_text}")
-                    return None
-                    
-                return result
-                
-            except json.JSONDecodeError:
-                logging.error(f"Failed to parse JSON from OpenAI: {result_text}")
-                return None
-                
-        except Exception as e:
+        except LLMError as e:
             logging.error(f"Error getting sports match result: {e}")
             return None
 
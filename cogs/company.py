@@ -6,6 +6,9 @@ import asyncio
 from utils.database import Database
 from cogs.base_cog import BaseCog
 
+# Aggregates the company directory can be sorted by
+COMPANY_SORTS = ("wealth", "members", "activity", "name")
+
 class Company(BaseCog):
     """Cog for handling company-related commands and features."""
     
@@ -20,6 +23,10 @@ class Company(BaseCog):
         self.max_company_members = 10  # Maximum members per company
         self.notification_channel_id = 1352694495530975240  # Channel for notifications
         
+    async def cog_load(self):
+        """Build the company aggregates so activity is counted from startup."""
+        self.db.build_company_stats()
+
     async def send_notification(self, guild, message):
         """Send a notification to the designated channel."""
         channel = guild.get_channel(self.notification_channel_id)
@@ -398,36 +405,145 @@ class Company(BaseCog):
         else:
             await ctx.send(f"Error: {result['message']}")
 
-    @commands.command(name="companies")
-    async def list_companies(self, ctx):
-        """List all companies on the server."""
-        companies = self.db.get_all_companies()
-        
-        if not companies:
-            await ctx.send("There are no companies on this server yet!")
-            return
-            
+    def companies_embed(self, guild, sort_by, page):
+        """Build one page of the company directory (None if there are no companies)."""
+        directory = self.db.get_company_directory(sort_by, page)
+
+        if not directory["total"]:
+            return None
+
         embed = discord.Embed(
             title="Companies Directory",
-            description=f"There are {len(companies)} companies on this server",
+            description=f"There are {directory['total']} companies on this server, sorted by {sort_by}",
             color=discord.Color.blue()
         )
-        
-        for company in companies[:10]:  # Show only the first 10 companies
-            owner = ctx.guild.get_member(company["owner_id"])
+
+        for company in directory["companies"]:
+            owner = guild.get_member(company["owner_id"])
             owner_name = owner.display_name if owner else f"User {company['owner_id']}"
-            
+
             embed.add_field(
                 name=company["name"],
-                value=f"👑 Owner: {owner_name}\n👥 Employees: {len(company['employees'])}",
+                value=f"👑 Owner: {owner_name}\n👥 Members: {company['members']}\n"
+                      f"💰 Wealth: ${company['wealth']}\n📈 Activity (24h): {company['activity']}",
                 inline=False
             )
-            
-        if len(companies) > 10:
-            embed.set_footer(text=f"Showing 10 of {len(companies)} companies")
-            
+
+        embed.set_footer(text=f"Page {directory['page']} of {directory['pages']}")
+        return embed
+
+    @commands.command(name="companies")
+    async def list_companies(self, ctx, sort_by: str = "wealth", page: int = 1):
+        """List companies on the server, sorted by wealth, members, activity or name."""
+        sort_by = sort_by.lower()
+        if sort_by not in COMPANY_SORTS:
+            await ctx.send(f"You can sort companies by {', '.join(COMPANY_SORTS)}.")
+            return
+
+        embed = self.companies_embed(ctx.guild, sort_by, page)
+        if embed is None:
+            await ctx.send("There are no companies on this server yet!")
+            return
+
+        await ctx.send(embed=embed)
+
+    def pay_company(self, company_data, payments, from_treasury):
+        """Run a payroll and build the embed describing it (or the error message)."""
+        if not payments:
+            return None, "Your company has no employees to pay!"
+
+        result = self.db.run_payroll(company_data["id"], payments, from_treasury)
+        if not result["success"]:
+            return None, f"Error: {result['message']}"
+
+        source = "company treasury" if from_treasury else "owner's wallet"
+        embed = discord.Embed(
+            title=f"{company_data['name']} Payroll",
+            description=f"Paid ${result['total']} to {len(payments)} members from the {source}",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="Payments",
+            value="\n".join(f"<@{user_id}>: ${amount}" for user_id, amount in payments.items()),
+            inline=False
+        )
+        embed.add_field(name="Remaining", value=f"${result['remaining']}", inline=False)
+        return embed, None
+
+    @staticmethod
+    def equal_split(company_data, total):
+        """Split a total evenly between the employees (the remainder stays with the payer)."""
+        employees = company_data["employees"]
+        if not employees or total < len(employees):
+            return {}
+        return {employee_id: total // len(employees) for employee_id in employees}
+
+    @commands.command(name="payroll")
+    async def payroll(self, ctx, *args: str):
+        """Pay your employees in one go.
+
+        !payroll <total> [treasury] splits the total evenly between employees,
+        !payroll @user <amount> @user <amount> ... [treasury] pays set amounts.
+        """
+        company_data = self.db.get_user_owned_company(ctx.author.id)
+        if not company_data:
+            await ctx.send("You don't own a company!")
+            return
+
+        from_treasury = any(arg.lower() == "treasury" for arg in args)
+        args = [arg for arg in args if arg.lower() not in ("treasury", "wallet")]
+
+        if len(args) == 1:
+            if not args[0].isdigit():
+                await ctx.send("Usage: `!payroll <total> [treasury]` or `!payroll @user <amount> ... [treasury]`")
+                return
+            total = int(args[0])
+            payments = self.equal_split(company_data, total)
+            if company_data["employees"] and not payments:
+                await ctx.send(f"${total} is not enough to pay {len(company_data['employees'])} employees!")
+                return
+        elif args and len(args) % 2 == 0:
+            payments = {}
+            converter = commands.MemberConverter()
+            try:
+                for mention, amount in zip(args[::2], args[1::2]):
+                    member = await converter.convert(ctx, mention)
+                    payments[member.id] = payments.get(member.id, 0) + int(amount)
+            except (commands.BadArgument, ValueError):
+                await ctx.send("Usage: `!payroll @user <amount> @user <amount> ... [treasury]`")
+                return
+        else:
+            await ctx.send("Usage: `!payroll <total> [treasury]` or `!payroll @user <amount> ... [treasury]`")
+            return
+
+        embed, error = self.pay_company(company_data, payments, from_treasury)
+        if error:
+            await ctx.send(error)
+            return
         await ctx.send(embed=embed)
 
+    @commands.command(name="treasury")
+    async def treasury(self, ctx, amount: int = None):
+        """Check your company's treasury, or add money to it from your wallet."""
+        company_data = self.db.get_user_company(ctx.author.id)
+        if not company_data:
+            await ctx.send("You are not part of any company! Join one or create your own.")
+            return
+
+        if amount is None:
+            await ctx.send(f"🏦 {company_data['name']} treasury: ${company_data.get('treasury', 0)}")
+            return
+
+        if amount <= 0:
+            await ctx.send("Amount must be positive!")
+            return
+
+        result = self.db.fund_company_treasury(company_data["id"], ctx.author.id, amount)
+        if result["success"]:
+            await ctx.send(f"🏦 Added ${amount} to the {company_data['name']} treasury. Treasury: ${result['treasury']}")
+        else:
+            await ctx.send(f"Error: {result['message']}")
+
 # Slash command versions
     @app_commands.command(name="createcompany", description="Create a new company (requires level 35 or level 50 role)")
     @app_commands.describe(company_name="The name of your new company")
@@ -581,6 +697,14 @@ class Company(BaseCog):
                 ("..." if len(employees) > 10 else ""), inline=False)
             
         await interaction.response.send_message(embed=embed)
+
+    @company_info_slash.autocomplete("company_name")
+    async def company_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest company names starting with what the user has typed."""
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.db.search_company_names(current, limit=25)
+        ]
     
     @app_commands.command(name="invite", description="Invite a user to your company")
     @app_commands.describe(user="The user to invite to your company")
@@ -844,34 +968,74 @@ class Company(BaseCog):
             await interaction.response.send_message(f"Error: {result['message']}", ephemeral=True)
 
     @app_commands.command(name="companies", description="List all companies on the server")
-    async def list_companies_slash(self, interaction: discord.Interaction):
+    @app_commands.describe(sort_by="What to sort companies by", page="Page of the directory")
+    @app_commands.choices(sort_by=[app_commands.Choice(name=sort, value=sort) for sort in COMPANY_SORTS])
+    async def list_companies_slash(self, interaction: discord.Interaction, sort_by: str = "wealth", page: int = 1):
         """Slash command for listing all companies."""
-        companies = self.db.get_all_companies()
-        
-        if not companies:
+        embed = self.companies_embed(interaction.guild, sort_by, page)
+        if embed is None:
             await interaction.response.send_message("There are no companies on this server yet!")
             return
-            
-        embed = discord.Embed(
-            title="Companies Directory",
-            description=f"There are {len(companies)} companies on this server",
-            color=discord.Color.blue()
-        )
-        
-        for company in companies[:10]:  # Show only the first 10 companies
-            owner = interaction.guild.get_member(company["owner_id"])
-            owner_name = owner.display_name if owner else f"User {company['owner_id']}"
-            
-            embed.add_field(
-                name=company["name"],
-                value=f"👑 Owner: {owner_name}\n👥 Employees: {len(company['employees'])}",
-                inline=False
+
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="payroll", description="Split a payment evenly between your company's employees")
+    @app_commands.describe(total="Total amount to split", source="Pay from your wallet or the company treasury")
+    @app_commands.choices(source=[
+        app_commands.Choice(name="wallet", value="wallet"),
+        app_commands.Choice(name="treasury", value="treasury")
+    ])
+    async def payroll_slash(self, interaction: discord.Interaction, total: int, source: str = "wallet"):
+        """Slash command for paying employees."""
+        company_data = self.db.get_user_owned_company(interaction.user.id)
+        if not company_data:
+            await interaction.response.send_message("You don't own a company!", ephemeral=True)
+            return
+
+        payments = self.equal_split(company_data, total)
+        if company_data["employees"] and not payments:
+            await interaction.response.send_message(
+                f"${total} is not enough to pay {len(company_data['employees'])} employees!",
+                ephemeral=True
             )
-            
-        if len(companies) > 10:
-            embed.set_footer(text=f"Showing 10 of {len(companies)} companies")
-            
+            return
+
+        embed, error = self.pay_company(company_data, payments, source == "treasury")
+        if error:
+            await interaction.response.send_message(error, ephemeral=True)
+            return
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="treasury", description="Check your company's treasury or add money to it")
+    @app_commands.describe(amount="Amount to add from your wallet (leave empty to check the balance)")
+    async def treasury_slash(self, interaction: discord.Interaction, amount: int = None):
+        """Slash command for the company treasury."""
+        company_data = self.db.get_user_company(interaction.user.id)
+        if not company_data:
+            await interaction.response.send_message(
+                "You are not part of any company! Join one or create your own.",
+                ephemeral=True
+            )
+            return
+
+        if amount is None:
+            await interaction.response.send_message(
+                f"🏦 {company_data['name']} treasury: ${company_data.get('treasury', 0)}",
+                ephemeral=True
+            )
+            return
+
+        if amount <= 0:
+            await interaction.response.send_message("Amount must be positive!", ephemeral=True)
+            return
+
+        result = self.db.fund_company_treasury(company_data["id"], interaction.user.id, amount)
+        if result["success"]:
+            await interaction.response.send_message(
+                f"🏦 Added ${amount} to the {company_data['name']} treasury. Treasury: ${result['treasury']}"
+            )
+        else:
+            await interaction.response.send_message(f"Error: {result['message']}", ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(Company(bot))
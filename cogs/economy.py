@@ -8,8 +8,90 @@ import logging
 from typing import Optional
 from utils.database import Database
 from utils.quests import QuestGenerator
+from utils.timers import TimerService
+from utils.cooldowns import cooldowns
+from utils.robbery import RobberyCoordinator
+from utils.names import NameCache
+from utils.config import QUEST_COOLDOWN
 from cogs.base_cog import BaseCog
 
+class TransactionHistoryView(discord.ui.View):
+    """Newer/Older buttons that page through a user's transactions by cursor."""
+
+    def __init__(self, cog, owner, guild, page_size, timeout=120):
+        super().__init__(timeout=timeout)
+        self.cog = cog
+        self.owner = owner
+        self.guild = guild
+        self.page_size = page_size
+        self.cursors = [None]  # before_id of every page visited so far
+        self.page = 0
+        self.has_older = False
+
+    async def render(self):
+        """Fetch the current page and build its embed (None if there is nothing to show)."""
+        # One extra row tells us whether an older page exists
+        transactions = self.cog.db.get_user_transactions(
+            self.owner.id, self.page_size + 1, before_id=self.cursors[self.page]
+        )
+        self.has_older = len(transactions) > self.page_size
+        transactions = transactions[:self.page_size]
+        if not transactions:
+            return None
+
+        if self.has_older and len(self.cursors) == self.page + 1:
+            self.cursors.append(transactions[-1]["id"])
+
+        counterparties = [
+            tx["recipient_id"] if tx["sender_id"] == self.owner.id else tx["sender_id"]
+            for tx in transactions
+        ]
+        names = await self.cog.names.resolve(self.guild, [uid for uid in counterparties if uid is not None])
+
+        embed = discord.Embed(
+            title=f"Transaction History for {self.owner.display_name}",
+            color=discord.Color.blue()
+        )
+
+        for tx in transactions:
+            # Format transaction details
+            if tx["sender_id"] == self.owner.id:
+                recipient = "System" if tx["recipient_id"] is None else names[tx["recipient_id"]]
+                description = f"Sent ${tx['amount']} to {recipient}"
+            else:
+                sender = "System" if tx["sender_id"] is None else names[tx["sender_id"]]
+                description = f"Received ${tx['amount']} from {sender}"
+
+            timestamp = datetime.fromisoformat(tx["timestamp"])
+            embed.add_field(
+                name=f"{tx['type']} - {timestamp.strftime('%Y-%m-%d %H:%M')}",
+                value=f"{description}\n{tx['message'] if tx['message'] else ''}",
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {self.page + 1}")
+        self.newer_button.disabled = self.page == 0
+        self.older_button.disabled = not self.has_older
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner.id:
+            await interaction.response.send_message("This is not your transaction history.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.secondary)
+    async def newer_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.primary)
+    async def older_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_older:
+            self.page += 1
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+
 class Economy(BaseCog):
     """Cog for handling all economy-related commands and functions."""
 
@@ -17,8 +99,79 @@ class Economy(BaseCog):
         super().__init__(bot)
         self.db = Database()
         self.quest_generator = QuestGenerator()
-        self.quest_cooldowns = {}
-        self.rob_attempts = {}  # Track robbery attempts {target_id: [user_ids]}
+        self.cooldowns = cooldowns  # Shared, persisted cooldowns
+        self.robberies = RobberyCoordinator(self.db, self.cooldowns)
+        self.timers = TimerService(save_files=self.db.save_json_files)  # Persisted quest deadlines
+        self.timer_task = None
+        self.names = NameCache(bot)  # Display names for transaction history
+        self.leaderboards = {}  # Rendered top 10 {guild_id: {"embed", "user_ids", "threshold"}}
+
+    async def cog_load(self):
+        """Start the quest timers when the cog is loaded."""
+        self.timers.register_handler("quest", self.settle_quests)
+        self.timer_task = asyncio.create_task(self.run_timers())
+
+        # Have AI quests ready before the first !quest
+        self.quest_generator.start()
+
+        self.loop = asyncio.get_running_loop()
+        self.db.add_balance_listener(self.on_balance_changes)
+
+    def cog_unload(self):
+        """Called when the cog is unloaded."""
+        self.db.remove_balance_listener(self.on_balance_changes)
+        if self.timer_task:
+            self.timer_task.cancel()
+
+    async def run_timers(self):
+        """Run the quest timer service once the bot can send messages."""
+        await self.bot.wait_until_ready()
+        await self.timers.run()
+
+    async def settle_quests(self, timers):
+        """Settle a batch of quests whose time limit has passed."""
+        credits = {}
+        outcomes = []
+
+        for timer in timers:
+            quest = timer["payload"]
+            user_id = quest["user_id"]
+
+            # Roll for success (70% chance)
+            success = random.random() < 0.7
+            if success:
+                credits[user_id] = credits.get(user_id, 0) + quest["reward"]
+            outcomes.append((quest, success))
+
+        # Pay every successful quest in one write, together with removing the settled timers
+        if credits:
+            self.db.apply_wallet_changes(credits, commit=lambda files: self.timers.commit(timers, files))
+            self.db.log_transactions([
+                {
+                    "sender_id": None,
+                    "recipient_id": quest["user_id"],
+                    "amount": quest["reward"],
+                    "type": "quest",
+                    "message": f"Quest completed: {quest['title']}"
+                }
+                for quest, success in outcomes if success
+            ])
+        else:
+            # Nobody won, but the rolls are final: remove the timers now or a restart would roll again
+            self.timers.commit(timers, {})
+
+        for quest, success in outcomes:
+            channel = self.bot.get_channel(quest["channel_id"])
+            if not channel:
+                continue
+
+            try:
+                if success:
+                    await channel.send(f"<@{quest['user_id']}>, you completed the quest and earned ${quest['reward']}!")
+                else:
+                    await channel.send(f"<@{quest['user_id']}>, you failed to complete the quest. Better luck next time!")
+            except discord.HTTPException as e:
+                logging.error(f"Failed to announce quest result for {quest['user_id']}: {e}")
 
     @commands.command(name="balance", aliases=["bal"])
     async def balance(self, ctx):
@@ -36,13 +189,27 @@ class Economy(BaseCog):
 
         await ctx.send(embed=embed)
 
+    def claim_daily(self, user_id):
+        """Claim the daily reward, answering repeat attempts from the cooldown store."""
+        next_available = self.cooldowns.expires_at("daily", None, user_id)
+        if next_available is not None:
+            return {"success": False, "next_available": next_available}
+
+        result = self.db.claim_daily_reward(user_id)
+        if result["success"]:
+            next_available = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+        else:
+            next_available = result["next_available"]
+        self.cooldowns.set("daily", None, user_id, until=next_available)
+        return result
+
     @commands.command(name="daily")
     async def daily(self, ctx):
         """Claim your daily reward of $100."""
         user_id = ctx.author.id
 
         # Check if daily reward is available
-        result = self.db.claim_daily_reward(user_id)
+        result = self.claim_daily(user_id)
 
         if result["success"]:
             embed = discord.Embed(
@@ -339,10 +506,9 @@ class Economy(BaseCog):
         user_id = ctx.author.id
 
         # Check cooldown
-        now = datetime.now()
-        if user_id in self.quest_cooldowns and now < self.quest_cooldowns[user_id]:
-            time_left = self.quest_cooldowns[user_id] - now
-            minutes, seconds = divmod(time_left.seconds, 60)
+        time_left = int(self.cooldowns.remaining("quest", None, user_id))
+        if time_left:
+            minutes, seconds = divmod(time_left, 60)
             await ctx.send(f"You need to wait {minutes}m {seconds}s before getting another quest!")
             return
 
@@ -350,7 +516,7 @@ class Economy(BaseCog):
         quest_data = await self.quest_generator.generate_quest(ctx.author.display_name)
 
         # Set cooldown (30 minutes)
-        self.quest_cooldowns[user_id] = now + timedelta(minutes=30)
+        self.cooldowns.set("quest", None, user_id, QUEST_COOLDOWN)
 
         # Create embed for quest
         embed = discord.Embed(
@@ -375,20 +541,14 @@ class Economy(BaseCog):
             reaction, user = await self.bot.wait_for('reaction_add', timeout=60.0, check=check)
 
             if str(reaction.emoji) == "✅":
-                # Quest accepted
+                # Quest accepted, the outcome is settled by the quest timer when the time limit passes
+                self.timers.schedule("quest", datetime.now() + timedelta(minutes=quest_data['time_limit']), {
+                    "user_id": user_id,
+                    "channel_id": ctx.channel.id,
+                    "reward": quest_data['reward'],
+                    "title": quest_data['quest_title']
+                })
                 await ctx.send(f"Quest accepted! You have {quest_data['time_limit']} minutes to complete it.")
-
-                # Wait for the time limit
-                await asyncio.sleep(quest_data['time_limit'] * 60)
-
-                # Roll for success (70% chance)
-                if random.random() < 0.7:
-                    # Success
-                    self.db.add_money(user_id, quest_data['reward'])
-                    await ctx.send(f"{ctx.author.mention}, you completed the quest and earned ${quest_data['reward']}!")
-                else:
-                    # Failure
-                    await ctx.send(f"{ctx.author.mention}, you failed to complete the quest. Better luck next time!")
             else:
                 # Quest declined
                 await ctx.send("Quest declined. You can get another quest in 30 minutes.")
@@ -396,89 +556,78 @@ class Economy(BaseCog):
         except asyncio.TimeoutError:
             await ctx.send(f"{ctx.author.mention}, quest offer expired.")
 
+    def robbery_message(self, guild, robber, target, join_hint):
+        """Join a robbery and return the reply text and whether it should be private."""
+        result = self.robberies.join(guild.id, target.id, robber.id)
+
+        if not result["success"]:
+            messages = {
+                "self": "You can't rob yourself!",
+                "recently_robbed": f"{target.display_name} has already been robbed recently. Try again later!",
+                "already_joined": "You're already part of this robbery attempt!",
+                "empty_wallet": f"{target.display_name} has no money in their wallet to rob!"
+            }
+            # Everyone in the lobby wants to know the robbery fell through
+            return messages[result["reason"]], result["reason"] != "empty_wallet"
+
+        if not result["complete"]:
+            minutes = max(1, int((result["expires"] - datetime.now()).total_seconds() // 60))
+            return (
+                f"{robber.display_name} wants to rob {target.display_name}! {result['needed']} more people needed "
+                f"within {minutes}m! Use {join_hint} to join."
+            ), False
+
+        robbers_mentions = [member.mention for member in map(guild.get_member, result["robbers"]) if member]
+        robbers_list = " ".join(robbers_mentions)
+        return (
+            f"Robbery successful! {robbers_list} robbed {target.mention} of ${result['amount']} "
+            f"and each got ${result['split']}!"
+        ), False
+
     @commands.command(name="rob")
     async def rob(self, ctx, target: discord.Member):
         """Attempt to rob another user (requires 5+ people)."""
-        user_id = ctx.author.id
-        target_id = target.id
-
-        # Can't rob yourself
-        if user_id == target_id:
-            await ctx.send("You can't rob yourself!")
-            return
-
-        # Check if target has already been robbed recently
-        if target_id in self.rob_attempts and "last_robbed" in self.rob_attempts[target_id]:
-            last_robbed = self.rob_attempts[target_id]["last_robbed"]
-            if datetime.now() < last_robbed + timedelta(hours=1):
-                await ctx.send(f"{target.display_name} has already been robbed recently. Try again later!")
-                return
-
-        # Initialize rob attempt for this target if it doesn't exist
-        if target_id not in self.rob_attempts:
-            self.rob_attempts[target_id] = {"users": []}
-
-        # Check if this user already joined the rob attempt
-        if user_id in self.rob_attempts[target_id]["users"]:
-            await ctx.send("You're already part of this robbery attempt!")
-            return
-
-        # Add user to rob attempt
-        self.rob_attempts[target_id]["users"].append(user_id)
-        robbers_count = len(self.rob_attempts[target_id]["users"])
-
-        if robbers_count < 5:
-            # Not enough robbers yet
-            await ctx.send(f"{ctx.author.display_name} wants to rob {target.display_name}! {5 - robbers_count} more people needed! Use !rob {target.display_name} to join.")
-        else:
-            # Enough robbers to attempt the robbery
-            target_data = self.db.get_or_create_user(target_id)
-
-            # Check if target has money in wallet
-            if target_data["wallet"] <= 0:
-                await ctx.send(f"{target.display_name} has no money in their wallet to rob!")
-                self.rob_attempts.pop(target_id)
-                return
-
-            # Calculate amount to rob (10-25% of wallet)
-            rob_percent = random.uniform(0.1, 0.25)
-            rob_amount = int(target_data["wallet"] * rob_percent)
-
-            # Ensure minimum rob amount
-            rob_amount = min(rob_amount, 10)
-
-            # Ensure rob amount doesn't exceed wallet
-            rob_amount = min(rob_amount, target_data["wallet"])
-
-            # Complete the robbery
-            self.db.remove_money(target_id, rob_amount)
-
-            # Split the money between robbers
-            split_amount = rob_amount // len(self.rob_attempts[target_id]["users"])
-
-            # Give each robber their cut
-            robbers_mentions = []
-            for robber_id in self.rob_attempts[target_id]["users"]:
-                self.db.add_money(robber_id, split_amount)
-                robber = ctx.guild.get_member(robber_id)
-                if robber:
-                    robbers_mentions.append(robber.mention)
-
-            # Set the cooldown for robbing this target again
-            self.rob_attempts[target_id] = {"last_robbed": datetime.now()}
-
-            # Send success message
-            robbers_list = " ".join(robbers_mentions)
-            await ctx.send(f"Robbery successful! {robbers_list} robbed {target.mention} of ${rob_amount} and each got ${split_amount}!")
-
-    @commands.command(name="leaderboard", aliases=["lb"])
-    async def leaderboard(self, ctx):
-        """Display the richest users on the server."""
-        leaderboard_data = self.db.get_leaderboard()
+        message, _ = self.robbery_message(ctx.guild, ctx.author, target, f"!rob {target.display_name}")
+        await ctx.send(message)
+
+    def on_balance_changes(self, changes):
+        """Balance listener, called from whichever thread saved users.json (often the side-effect worker)."""
+        # Guilds, members and the leaderboard cache belong to the event loop
+        self.loop.call_soon_threadsafe(self.invalidate_leaderboards, changes)
+
+    def invalidate_leaderboards(self, changes):
+        """Drop cached leaderboards that a balance change could reorder."""
+        for guild_id, cached in list(self.leaderboards.items()):
+            guild = self.bot.get_guild(guild_id)
+            for user_id, total in changes.items():
+                # Someone already on the board moved, or a member climbed past tenth place
+                if user_id in cached["user_ids"] or (
+                    total >= cached["threshold"] and guild and guild.get_member(user_id)
+                ):
+                    self.leaderboards.pop(guild_id, None)
+                    break
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """A new member may belong on the leaderboard."""
+        self.leaderboards.pop(member.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """A member who left no longer belongs on the leaderboard."""
+        self.leaderboards.pop(member.guild.id, None)
+
+    def get_leaderboard_embed(self, guild):
+        """Get the top 10 embed for a guild, rendering it only when the cached one is stale."""
+        cached = self.leaderboards.get(guild.id)
+        if cached:
+            return cached["embed"]
+
+        member_ids = {member.id for member in guild.members}
+        leaderboard_data = self.db.get_leaderboard(user_ids=member_ids, limit=10)
 
         if not leaderboard_data:
-            await ctx.send("No data available for the leaderboard yet!")
-            return
+            return None
 
         embed = discord.Embed(
             title="Economy Leaderboard",
@@ -486,8 +635,8 @@ class Economy(BaseCog):
             color=discord.Color.gold()
         )
 
-        for i, entry in enumerate(leaderboard_data[:10], 1):
-            user = ctx.guild.get_member(entry["user_id"])
+        for i, entry in enumerate(leaderboard_data, 1):
+            user = guild.get_member(entry["user_id"])
             username = user.display_name if user else f"User {entry['user_id']}"
 
             # Calculate total wealth
@@ -499,6 +648,25 @@ class Economy(BaseCog):
                 inline=False
             )
 
+        # With fewer than 10 ranked, any member's change can add them to the board
+        last = leaderboard_data[-1]
+        threshold = last["wallet"] + last["bank"] if len(leaderboard_data) == 10 else float("-inf")
+        self.leaderboards[guild.id] = {
+            "embed": embed,
+            "user_ids": {entry["user_id"] for entry in leaderboard_data},
+            "threshold": threshold
+        }
+        return embed
+
+    @commands.command(name="leaderboard", aliases=["lb"])
+    async def leaderboard(self, ctx):
+        """Display the richest users on the server."""
+        embed = self.get_leaderboard_embed(ctx.guild)
+
+        if embed is None:
+            await ctx.send("No data available for the leaderboard yet!")
+            return
+
         await ctx.send(embed=embed)
 
 # Slash command equivalents
@@ -524,7 +692,7 @@ class Economy(BaseCog):
         user_id = interaction.user.id
 
         # Check if daily reward is available
-        result = self.db.claim_daily_reward(user_id)
+        result = self.claim_daily(user_id)
 
         if result["success"]:
             embed = discord.Embed(
@@ -658,10 +826,9 @@ class Economy(BaseCog):
         user_id = interaction.user.id
 
         # Check cooldown
-        now = datetime.now()
-        if user_id in self.quest_cooldowns and now < self.quest_cooldowns[user_id]:
-            time_left = self.quest_cooldowns[user_id] - now
-            minutes, seconds = divmod(time_left.seconds, 60)
+        time_left = int(self.cooldowns.remaining("quest", None, user_id))
+        if time_left:
+            minutes, seconds = divmod(time_left, 60)
             await interaction.response.send_message(
                 f"You need to wait {minutes}m {seconds}s before getting another quest!", 
                 ephemeral=True
@@ -672,7 +839,7 @@ class Economy(BaseCog):
         quest_data = await self.quest_generator.generate_quest(interaction.user.display_name)
 
         # Set cooldown (30 minutes)
-        self.quest_cooldowns[user_id] = now + timedelta(minutes=30)
+        self.cooldowns.set("quest", None, user_id, QUEST_COOLDOWN)
 
         # Create embed for quest
         embed = discord.Embed(
@@ -701,114 +868,20 @@ class Economy(BaseCog):
     @app_commands.describe(user="User to rob")
     async def rob_slash(self, interaction: discord.Interaction, user: discord.Member):
         """Slash command for robbing other users."""
-        user_id = interaction.user.id
-        target_id = user.id
-
-        # Can't rob yourself
-        if user_id == target_id:
-            await interaction.response.send_message("You can't rob yourself!", ephemeral=True)
-            return
-
-        # Check if target has already been robbed recently
-        if target_id in self.rob_attempts and "last_robbed" in self.rob_attempts[target_id]:
-            last_robbed = self.rob_attempts[target_id]["last_robbed"]
-            if datetime.now() < last_robbed + timedelta(hours=1):
-                await interaction.response.send_message(
-                    f"{user.display_name} has already been robbed recently. Try again later!",
-                    ephemeral=True
-                )
-                return
-
-        # Initialize rob attempt for this target if it doesn't exist
-        if target_id not in self.rob_attempts:
-            self.rob_attempts[target_id] = {"users": []}
-
-        # Check if this user already joined the rob attempt
-        if user_id in self.rob_attempts[target_id]["users"]:
-            await interaction.response.send_message("You're already part of this robbery attempt!", ephemeral=True)
-            return
-
-        # Add user to rob attempt
-        self.rob_attempts[target_id]["users"].append(user_id)
-        robbers_count = len(self.rob_attempts[target_id]["users"])
-
-        if robbers_count < 5:
-            # Not enough robbers yet
-            await interaction.response.send_message(
-                f"{interaction.user.display_name} wants to rob {user.display_name}! " +
-                f"{5 - robbers_count} more people needed! Use `/rob user:{user.display_name}` to join."
-            )
-        else:
-            # Enough robbers to attempt the robbery
-            target_data = self.db.get_or_create_user(target_id)
-
-            # Check if target has money in wallet
-            if target_data["wallet"] <= 0:
-                await interaction.response.send_message(f"{user.display_name} has no money in their wallet to rob!")
-                self.rob_attempts.pop(target_id)
-                return
-
-            # Calculate amount to rob (10-25% of wallet)
-            rob_percent = random.uniform(0.1, 0.25)
-            rob_amount = int(target_data["wallet"] * rob_percent)
-
-            # Ensure minimum rob amount
-            rob_amount = max(rob_amount, 10)
-
-            # Ensure rob amount doesn't exceed wallet
-            rob_amount = min(rob_amount, target_data["wallet"])
-
-            # Complete the robbery
-            self.db.remove_money(target_id, rob_amount)
-
-            # Split the money between robbers
-            split_amount = rob_amount // len(self.rob_attempts[target_id]["users"])
-
-            # Give each robber their cut
-            robbers_mentions = []
-            for robber_id in self.rob_attempts[target_id]["users"]:
-                self.db.add_money(robber_id, split_amount)
-                robber = interaction.guild.get_member(robber_id)
-                if robber:
-                    robbers_mentions.append(robber.mention)
-
-            # Set the cooldown for robbing this target again
-            self.rob_attempts[target_id] = {"last_robbed": datetime.now()}
-
-            # Send success message
-            robbers_list = " ".join(robbers_mentions)
-            await interaction.response.send_message(
-                f"Robbery successful! {robbers_list} robbed {user.mention} of ${rob_amount} and each got ${split_amount}!"
-            )
+        message, ephemeral = self.robbery_message(
+            interaction.guild, interaction.user, user, f"`/rob user:{user.display_name}`"
+        )
+        await interaction.response.send_message(message, ephemeral=ephemeral)
 
     @app_commands.command(name="leaderboard", description="Display the richest users on the server")
     async def leaderboard_slash(self, interaction: discord.Interaction):
         """Slash command equivalent for viewing leaderboard."""
-        leaderboard_data = self.db.get_leaderboard()
+        embed = self.get_leaderboard_embed(interaction.guild)
 
-        if not leaderboard_data:
+        if embed is None:
             await interaction.response.send_message("No data available for the leaderboard yet!")
             return
 
-        embed = discord.Embed(
-            title="Economy Leaderboard",
-            description="The richest users in the server",
-            color=discord.Color.gold()
-        )
-
-        for i, entry in enumerate(leaderboard_data[:10], 1):
-            user = interaction.guild.get_member(entry["user_id"])
-            username = user.display_name if user else f"User {entry['user_id']}"
-
-            # Calculate total wealth
-            total = entry["wallet"] + entry["bank"]
-
-            embed.add_field(
-                name=f"{i}. {username}",
-                value=f"Wallet: ${entry['wallet']} | Bank: ${entry['bank']} | Total: ${total}",
-                inline=False
-            )
-
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="request", description="Request money from another user")
@@ -960,68 +1033,28 @@ class Economy(BaseCog):
 
     @commands.command(name="history", aliases=["transactions"])
     async def transaction_history(self, ctx, limit: int = 5):
-        """View your recent transaction history."""
-        user_id = ctx.author.id
-        transactions = self.db.get_user_transactions(user_id, limit)
+        """View your transaction history, page by page."""
+        view = TransactionHistoryView(self, ctx.author, ctx.guild, max(1, min(limit, 10)))
+        embed = await view.render()
 
-        if not transactions:
+        if embed is None:
             await ctx.send("You don't have any transactions yet!")
             return
 
-        embed = discord.Embed(
-            title=f"Transaction History for {ctx.author.display_name}",
-            color=discord.Color.blue()
-        )
-
-        for tx in transactions:
-            # Format transaction details
-            if tx["sender_id"] == user_id:
-                description = f"Sent ${tx['amount']} to {ctx.guild.get_member(tx['recipient_id']).display_name}"
-            else:
-                sender = "System" if tx["sender_id"] is None else ctx.guild.get_member(tx["sender_id"]).display_name
-                description = f"Received ${tx['amount']} from {sender}"
-
-            timestamp = datetime.fromisoformat(tx["timestamp"])
-            embed.add_field(
-                name=f"{tx['type']} - {timestamp.strftime('%Y-%m-%d %H:%M')}",
-                value=f"{description}\n{tx['message'] if tx['message'] else ''}",
-                inline=False
-            )
-
-        await ctx.send(embed=embed)
+        await ctx.send(embed=embed, view=view)
 
-    @app_commands.command(name="history", description="View your recent transaction history")
-    @app_commands.describe(limit="Number of transactions to show (default: 5)")
+    @app_commands.command(name="history", description="View your transaction history")
+    @app_commands.describe(limit="Number of transactions per page (default: 5)")
     async def transaction_history_slash(self, interaction: discord.Interaction, limit: int = 5):
         """Slash command for viewing transaction history."""
-        user_id = interaction.user.id
-        transactions = self.db.get_user_transactions(user_id, limit)
+        view = TransactionHistoryView(self, interaction.user, interaction.guild, max(1, min(limit, 10)))
+        embed = await view.render()
 
-        if not transactions:
+        if embed is None:
             await interaction.response.send_message("You don't have any transactions yet!", ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title=f"Transaction History for {interaction.user.display_name}",
-            color=discord.Color.blue()
-        )
-
-        for tx in transactions:
-            # Format transaction details
-            if tx["sender_id"] == user_id:
-                description = f"Sent ${tx['amount']} to {interaction.guild.get_member(tx['recipient_id']).display_name}"
-            else:
-                sender = "System" if tx["sender_id"] is None else interaction.guild.get_member(tx["sender_id"]).display_name
-                description = f"Received ${tx['amount']} from {sender}"
-
-            timestamp = datetime.fromisoformat(tx["timestamp"])
-            embed.add_field(
-                name=f"{tx['type']} - {timestamp.strftime('%Y-%m-%d %H:%M')}",
-                value=f"{description}\n{tx['message'] if tx['message'] else ''}",
-                inline=False
-            )
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
     @commands.command(name="questcomplete")
     async def questcomplete(self, ctx):
@@ -7,7 +7,9 @@ import os
 from datetime import datetime, timedelta
 
 from cogs.base_cog import BaseCog
+from utils.database import Database
 from utils.economic_events import EconomicEventManager
+from utils.message_pipeline import PRIORITY_REWARDS
 
 # Initialize the economic event manager
 event_manager = EconomicEventManager()
@@ -17,21 +19,27 @@ class EventsCog(BaseCog):
     
     def __init__(self, bot):
         super().__init__(bot)
+        self.db = Database()
         self.event_manager = event_manager
         
         # Start the event checking task
         self.event_check_loop.start()
+
+    async def cog_load(self):
+        """Register the message reward stage when the cog is loaded."""
+        self.bot.message_pipeline.register("event-reward", self.event_reward_stage, PRIORITY_REWARDS)
         
     def cog_unload(self):
         """Called when the cog is unloaded."""
         self.event_check_loop.cancel()
+        self.bot.message_pipeline.unregister("event-reward")
     
     @tasks.loop(hours=4)
     async def event_check_loop(self):
         """Check for random events and potentially generate a new one."""
         try:
             # 10% chance to generate a new event every 4 hours, max 3 active events
-            new_event = self.event_manager.generate_random_events(chance=0.1, max_events=3)
+            new_event = await self.event_manager.generate_random_events(chance=0.1, max_events=3)
             
             if new_event:
                 # If new event was generated, announce it to all servers
@@ -135,18 +143,15 @@ class EventsCog(BaseCog):
         
         # Generate event
         try:
-            new_event = self.event_manager.generate_event(event_type)
+            new_event = await self.event_manager.generate_event_async(event_type)
             embed = self.create_event_embed(new_event)
             await ctx.send("Generated new economic event:", embed=embed)
         except Exception as e:
             await ctx.send(f"Error generating event: {e}")
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        """Apply economic event multipliers to message rewards, if applicable."""
-        # Don't process messages from the bot itself
-        if message.author.bot:
-            return
+    async def event_reward_stage(self, ctx):
+        """Message pipeline stage: apply economic event multipliers to random message rewards."""
+        message = ctx.message
         
         # Check if there's a random reward for the message (1% chance)
         if random.random() < 0.01:
@@ -160,11 +165,9 @@ class EventsCog(BaseCog):
             reward = round(base_reward * multiplier)
             
             if reward > 0:
-                # Try to get the member and update their wallet
-                # This would integrate with your economy system
                 try:
-                    # Placeholder for your economy logic
-                    # For example: economy_cog.add_coins(message.author.id, message.guild.id, reward)
+                    # Queued behind the ensure-user job for this message
+                    await self.bot.side_effects.submit(self.db.add_money, ctx.author_id, reward)
                     
                     # Send a message about the reward
                     await message.channel.send(
@@ -173,6 +176,6 @@ class EventsCog(BaseCog):
                 except Exception as e:
                     print(f"Error giving message reward: {e}")
 
-def setup(bot):
+async def setup(bot):
     """Add the Events cog to the bot."""
-    bot.add_cog(EventsCog(bot))
\ No newline at end of file
+    await bot.add_cog(EventsCog(bot))
@@ -4,6 +4,7 @@ from discord import app_commands, utils
 import asyncio
 import datetime
 from utils.database import Database
+from utils.cooldowns import cooldowns
 from cogs.base_cog import BaseCog
 
 class Moderation(BaseCog):
@@ -49,6 +50,11 @@ class Moderation(BaseCog):
                 await ctx.send(f"Nigga wtf You cannot bomb users with the {role.name} role!")
                 return
                 
+        # Don't charge for bombing someone who is still timed out
+        if cooldowns.is_active("bombed", ctx.guild.id, target_id):
+            await ctx.send(f"{member.display_name} is still recovering from the last bomb!")
+            return
+                
         # Check if user has permission to bomb
         timeout_duration = 10  # Default timeout duration for other guilds
         
@@ -79,6 +85,7 @@ class Moderation(BaseCog):
         end_time = utils.utcnow() + datetime.timedelta(seconds=timeout_duration)
         try:
             await member.timeout(end_time, reason=f"Bombed by {ctx.author.display_name}")
+            cooldowns.set("bombed", ctx.guild.id, target_id, timeout_duration)
             
             # Create embed with bomb GIF
             embed = discord.Embed(
@@ -191,6 +198,14 @@ class Moderation(BaseCog):
                 )
                 return
                 
+        # Don't charge for bombing someone who is still timed out
+        if cooldowns.is_active("bombed", interaction.guild.id, target_id):
+            await interaction.response.send_message(
+                f"{user.display_name} is still recovering from the last bomb!",
+                ephemeral=True
+            )
+            return
+                
         # Check if user has permission to bomb
         timeout_duration = 10  # Default timeout duration for other guilds
         
@@ -227,6 +242,7 @@ class Moderation(BaseCog):
         end_time = utils.utcnow() + datetime.timedelta(seconds=timeout_duration)
         try:
             await user.timeout(end_time, reason=f"Bombed by {interaction.user.display_name}")
+            cooldowns.set("bombed", interaction.guild.id, target_id, timeout_duration)
             
             # Create embed with bomb GIF
             embed = discord.Embed(
@@ -0,0 +1,69 @@
+"""
+Matching free text against a bet's options.
+
+An OptionMatcher is built once per bet. It keeps each option's normalized
+form and word set, so mapping a user's choice or an AI-reported winner
+back to an option only has to normalize the incoming text once.
+"""
+
+import re
+
+# Punctuation that carries no meaning in an option ("+", "<", ">" and "-" do: "20+ runs", "<20 runs", "10-29")
+IGNORED_PUNCTUATION = re.compile(r"[^\w\s+<>-]")
+WHITESPACE = re.compile(r"\s+")
+# "2", "#2" or "option 2"
+OPTION_NUMBER = re.compile(r"^(?:#|option\s*)?(\d+)$")
+
+
+def normalize(text):
+    """Lower-case text, drop meaningless punctuation and collapse whitespace."""
+    return WHITESPACE.sub(" ", IGNORED_PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+class OptionMatcher:
+    """Maps user choices and reported winners onto a fixed list of bet options."""
+
+    def __init__(self, options):
+        self.options = list(options)
+        self.exact = {option: option for option in self.options}
+        self.normalized = {}
+        for option in self.options:
+            self.normalized.setdefault(normalize(option), option)
+        self.token_sets = [(frozenset(normalize(option).split()), option) for option in self.options]
+
+    def match_choice(self, choice):
+        """Get the option a user meant (exact text, any case or punctuation, or its number), or None."""
+        choice = choice.strip()
+        if choice in self.exact:
+            return choice
+
+        normalized = normalize(choice)
+        if normalized in self.normalized:
+            return self.normalized[normalized]
+
+        number = OPTION_NUMBER.match(normalized)
+        if number and 1 <= int(number.group(1)) <= len(self.options):
+            return self.options[int(number.group(1)) - 1]
+        return None
+
+    def best_match(self, text, threshold=0.0):
+        """Get (option, score) of the option most similar to text, or (None, score) below threshold.
+
+        Exact and normalized matches score 1; anything else scores the Jaccard similarity of the word sets.
+        """
+        option = self.match_choice(text)
+        if option is not None:
+            return option, 1.0
+
+        tokens = frozenset(normalize(text).split())
+        best_option, best_score = None, 0.0
+        if tokens:
+            for option_tokens, option in self.token_sets:
+                union = len(tokens | option_tokens)
+                score = len(tokens & option_tokens) / union if union else 0.0
+                if score > best_score:
+                    best_option, best_score = option, score
+
+        if best_score < threshold:
+            return None, best_score
+        return best_option, best_score
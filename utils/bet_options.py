@@ -0,0 +1,231 @@
+"""
+Betting option generation from an event description.
+
+Every keyword the generator looks for is compiled once into a single
+regular expression, so a description is scanned in one pass instead of
+one substring search per keyword. Team names are pulled out with a
+precompiled pattern. Nothing here does I/O, so it can be benchmarked on
+its own (see benchmarks/bench_analyze_event.py).
+"""
+
+import re
+from datetime import datetime, timedelta
+
+# Generic outcomes per sport, used when no sport-specific options apply
+SPORTS_OUTCOMES = {
+    'cricket': ['win by runs', 'win by wickets', 'match tied', 'century scored', 'no century'],
+    'football': ['win by goals', 'draw', 'clean sheet', 'both teams score', 'penalty shootout'],
+    'soccer': ['win by goals', 'draw', 'clean sheet', 'both teams score', 'first half win'],
+    'basketball': ['win by 10+', 'close win', 'overtime', 'record broken'],
+    'tennis': ['straight sets', 'comeback win', 'tiebreak', 'grand slam'],
+    'baseball': ['shutout', 'extra innings', 'grand slam', 'no-hitter'],
+    'hockey': ['shutout', 'overtime', 'hat trick', 'power play goal'],
+    'golf': ['under par', 'hole in one', 'playoff', 'eagle on final hole'],
+    'racing': ['pole position wins', 'crash', 'safety car', 'record lap'],
+    'boxing': ['knockout', 'technical knockout', 'decision', 'draw'],
+    'ufc': ['knockout', 'submission', 'decision', 'first round finish'],
+    'ipl': ['win by runs', 'win by wickets', 'super over', 'century scored'],
+    'match': ['home win', 'away win', 'draw', 'high scoring', 'low scoring']
+}
+
+# Words that make a bet description eligible for auto-resolution
+AUTO_RESOLVE_KEYWORDS = ('cricket', 'football', 'soccer', 'basketball', 'tennis', 'baseball',
+                         'hockey', 'golf', 'racing', 'boxing', 'ufc', 'ipl', 'match', 'vs', 'versus',
+                         'tournament', 'championship', 'game', 'series', 'league')
+
+# Every other keyword the option rules below look for
+RULE_KEYWORDS = ('t20', 'test match', 'test cricket', 'nba', 'election', 'vote', 'poll', 'weather',
+                 'temperature', 'rain', 'award', 'ceremony', 'prize', 'today')
+
+# Words that separate the team names (a description without any of them names no teams)
+TEAM_SEPARATORS = frozenset(('vs', 'versus', 'against', 'and'))
+
+
+def _keyword_trie(keywords):
+    """Build a regex alternation of keywords nested by shared prefix, so each position tries one branch."""
+    tree = {}
+    for keyword in keywords:
+        node = tree
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword may end here even though longer ones continue
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(tree)
+
+
+ALL_KEYWORDS = frozenset(SPORTS_OUTCOMES) | frozenset(AUTO_RESOLVE_KEYWORDS) | frozenset(RULE_KEYWORDS) | TEAM_SEPARATORS
+
+# Keywords match anywhere in the text ("rain" in "training"), like the substring checks they replace.
+# One scan finds non-overlapping keywords; keywords inside a longer one ("match" in "test match")
+# are added from CONTAINED_KEYWORDS. Only keywords fused without a space ("vseries") can be missed.
+KEYWORD_PATTERN = re.compile(_keyword_trie(ALL_KEYWORDS))
+CONTAINED_KEYWORDS = {
+    keyword: [other for other in ALL_KEYWORDS if other != keyword and other in keyword]
+    for keyword in ALL_KEYWORDS
+}
+
+# Team names on either side of "vs", "versus", "against" or "and"
+TEAM_PATTERN = re.compile(r'\b(\w+)\s+(?:vs\.?|versus|against|and)\s+(\w+)')
+
+
+def find_keywords(desc_lower):
+    """Get the set of known keywords that occur in a lower-case description."""
+    found = set(KEYWORD_PATTERN.findall(desc_lower))
+    for keyword in list(found):
+        found.update(CONTAINED_KEYWORDS[keyword])
+    return found
+
+
+def extract_teams(desc_lower):
+    """Get the team names mentioned in a lower-case description, title-cased, in order."""
+    teams = []
+    for match in TEAM_PATTERN.findall(desc_lower):
+        teams.extend(name.title() for name in match)
+    return teams
+
+
+def is_auto_resolvable(description):
+    """Check if a bet description looks like a sports event that can be auto-resolved."""
+    return not find_keywords(description.lower()).isdisjoint(AUTO_RESOLVE_KEYWORDS)
+
+
+def generate_options(description, now=None):
+    """Generate betting options, an estimated end time and an event type for an event description."""
+    desc_lower = description.lower()
+    found = find_keywords(desc_lower)
+    teams = extract_teams(desc_lower) if not found.isdisjoint(TEAM_SEPARATORS) else []
+    options = []
+
+    # Check for specific sports and customize options
+    if 'ipl' in found or ('cricket' in found and 't20' in found):
+        # IPL or T20 cricket
+        if len(teams) >= 2:
+            options = [
+                f"{teams[0]} wins by 20+ runs",
+                f"{teams[0]} wins by <20 runs",
+                f"{teams[1]} wins by 20+ runs",
+                f"{teams[1]} wins by <20 runs",
+                "Match goes to Super Over"
+            ]
+        else:
+            options = [
+                "Win by 30+ runs",
+                "Win by 10-29 runs",
+                "Win by 6+ wickets",
+                "Win by 1-5 wickets",
+                "Super Over finish"
+            ]
+    elif 'test match' in found or 'test cricket' in found:
+        # Test cricket
+        options = [
+            "Win by innings",
+            "Win by <100 runs",
+            "Win by 100+ runs",
+            "Draw",
+            "Match tied"
+        ]
+    elif 'football' in found or 'soccer' in found:
+        # Football/Soccer
+        if len(teams) >= 2:
+            options = [
+                f"{teams[0]} wins",
+                f"{teams[1]} wins",
+                "Draw",
+                "Both teams score",
+                "Clean sheet for either team"
+            ]
+        else:
+            options = [
+                "Home win",
+                "Away win",
+                "Draw",
+                "Both teams score",
+                "Clean sheet"
+            ]
+    elif 'basketball' in found or 'nba' in found:
+        # Basketball
+        if len(teams) >= 2:
+            options = [
+                f"{teams[0]} wins by 10+",
+                f"{teams[0]} wins by <10",
+                f"{teams[1]} wins by 10+",
+                f"{teams[1]} wins by <10",
+                "Game goes to overtime"
+            ]
+        else:
+            options = [
+                "Win by 15+ points",
+                "Win by 5-14 points",
+                "Win by <5 points",
+                "Double-double performance",
+                "Triple-double performance"
+            ]
+    elif 'tennis' in found:
+        # Tennis
+        if len(teams) >= 2:
+            options = [
+                f"{teams[0]} wins in straight sets",
+                f"{teams[0]} wins in deciding set",
+                f"{teams[1]} wins in straight sets",
+                f"{teams[1]} wins in deciding set",
+                "Match has a tiebreak"
+            ]
+        else:
+            options = [
+                "Win in straight sets",
+                "Win after losing first set",
+                "Three-set match",
+                "Five-set match",
+                "Tiebreak in final set"
+            ]
+
+    # If no specific sports options were set, use generic ones based on keywords
+    if not options:
+        sport = next((sport for sport in SPORTS_OUTCOMES if sport in found), None)
+        if sport:
+            # If we have team names, customize options
+            if len(teams) >= 2:
+                options = [f"{teams[0]} wins", f"{teams[1]} wins", "Draw/Tie", "Unexpected outcome"]
+            else:
+                options = list(SPORTS_OUTCOMES[sport])
+
+    # General event options if no sports detected
+    if not options:
+        if found & {'election', 'vote', 'poll'}:
+            options = ['Candidate A wins by large margin', 'Candidate A wins narrowly',
+                       'Candidate B wins narrowly', 'Candidate B wins by large margin', 'Exact tie/Recount']
+        elif found & {'weather', 'temperature', 'rain'}:
+            options = ['Sunny all day', 'Mostly cloudy', 'Light rain/drizzle', 'Heavy rainfall', 'Mixed conditions']
+        elif found & {'game', 'tournament'}:
+            options = ['Player 1 dominates', 'Player 1 wins close game', 'Player 2 wins close game',
+                       'Player 2 dominates', 'Draw/Stalemate']
+        elif found & {'award', 'ceremony', 'prize'}:
+            options = ['Favorite wins', 'Upset winner', 'Multiple winners tie', 'Award delayed/postponed', 'Controversy occurs']
+
+    # Default options if nothing else matched
+    if not options:
+        options = ["Decisive Victory", "Close Win", "Draw/Tie", "Upset Result", "No Clear Outcome"]
+
+    # Determine appropriate end time based on event type
+    end_time_hours = 24  # Default 24 hours
+    if 'test match' in found or 'test cricket' in found:
+        end_time_hours = 120  # 5 days
+    elif 'tournament' in found or 'championship' in found:
+        end_time_hours = 72  # 3 days
+    elif 'today' in found:
+        end_time_hours = 12  # Today's event
+
+    return {
+        'options': options,
+        'estimated_end_time': (now or datetime.now()) + timedelta(hours=end_time_hours),
+        'event_type': 'sports' if not found.isdisjoint(SPORTS_OUTCOMES) else 'general',
+        'description': description
+    }
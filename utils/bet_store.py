@@ -0,0 +1,445 @@
+"""
+In-memory bet store with a write-ahead journal.
+
+Bets live in dicts indexed by bet ID. Every change is appended to a
+JSON-lines journal as one small record (bet created, stake placed, stake
+cancelled, bet resolved), so the cost of a change does not depend on how
+many bets exist. The journal is folded into the snapshot file on startup
+and every compact_every records.
+
+Resolved bets leave the live store: their summaries are appended to an
+archive file that is never rewritten. Only the byte offset of each summary
+is kept in memory, per guild and in resolution order, so past bets can be
+paged newest first with the offset as cursor.
+
+Payouts are settled through the journal too: a settlement record (with a
+sequence number and every winner's credit) is synced to disk before any
+money moves and stays pending until the bet is resolved, so a settlement
+interrupted by a crash is finished on the next startup.
+"""
+
+import bisect
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Paths to the bet snapshot and journal
+BETS_DATA_FILE = "data/bets.json"
+BETS_JOURNAL_FILE = "data/bets_journal.jsonl"
+BETS_ARCHIVE_FILE = "data/bets_archive.jsonl"
+
+# Bet and stake fields stored as ISO timestamps
+BET_DATETIME_FIELDS = ("created_at", "end_time", "resolved_at")
+STAKE_DATETIME_FIELDS = ("placed_at",)
+
+
+def _encode(record, fields):
+    """Copy a record with its datetime fields converted to ISO strings."""
+    encoded = dict(record)
+    for field in fields:
+        if isinstance(encoded.get(field), datetime):
+            encoded[field] = encoded[field].isoformat()
+    return encoded
+
+
+def _decode(record, fields):
+    """Convert a record's ISO string fields back to datetimes in place."""
+    for field in fields:
+        if isinstance(record.get(field), str):
+            record[field] = datetime.fromisoformat(record[field])
+    return record
+
+
+def encode_bet(bet):
+    """Serialize a bet (and its participants) for JSON."""
+    encoded = _encode(bet, BET_DATETIME_FIELDS)
+    encoded["participants"] = {
+        str(user_id): _encode(stake, STAKE_DATETIME_FIELDS)
+        for user_id, stake in bet["participants"].items()
+    }
+    return encoded
+
+
+def decode_bet(bet):
+    """Deserialize a bet loaded from JSON."""
+    _decode(bet, BET_DATETIME_FIELDS)
+    bet["participants"] = {
+        int(user_id): _decode(stake, STAKE_DATETIME_FIELDS)
+        for user_id, stake in bet.get("participants", {}).items()
+    }
+    return bet
+
+
+class BetStore:
+    """Open bets, persisted as a snapshot plus an append-only journal, and an archive of resolved bets."""
+
+    def __init__(self, data_file=BETS_DATA_FILE, journal_file=BETS_JOURNAL_FILE,
+                 archive_file=BETS_ARCHIVE_FILE, compact_every=500):
+        self.data_file = data_file
+        self.journal_file = journal_file
+        self.archive_file = archive_file
+        self.compact_every = compact_every
+        self.active_bets = {}    # {bet_id: bet}
+        self.pools = {}          # {bet_id: running stake totals, see _index_pool}
+        self.archive_index = {}  # {guild_id: [archive offsets in resolution order]}
+        self.archived_ids = set()
+        self.pending_settlements = {}  # {bet_id: settle journal record}, see record_settlement
+        self.next_settlement_seq = 1
+        self.next_id = 0
+        self.journal_records = 0
+        self.load()
+
+    def load(self):
+        """Load the snapshot, replay the journal on top of it and compact."""
+        legacy_results = {}
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+            self._index_archive()
+
+            if os.path.exists(self.data_file):
+                with open(self.data_file, 'r') as f:
+                    data = json.load(f)
+                self.active_bets = {int(k): decode_bet(v) for k, v in data.get("active_bets", {}).items()}
+                # Files written before the archive existed keep resolved bets in the snapshot
+                legacy_results = {
+                    int(k): _decode(v, BET_DATETIME_FIELDS) for k, v in data.get("resolved_bets", {}).items()
+                }
+                for bet_id in self.active_bets:
+                    self._index_pool(bet_id)
+                self.next_id = data.get("next_id", max([*self.active_bets, *legacy_results, -1]) + 1)
+                self.pending_settlements = {int(k): v for k, v in data.get("pending_settlements", {}).items()}
+                self.next_settlement_seq = data.get("next_settlement_seq", 1)
+
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            self._apply(json.loads(line))
+                        except (ValueError, KeyError) as e:
+                            # A torn last line from a crash mid-write is expected, anything else is logged too
+                            logger.warning(f"Skipping bad bets journal record: {e}")
+
+            self._archive_legacy(legacy_results)
+        except Exception as e:
+            # Never compact over files that could not be read, they are kept for recovery
+            logger.error(f"Error loading bets data: {e}")
+            self._set_aside()
+            self.active_bets = {}
+            self.pools = {}
+            self.pending_settlements = {}
+            self.next_id = max(self.archived_ids, default=-1) + 1
+            self.journal_records = 0
+            return
+
+        self.compact()
+
+    def _set_aside(self):
+        """Move the snapshot and journal out of the way unchanged, so new writes can't overwrite them."""
+        suffix = datetime.now().strftime("%Y%m%d%H%M%S")
+        for path in (self.data_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            try:
+                os.replace(path, f"{path}.bad-{suffix}")
+                logger.error(f"Moved unreadable {path} to {path}.bad-{suffix}")
+            except OSError as e:
+                logger.error(f"Could not move {path} aside: {e}")
+
+    def _index_archive(self):
+        """Record the offset, guild and bet ID of every archived bet."""
+        self.archive_index = {}
+        self.archived_ids = set()
+        if not os.path.exists(self.archive_file):
+            return
+
+        with open(self.archive_file, 'r+b') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn last line from a crash mid-append, drop it so the next append starts clean
+                    f.seek(offset)
+                    f.truncate()
+                    break
+                try:
+                    record = json.loads(line)
+                    self.archive_index.setdefault(record.get("guild_id"), []).append(offset)
+                    self.archived_ids.add(record["bet_id"])
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"Skipping bad bets archive record: {e}")
+                offset += len(line)
+
+    def _archive_legacy(self, legacy_results):
+        """Move resolved bets out of an old snapshot (and closed bets out of the live store) into the archive."""
+        for bet_id, bet in list(self.active_bets.items()):
+            if bet["status"] == "closed" and bet_id not in legacy_results:
+                legacy_results[bet_id] = {
+                    "description": bet["description"],
+                    "options": bet["options"],
+                    "winner": bet.get("result"),
+                    "total_pot": self.pools[bet_id]["total"],
+                    "num_participants": len(bet["participants"]),
+                    "num_winners": self.pools[bet_id]["counts"].get(bet.get("result"), 0),
+                    "created_at": bet["created_at"],
+                    "resolved_at": bet.get("resolved_at", bet["end_time"])
+                }
+
+        by_time = sorted(legacy_results.items(), key=lambda item: item[1].get("resolved_at") or datetime.min)
+        for bet_id, result in by_time:
+            self._append_archive(bet_id, result)
+
+        # Bets archived by a run that crashed before journaling the resolution are not open either
+        for bet_id in self.archived_ids.intersection(self.active_bets):
+            del self.active_bets[bet_id]
+            self.pools.pop(bet_id, None)
+
+    def compact(self):
+        """Write the full snapshot and start an empty journal."""
+        try:
+            temp_file = f"{self.data_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump({
+                    "active_bets": {str(bet_id): encode_bet(bet) for bet_id, bet in self.active_bets.items()},
+                    "pending_settlements": {str(bet_id): record for bet_id, record in self.pending_settlements.items()},
+                    "next_id": self.next_id,
+                    "next_settlement_seq": self.next_settlement_seq
+                }, f)
+            os.replace(temp_file, self.data_file)
+
+            # The snapshot now contains everything the journal did
+            open(self.journal_file, 'w').close()
+            self.journal_records = 0
+        except Exception as e:
+            logger.error(f"Error saving bets data: {e}")
+
+    def _append(self, record, sync=False):
+        """Append a change to the journal and apply it in memory, returning whether it was written.
+
+        With sync set the record is synced to disk, and if that fails it is
+        taken back out of the journal and not applied either, so nothing may
+        act as if it had been recorded.
+        """
+        try:
+            with open(self.journal_file, 'a') as f:
+                end = f.tell()
+                try:
+                    f.write(json.dumps(record) + "\n")
+                    if sync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception:
+                    if sync:
+                        f.truncate(end)
+                    raise
+        except Exception as e:
+            logger.error(f"Error writing bets journal: {e}")
+            if sync:
+                return False
+            written = False
+        else:
+            written = True
+
+        self._apply(record)
+        self.journal_records += 1
+        if self.journal_records >= self.compact_every:
+            self.compact()
+        return written
+
+    def _apply(self, record):
+        """Apply one journal record to the in-memory bets."""
+        op = record["op"]
+        bet_id = record["bet_id"]
+
+        if op == "create":
+            self.active_bets[bet_id] = decode_bet(dict(record["bet"]))
+            self._index_pool(bet_id)
+            self.next_id = max(self.next_id, bet_id + 1)
+        elif op == "stake":
+            participants = self.active_bets[bet_id]["participants"]
+            previous = participants.get(record["user_id"])
+            if previous is not None:
+                self._update_pool(bet_id, previous, -1)
+            stake = _decode(dict(record["stake"]), STAKE_DATETIME_FIELDS)
+            participants[record["user_id"]] = stake
+            self._update_pool(bet_id, stake, 1)
+        elif op == "cancel":
+            stake = self.active_bets[bet_id]["participants"].pop(record["user_id"], None)
+            if stake is not None:
+                self._update_pool(bet_id, stake, -1)
+        elif op == "settle":
+            bet = self.active_bets.get(bet_id)
+            if bet is not None:
+                # No more stakes or cancellations while the payout is in progress
+                bet["status"] = "settling"
+            self.pending_settlements[bet_id] = record
+            self.next_settlement_seq = max(self.next_settlement_seq, record["seq"] + 1)
+        elif op == "resolve":
+            # The summary is in the archive, the bet just leaves the live store
+            self.pending_settlements.pop(bet_id, None)
+            bet = self.active_bets.pop(bet_id, None)
+            self.pools.pop(bet_id, None)
+            if bet is not None:
+                bet["status"] = "closed"
+                bet["result"] = record["winner"]
+        else:
+            raise ValueError(f"unknown op {op}")
+
+    def _index_pool(self, bet_id):
+        """Build the running totals of a bet from its participants."""
+        bet = self.active_bets[bet_id]
+        self.pools[bet_id] = {
+            "total": 0,
+            "amounts": {option: 0 for option in bet["options"]},  # {option: money staked}
+            "counts": {option: 0 for option in bet["options"]}    # {option: number of stakes}
+        }
+        for stake in bet["participants"].values():
+            self._update_pool(bet_id, stake, 1)
+
+    def _update_pool(self, bet_id, stake, sign):
+        """Add (sign=1) or remove (sign=-1) a stake from a bet's running totals."""
+        pool = self.pools[bet_id]
+        option = stake["option"]
+        pool["total"] += sign * stake["amount"]
+        pool["amounts"][option] = pool["amounts"].get(option, 0) + sign * stake["amount"]
+        pool["counts"][option] = pool["counts"].get(option, 0) + sign
+
+    def pool(self, bet_id):
+        """Get a bet's running totals: {"total", "amounts": {option: money}, "counts": {option: stakes}}."""
+        return self.pools[bet_id]
+
+    def odds(self, bet_id, option):
+        """Get (implied probability, payout per $1) for an option from the current pool.
+
+        The payout is None while nobody has staked on the option.
+        """
+        pool = self.pools[bet_id]
+        staked = pool["amounts"].get(option, 0)
+        if staked <= 0:
+            return 0.0, None
+        return staked / pool["total"], pool["total"] / staked
+
+    def get(self, bet_id):
+        """Get an open bet by ID."""
+        return self.active_bets.get(bet_id)
+
+    def create_bet(self, bet):
+        """Store a new bet and return its ID."""
+        bet_id = self.next_id
+        self._append({"op": "create", "bet_id": bet_id, "bet": encode_bet(bet)})
+        return bet_id
+
+    def place_stake(self, bet_id, user_id, option, amount):
+        """Record a user's stake on a bet option."""
+        stake = {"option": option, "amount": amount, "placed_at": datetime.now()}
+        self._append({
+            "op": "stake", "bet_id": bet_id, "user_id": user_id,
+            "stake": _encode(stake, STAKE_DATETIME_FIELDS)
+        })
+        return self.active_bets[bet_id]["participants"][user_id]
+
+    def cancel_stake(self, bet_id, user_id):
+        """Remove a user's stake from a bet and return it."""
+        stake = self.active_bets[bet_id]["participants"].get(user_id)
+        if stake is not None:
+            self._append({"op": "cancel", "bet_id": bet_id, "user_id": user_id})
+        return stake
+
+    def record_settlement(self, bet_id, result, credits):
+        """Durably record how a bet is paid out before any money moves, and return its sequence number.
+
+        Returns None if the record could not be synced to disk; no money may move then.
+
+        Args:
+            bet_id: The bet being settled
+            result: The resolution summary to archive once the payout is done
+            credits: dict mapping winners' user IDs to their payout
+        """
+        seq = self.next_settlement_seq
+        # A record that failed to sync may still reach the disk, so its number is never reused
+        self.next_settlement_seq += 1
+        bet = self.active_bets[bet_id]
+        written = self._append({
+            "op": "settle", "bet_id": bet_id, "seq": seq,
+            "credits": {str(user_id): amount for user_id, amount in credits.items()},
+            "result": _encode({**result, "guild_id": bet.get("guild_id")}, BET_DATETIME_FIELDS)
+        }, sync=True)
+        return seq if written else None
+
+    def number_settlements_after(self, applied_seq):
+        """Make sure new settlements are numbered after applied_seq, the highest one already credited."""
+        self.next_settlement_seq = max(self.next_settlement_seq, applied_seq + 1)
+
+    def unfinished_settlements(self):
+        """Get (bet_id, seq, result, credits) of every recorded settlement that was not resolved, in order."""
+        return [
+            (bet_id, record["seq"], _decode(dict(record["result"]), BET_DATETIME_FIELDS),
+             {int(user_id): amount for user_id, amount in record["credits"].items()})
+            for bet_id, record in sorted(self.pending_settlements.items(), key=lambda item: item[1]["seq"])
+        ]
+
+    def resolve_bet(self, bet_id, result):
+        """Archive a bet's resolution summary and remove it from the live store.
+
+        Returns False, leaving the bet (and any pending settlement) in place, if it could not be archived.
+        """
+        bet = self.active_bets.get(bet_id)
+        guild_id = bet.get("guild_id") if bet is not None else result.get("guild_id")
+        if not self._append_archive(bet_id, {**result, "guild_id": guild_id}):
+            return False
+        self._append({"op": "resolve", "bet_id": bet_id, "winner": result["winner"]})
+        return True
+
+    def _append_archive(self, bet_id, result):
+        """Append a resolution summary to the archive (once per bet) and index it, returning whether it is archived."""
+        if bet_id in self.archived_ids:
+            return True
+
+        record = {"bet_id": bet_id, **_encode(result, BET_DATETIME_FIELDS)}
+        try:
+            with open(self.archive_file, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write((json.dumps(record) + "\n").encode())
+        except Exception as e:
+            logger.error(f"Error writing bets archive: {e}")
+            return False
+
+        self.archive_index.setdefault(record.get("guild_id"), []).append(offset)
+        self.archived_ids.add(bet_id)
+        return True
+
+    def past_bets(self, guild_id, before=None, limit=5):
+        """Get up to limit archived bets of a guild, newest first, resolved before the cursor.
+
+        Bets archived without a guild (from before bets had one) are shown in every guild.
+        Returns (summaries, cursor of the next page or None).
+        """
+        indexes = [self.archive_index.get(guild_id, [])]
+        if guild_id is not None:
+            indexes.append(self.archive_index.get(None, []))
+
+        # The newest limit offsets below the cursor from each index, then the newest limit overall
+        candidates = []
+        for offsets in indexes:
+            end = len(offsets) if before is None else bisect.bisect_left(offsets, before)
+            candidates.extend(offsets[max(0, end - limit):end])
+        chosen = sorted(candidates, reverse=True)[:limit]
+        if not chosen:
+            return [], None
+
+        summaries = []
+        try:
+            with open(self.archive_file, 'rb') as f:
+                for offset in chosen:
+                    f.seek(offset)
+                    summaries.append(_decode(json.loads(f.readline()), BET_DATETIME_FIELDS))
+        except Exception as e:
+            logger.error(f"Error reading bets archive: {e}")
+            return [], None
+
+        has_older = any(bisect.bisect_left(offsets, chosen[-1]) > 0 for offsets in indexes)
+        return summaries, chosen[-1] if has_older else None
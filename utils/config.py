@@ -5,6 +5,7 @@ PREFIX = "!"
 
 # Economy settings
 DAILY_REWARD = 100  # Amount given for daily reward
+DAILY_RESET_TIMEZONE = "UTC"  # Default timezone for the automatic daily reset (per guild with !dailytimezone)
 ACTIVITY_BONUS = 10  # Amount given for being active in a company
 TIMEOUT_COST = 50    # Cost to timeout someone
 
@@ -36,9 +37,43 @@ ROLE_NAMES = {
     1352694494813749299: "level 50",
 }
 
+# Message side-effect queue settings
+SIDE_EFFECT_QUEUE_SIZE = 1000  # Maximum queued per-message database jobs
+SIDE_EFFECT_WORKERS = 2        # Worker tasks draining the queue
+
+# LLM gateway settings (per caller)
+LLM_CONCURRENCY = {"quests": 2, "events": 1, "betting": 4}  # Requests in flight
+LLM_DEADLINES = {"quests": 30, "events": 20, "betting": 45}  # Seconds per call, retries included
+
+# Company activity bonus settings
+COMPANY_ROLE_BONUSES = {
+    1352694494797234237: 25,    # level 35 creator
+    1352694494813749299: 50,    # level 50 creator
+}
+LARGE_COMPANY_SIZE = 5    # Companies with more members than this get the extra bonus
+LARGE_COMPANY_BONUS = 25  # Extra activity bonus for large companies
+
 # Robbery settings
 MIN_ROBBERS = 5  # Minimum number of people needed to rob someone
 ROBBERY_COOLDOWN = 3600  # Cooldown in seconds (1 hour) before a user can be robbed again
+ROBBERY_LOBBY_TTL = 300  # Seconds a robbery lobby stays open waiting for enough robbers
+ROBBERY_MIN_AMOUNT = 10  # Smallest amount a successful robbery takes (wallet permitting)
 
 # Quest settings
 QUEST_COOLDOWN = 1800  # Cooldown in seconds (30 minutes) between quests
+QUEST_POOL_SIZE = 10      # Number of AI-generated quests kept ready
+QUEST_POOL_LOW_WATER = 3  # Refill the pool in the background below this many quests
+
+# Timer settings
+TIMER_RETRY_BASE = 60    # First delay in seconds before a timer whose handler failed runs again, doubled per failure
+TIMER_RETRY_DELAY = 3600 # Longest delay in seconds between retries of one timer
+
+# Betting settings
+BET_RESOLVE_CONCURRENCY = 4      # Expired bets resolved at the same time
+BET_RESOLVE_DEADLINE = 120       # Seconds allowed to resolve one bet before it is retried
+BET_RESOLVE_RETRY_BASE = 60      # First retry delay in seconds, doubled on every further failure
+BET_RESOLVE_RETRY_DELAY = 1800   # Longest delay in seconds between retries of one bet
+BET_WINNER_MIN_SIMILARITY = 0.5    # How closely a reported winner must match an option to resolve a bet
+MATCH_RESULT_TTL = 21600           # Seconds a fetched match result is reused for other bets on the fixture
+MATCH_RESULT_WINDOW = 129600       # Bets on the same teams ending this many seconds apart share a result
+MATCH_RESULT_MIN_SIMILARITY = 0.5  # How closely a shared result must match one of a bet's options
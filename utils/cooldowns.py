@@ -0,0 +1,199 @@
+"""
+Shared cooldown store for rate-limited actions.
+
+Cooldowns are expiring keys of (action, guild_id, user_id). Checks are a
+single dict lookup; expired keys are removed in bulk by a hierarchical
+timing wheel (seconds, minutes, hours, plus an overflow list for anything
+further out), so memory only holds cooldowns that are still running.
+The store can persist itself to a JSON file so restarts do not reset
+cooldowns.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Path to cooldown data file
+COOLDOWN_DATA_FILE = "data/cooldowns.json"
+
+
+class TimingWheel:
+    """Hierarchical timing wheel with one-second resolution."""
+
+    # (seconds per slot, number of slots) from the finest wheel to the coarsest
+    LEVELS = ((1, 60), (60, 60), (3600, 24))
+
+    def __init__(self, now=None):
+        self.current = int(now if now is not None else time.time())
+        self.wheels = [[set() for _ in range(slots)] for _, slots in self.LEVELS]
+        self.overflow = set()  # Entries due beyond the coarsest wheel
+
+    def add(self, key, expiry):
+        """Schedule key to expire at the epoch timestamp expiry."""
+        expiry = math.ceil(expiry)
+        # Anything already due goes into the next slot to be swept
+        slot_time = max(expiry, self.current + 1)
+        delay = slot_time - self.current
+
+        for level, (tick, slots) in enumerate(self.LEVELS):
+            if delay < tick * slots:
+                self.wheels[level][(slot_time // tick) % slots].add((key, expiry))
+                return
+        self.overflow.add((key, expiry))
+
+    def advance(self, now=None):
+        """Move the wheel forward to now and return the (key, expiry) entries that are due."""
+        now = int(now if now is not None else time.time())
+        due = []
+
+        # After a long gap it is cheaper to re-file everything than to tick through it
+        if now - self.current > self.LEVELS[-1][0] * self.LEVELS[-1][1]:
+            entries = set(self.overflow)
+            for wheel in self.wheels:
+                for slot in wheel:
+                    entries.update(slot)
+                    slot.clear()
+            self.overflow.clear()
+            self.current = now
+            for key, expiry in entries:
+                if expiry <= now:
+                    due.append((key, expiry))
+                else:
+                    self.add(key, expiry)
+            return due
+
+        while self.current < now:
+            self.current += 1
+            self._cascade()
+            slot = self.wheels[0][self.current % self.LEVELS[0][1]]
+            due.extend(slot)
+            slot.clear()
+
+        return due
+
+    def _cascade(self):
+        """Move entries down from coarser wheels when a finer wheel wraps around."""
+        for level in range(len(self.LEVELS) - 1, 0, -1):
+            tick, slots = self.LEVELS[level]
+            if self.current % tick:
+                continue
+            slot = self.wheels[level][(self.current // tick) % slots]
+            entries = list(slot)
+            slot.clear()
+            for key, expiry in entries:
+                self.add(key, expiry)
+
+        if self.current % self.LEVELS[-1][0] == 0 and self.overflow:
+            entries = list(self.overflow)
+            self.overflow.clear()
+            for key, expiry in entries:
+                self.add(key, expiry)
+
+
+class CooldownStore:
+    """Expiring (action, guild_id, user_id) cooldowns with optional persistence."""
+
+    def __init__(self, data_file=COOLDOWN_DATA_FILE, persist=True):
+        self.data_file = data_file
+        self.persist = persist
+        self.expiries = {}  # {(action, guild_id, user_id): epoch timestamp}
+        self.wheel = TimingWheel()
+        if self.persist:
+            self.load_cooldowns()
+
+    @staticmethod
+    def _key(action, guild_id, user_id):
+        return (action, int(guild_id) if guild_id is not None else None, int(user_id))
+
+    def load_cooldowns(self):
+        """Load running cooldowns from file, skipping expired ones."""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+
+            if not os.path.exists(self.data_file):
+                return
+
+            with open(self.data_file, 'r') as f:
+                data = json.load(f)
+
+            now = time.time()
+            for action, guild_id, user_id, expiry in data:
+                if expiry > now:
+                    key = self._key(action, guild_id, user_id)
+                    self.expiries[key] = expiry
+                    self.wheel.add(key, expiry)
+        except Exception as e:
+            logger.error(f"Error loading cooldowns: {e}")
+            self.expiries = {}
+            self.wheel = TimingWheel()
+
+    def save_cooldowns(self):
+        """Write running cooldowns to file."""
+        if not self.persist:
+            return
+
+        data = [[*key, expiry] for key, expiry in self.expiries.items()]
+        try:
+            temp_file = f"{self.data_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_file, self.data_file)
+        except Exception as e:
+            logger.error(f"Error saving cooldowns: {e}")
+
+    def expire(self):
+        """Drop every cooldown that has run out and return how many were removed."""
+        removed = 0
+        for key, expiry in self.wheel.advance():
+            # The key may have been reset or cleared since this entry was filed
+            if key in self.expiries and math.ceil(self.expiries[key]) == expiry:
+                del self.expiries[key]
+                removed += 1
+        return removed
+
+    def remaining(self, action, guild_id, user_id):
+        """Get the seconds left on a cooldown (0 if none is running)."""
+        self.expire()
+        expiry = self.expiries.get(self._key(action, guild_id, user_id))
+        if expiry is None:
+            return 0
+        return max(0, expiry - time.time())
+
+    def is_active(self, action, guild_id, user_id):
+        """Check if a cooldown is running."""
+        return self.remaining(action, guild_id, user_id) > 0
+
+    def expires_at(self, action, guild_id, user_id):
+        """Get when a cooldown ends as a datetime, or None if none is running."""
+        if not self.is_active(action, guild_id, user_id):
+            return None
+        return datetime.fromtimestamp(self.expiries[self._key(action, guild_id, user_id)])
+
+    def set(self, action, guild_id, user_id, seconds=None, until=None):
+        """Start (or restart) a cooldown for a number of seconds or until a datetime."""
+        if until is not None:
+            expiry = until.timestamp()
+        else:
+            expiry = time.time() + seconds
+
+        self.expire()
+        key = self._key(action, guild_id, user_id)
+        self.expiries[key] = expiry
+        self.wheel.add(key, expiry)
+        self.save_cooldowns()
+
+    def clear(self, action, guild_id, user_id):
+        """Remove a cooldown early."""
+        if self.expiries.pop(self._key(action, guild_id, user_id), None) is not None:
+            self.save_cooldowns()
+            return True
+        return False
+
+
+# Shared store used by every cog
+cooldowns = CooldownStore()
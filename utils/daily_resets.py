@@ -0,0 +1,166 @@
+"""
+Per-guild daily reset scheduler.
+
+Each guild resets at midnight in its own timezone. A reset credits all of
+the guild's members in one users.json write, made on a worker thread so
+the event loop keeps running, and then records the reset it completed so
+a reset that was missed while the bot was offline is caught up exactly once.
+
+Members of several guilds are only handled by their lowest-ID guild, so
+nobody is paid twice when those guilds reset at different times.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from utils.config import DAILY_RESET_TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+# Path to daily reset data file
+DAILY_RESET_DATA_FILE = "data/daily_resets.json"
+
+# Wake up at least this often so new guilds and timezone changes are noticed
+MAX_SLEEP = 3600
+
+
+class DailyResetScheduler:
+    """Runs the automatic daily reward at each guild's local midnight."""
+
+    def __init__(self, bot, db, data_file=DAILY_RESET_DATA_FILE, default_timezone=DAILY_RESET_TIMEZONE):
+        self.bot = bot
+        self.db = db
+        self.data_file = data_file
+        self.default_timezone = default_timezone
+        self.guilds = {}  # {guild_id: {"timezone": name, "last_reset": ISO UTC timestamp}}
+        self._wakeup = asyncio.Event()
+        self.load_resets()
+
+    def load_resets(self):
+        """Load guild timezones and completed resets from file."""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+
+            if not os.path.exists(self.data_file):
+                self.save_resets()
+                return
+
+            with open(self.data_file, 'r') as f:
+                self.guilds = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading daily resets: {e}")
+            self.guilds = {}
+
+    def save_resets(self):
+        """Write guild timezones and completed resets to file."""
+        try:
+            temp_file = f"{self.data_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self.guilds, f, indent=4)
+            os.replace(temp_file, self.data_file)
+        except Exception as e:
+            logger.error(f"Error saving daily resets: {e}")
+
+    def get_timezone(self, guild_id):
+        """Get the timezone a guild resets in."""
+        name = self.guilds.get(str(guild_id), {}).get("timezone", self.default_timezone)
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.error(f"Unknown daily reset timezone {name} for guild {guild_id}")
+            return ZoneInfo(self.default_timezone)
+
+    def set_timezone(self, guild_id, name):
+        """Set the timezone a guild resets in (an IANA name like "Europe/London")."""
+        try:
+            ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return {"success": False, "message": f"Unknown timezone: {name}"}
+
+        state = self.guilds.setdefault(str(guild_id), {})
+        state["timezone"] = name
+
+        # Don't pay out again just because the local midnight moved (it may now fall after the last reset)
+        latest = self.latest_reset(guild_id, datetime.now(timezone.utc))
+        if "last_reset" in state:
+            latest = max(latest, datetime.fromisoformat(state["last_reset"]))
+        state["last_reset"] = latest.isoformat()
+        self.save_resets()
+        self._wakeup.set()
+
+        return {"success": True, "next_reset": self.next_reset(guild_id, datetime.now(timezone.utc))}
+
+    def latest_reset(self, guild_id, now):
+        """Get the most recent local midnight of a guild at or before now (aware UTC)."""
+        zone = self.get_timezone(guild_id)
+        local_midnight = datetime.combine(now.astimezone(zone).date(), time(0), tzinfo=zone)
+        return local_midnight.astimezone(timezone.utc)
+
+    def next_reset(self, guild_id, now):
+        """Get the next local midnight of a guild after now (aware UTC)."""
+        zone = self.get_timezone(guild_id)
+        tomorrow = now.astimezone(zone).date() + timedelta(days=1)
+        return datetime.combine(tomorrow, time(0), tzinfo=zone).astimezone(timezone.utc)
+
+    def _home_members(self, guild):
+        """Get the IDs of the guild's human members that this guild is responsible for."""
+        return [
+            member.id for member in guild.members
+            if not member.bot and min((g.id for g in member.mutual_guilds), default=guild.id) == guild.id
+        ]
+
+    async def reset_guild(self, guild, reset_at):
+        """Credit a guild's members for the reset at reset_at in one write."""
+        # Users store naive local timestamps
+        reset_local = reset_at.astimezone().replace(tzinfo=None)
+        member_ids = self._home_members(guild)
+
+        # Let messages and commands run while users.json is rewritten
+        credited = len(await asyncio.to_thread(self.db.give_daily_rewards, member_ids, reset_local))
+
+        self.guilds.setdefault(str(guild.id), {})["last_reset"] = reset_at.isoformat()
+        self.save_resets()
+        logger.info(f"Daily rewards given to {credited} users in guild {guild.id}")
+
+    async def run_due(self):
+        """Run every guild reset that is due (or was missed) and return the next reset time."""
+        now = datetime.now(timezone.utc)
+        next_run = now + timedelta(seconds=MAX_SLEEP)
+
+        for guild in list(self.bot.guilds):
+            latest = self.latest_reset(guild.id, now)
+            state = self.guilds.get(str(guild.id), {})
+
+            if "last_reset" not in state:
+                # First time we see this guild, start counting from its next midnight
+                self.guilds.setdefault(str(guild.id), {})["last_reset"] = latest.isoformat()
+                self.save_resets()
+            elif datetime.fromisoformat(state["last_reset"]) < latest:
+                # However many days were missed, a guild is only caught up once
+                try:
+                    await self.reset_guild(guild, latest)
+                except Exception as e:
+                    logger.error(f"Error running daily reset for guild {guild.id}: {e}")
+
+            next_run = min(next_run, self.next_reset(guild.id, now))
+
+        return next_run
+
+    async def run(self):
+        """Sleep until the next guild's midnight and reset it, forever."""
+        await self.bot.wait_until_ready()
+
+        while True:
+            self._wakeup.clear()
+            next_run = await self.run_due()
+
+            delay = (next_run - datetime.now(timezone.utc)).total_seconds()
+            logger.info(f"Next daily reset check in {delay:.0f} seconds")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 1))
+            except asyncio.TimeoutError:
+                pass
@@ -3,15 +3,42 @@ import os
 import datetime
 from datetime import datetime, timedelta
 import logging
+import threading
+import bisect
+import functools
+import heapq
+from utils.config import DAILY_REWARD, ACTIVITY_BONUS, COMPANY_ROLE_BONUSES, LARGE_COMPANY_SIZE, LARGE_COMPANY_BONUS
+
+def _locked(method):
+    """Run a read-modify-write method while holding the shared file lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with Database._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class Database:
     """Class for handling all database operations using JSON files."""
     
+    # Every cog creates its own Database, so in-memory caches are shared at class level
+    _company_bonus_table = None  # {company_id: activity bonus}, built on first use
+    _company_name_index = None   # Sorted [(casefolded name, company_id)], built on first use
+    _company_names = None        # {casefolded name: company}, kept alongside the index
+    _company_records = None      # {company_id: company record as last saved}, kept alongside the index
+    _company_stats = None        # {company_id: {"members", "wealth", "activity"}}, built on first use
+    _company_members = {}        # {user_id: [company_id, total wealth]} for members of any company
+    _balance_listeners = []      # Callables notified with {user_id: total wealth} after users.json changes
+    _saved_totals = None         # {user_id: total wealth} as last written, tracked once a listener exists
+    
+    # Side effects also run on a worker thread, so whole-file rewrites are serialized
+    _lock = threading.RLock()
+    
     def __init__(self):
         self.users_file = 'data/users.json'
         self.companies_file = 'data/companies.json'
         self.timeout_logs_file = 'data/timeout_logs.json'
         self.transaction_requests_file = 'data/transaction_requests.json'
+        self.commit_file = 'data/commit.json'
         
         self.initialize_data_files()
         
@@ -19,6 +46,9 @@ class Database:
         """Initialize data files if they don't exist."""
         os.makedirs('data', exist_ok=True)
         
+        # Finish a multi-file save that was interrupted
+        self.recover_pending_commit()
+        
         # Initialize users file
         if not os.path.exists(self.users_file):
             self.save_json(self.users_file, {})
@@ -38,11 +68,99 @@ class Database:
                 "next_id": 1
             })
     
-    def save_json(self, file_path, data):
+    def save_json(self, file_path, data, changed_users=()):
         """Save data to a JSON file."""
-        with open(file_path, 'w') as f:
-            # Handle datetime objects for JSON serialization
-            json.dump(data, f, default=self._json_serialize)
+        self.save_json_files({file_path: data}, changed_users)
+    
+    def save_json_files(self, files, changed_users=()):
+        """Save several JSON files as one atomic operation.
+        
+        Every file is written to a temporary file first and then swapped in with
+        os.replace. When more than one file is saved, the pending swaps are
+        recorded in the commit file so an interrupted save is completed on the
+        next startup instead of leaving the files out of step.
+        
+        Args:
+            files: dict mapping file paths to the data to save
+            changed_users: IDs of the users whose wallet or bank the save changes
+        """
+        with Database._lock:
+            renames = {}
+            for file_path, data in files.items():
+                temp_file = f"{file_path}.tmp"
+                with open(temp_file, 'w') as f:
+                    # Handle datetime objects for JSON serialization
+                    json.dump(data, f, default=self._json_serialize)
+                renames[temp_file] = file_path
+                
+            if len(renames) > 1:
+                with open(f"{self.commit_file}.tmp", 'w') as f:
+                    json.dump(renames, f)
+                os.replace(f"{self.commit_file}.tmp", self.commit_file)
+                
+            for temp_file, file_path in renames.items():
+                os.replace(temp_file, file_path)
+                
+            if len(renames) > 1:
+                os.remove(self.commit_file)
+                
+            if changed_users and self.users_file in files:
+                self._publish_balance_changes(files[self.users_file], changed_users)
+    
+    def recover_pending_commit(self):
+        """Complete the renames of a multi-file save that was interrupted."""
+        with Database._lock:
+            if not os.path.exists(self.commit_file):
+                return
+                
+            with open(self.commit_file, 'r') as f:
+                renames = json.load(f)
+                
+            for temp_file, file_path in renames.items():
+                if os.path.exists(temp_file):
+                    os.replace(temp_file, file_path)
+                    
+            os.remove(self.commit_file)
+            logging.info(f"Recovered an interrupted save of {', '.join(renames.values())}")
+    
+    @_locked
+    def add_balance_listener(self, listener):
+        """Call listener({user_id: total wealth}) whenever users' wallet + bank change."""
+        if Database._saved_totals is None:
+            users = self.load_json(self.users_file) or {}
+            Database._saved_totals = {
+                user_id: data["wallet"] + data["bank"] for user_id, data in users.items()
+            }
+        Database._balance_listeners.append(listener)
+        
+    def remove_balance_listener(self, listener):
+        """Stop notifying a balance listener."""
+        if listener in Database._balance_listeners:
+            Database._balance_listeners.remove(listener)
+    
+    def _publish_balance_changes(self, users, user_ids):
+        """Notify the balance listeners of the changed users' new totals."""
+        if Database._saved_totals is None:
+            return
+            
+        changes = {}
+        for user_id in map(str, user_ids):
+            data = users.get(user_id)
+            if data is None:
+                continue
+            total = data["wallet"] + data["bank"]
+            if Database._saved_totals.get(user_id) != total:
+                Database._saved_totals[user_id] = total
+                changes[int(user_id)] = total
+                
+        if not changes:
+            return
+            
+        for listener in list(Database._balance_listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                logging.error(f"Error in balance listener: {e}")
     
     def load_json(self, file_path):
         """Load data from a JSON file."""
@@ -73,6 +191,7 @@ class Database:
             return [self._json_deserialize(item) for item in obj]
         return obj
     
+    @_locked
     def get_or_create_user(self, user_id):
         """Get a user's data or create a new user if they don't exist."""
         users = self.load_json(self.users_file)
@@ -80,17 +199,101 @@ class Database:
         
         if user_id_str not in users:
             # Create new user
-            users[user_id_str] = {
-                "wallet": 0,
-                "bank": 0,
-                "last_daily": None,
-                "company_id": None,
-                "last_activity": datetime.now().isoformat()
-            }
-            self.save_json(self.users_file, users)
+            users[user_id_str] = self._new_user()
+            self.save_json(self.users_file, users, [user_id])
             
         return users[user_id_str]
     
+    def _new_user(self):
+        """Build the record for a user who has no data yet."""
+        return {
+            "wallet": 0,
+            "bank": 0,
+            "last_daily": None,
+            "company_id": None,
+            "last_activity": datetime.now().isoformat()
+        }
+    
+    @_locked
+    def apply_wallet_changes(self, changes, commit=None):
+        """Apply several wallet changes in one load/save.
+        
+        Args:
+            changes: dict mapping user IDs to the amount to add (negative to remove)
+            commit: optional callable({path: data}) that saves users.json in place
+                of save_json, to write it atomically together with other files
+            
+        Returns:
+            dict: success status and the new wallet balances, or the first user
+            that doesn't have enough money (nothing is applied in that case)
+        """
+        users = self.load_json(self.users_file)
+        result = self._apply_wallet_changes(users, changes)
+        if result["success"]:
+            if commit:
+                commit({self.users_file: users})
+                self._publish_balance_changes(users, changes)
+            else:
+                self.save_json(self.users_file, users, changes)
+        return result
+    
+    def _apply_wallet_changes(self, users, changes):
+        """Apply wallet changes to loaded users data (nothing is applied if any debit fails)."""
+        # Validate every debit before touching anything
+        for user_id, amount in changes.items():
+            user = users.get(str(user_id))
+            wallet = user["wallet"] if user else 0
+            if wallet + amount < 0:
+                return {"success": False, "message": "Not enough money in wallet", "user_id": user_id}
+        
+        balances = {}
+        for user_id, amount in changes.items():
+            user_id_str = str(user_id)
+            if user_id_str not in users:
+                users[user_id_str] = self._new_user()
+            users[user_id_str]["wallet"] += amount
+            balances[user_id] = users[user_id_str]["wallet"]
+        
+        return {"success": True, "balances": balances}
+    
+    @_locked
+    def apply_settlement(self, seq, credits):
+        """Credit a settlement's payouts in one save, skipping users who already received it.
+
+        Each user keeps the sequence number of the last settlement credited to
+        them (settlement_seq). Settlements are applied in sequence order, so
+        replaying one after a crash credits nobody twice.
+
+        Args:
+            seq: The settlement's sequence number
+            credits: dict mapping user IDs to the amount to add
+
+        Returns:
+            dict: success status and the credits that were actually applied
+        """
+        users = self.load_json(self.users_file)
+        applied = {}
+        for user_id, amount in credits.items():
+            user_id_str = str(user_id)
+            if user_id_str not in users:
+                users[user_id_str] = self._new_user()
+            if users[user_id_str].get("settlement_seq", 0) >= seq:
+                continue
+            users[user_id_str]["wallet"] += amount
+            users[user_id_str]["settlement_seq"] = seq
+            applied[int(user_id)] = amount
+
+        if applied:
+            self.save_json(self.users_file, users, applied)
+        return {"success": True, "applied": applied}
+
+    @_locked
+    def get_max_settlement_seq(self):
+        """Get the highest settlement sequence number credited to any user (0 if none)."""
+        users = self.load_json(self.users_file) or {}
+        return max((user.get("settlement_seq", 0) for user in users.values()), default=0)
+
+    @_locked
     def add_money(self, user_id, amount):
         """Add money to a user's wallet."""
         users = self.load_json(self.users_file)
@@ -100,10 +303,11 @@ class Database:
             self.get_or_create_user(user_id)
             
         users[user_id_str]["wallet"] += amount
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [user_id])
         
         return {"success": True, "new_balance": users[user_id_str]["wallet"]}
     
+    @_locked
     def remove_money(self, user_id, amount):
         """Remove money from a user's wallet if they have enough."""
         users = self.load_json(self.users_file)
@@ -116,10 +320,11 @@ class Database:
             return {"success": False, "message": "Not enough money in wallet"}
             
         users[user_id_str]["wallet"] -= amount
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [user_id])
         
         return {"success": True, "new_balance": users[user_id_str]["wallet"]}
     
+    @_locked
     def claim_daily_reward(self, user_id):
         """Claim the daily reward of $100 if available."""
         users = self.load_json(self.users_file)
@@ -136,7 +341,7 @@ class Database:
             
             users[user_id_str]["wallet"] += 100
             users[user_id_str]["last_daily"] = now.isoformat()
-            self.save_json(self.users_file, users)
+            self.save_json(self.users_file, users, [user_id])
             
             return {"success": True, "new_balance": users[user_id_str]["wallet"]}
         else:
@@ -147,18 +352,36 @@ class Database:
             
             return {"success": False, "next_available": next_available}
     
-    def give_daily_rewards_to_all(self):
-        """Give daily rewards to all users at once."""
+    @_locked
+    def give_daily_rewards(self, user_ids, reset_instant, amount=DAILY_REWARD):
+        """Give the daily reward to every listed user who hasn't had it since reset_instant.
+        
+        Returns:
+            list: IDs of the users that were credited
+        """
         users = self.load_json(self.users_file)
         now = datetime.now()
+        credited = []
         
-        for user_id in users:
-            users[user_id]["wallet"] += 100
-            users[user_id]["last_daily"] = now.isoformat()
+        for user_id in user_ids:
+            user_id_str = str(user_id)
+            user = users.get(user_id_str)
+            if user is None:
+                user = users[user_id_str] = self._new_user()
             
-        self.save_json(self.users_file, users)
-        logging.info(f"Daily rewards given to {len(users)} users")
+            # Skip users who already claimed (or were credited) after this reset
+            if user["last_daily"] and datetime.fromisoformat(user["last_daily"]) >= reset_instant:
+                continue
+                
+            user["wallet"] += amount
+            user["last_daily"] = now.isoformat()
+            credited.append(user_id)
+            
+        if credited:
+            self.save_json(self.users_file, users, credited)
+        return credited
     
+    @_locked
     def deposit(self, user_id, amount):
         """Deposit money from wallet to bank."""
         users = self.load_json(self.users_file)
@@ -172,7 +395,7 @@ class Database:
             
         users[user_id_str]["wallet"] -= amount
         users[user_id_str]["bank"] += amount
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [user_id])
         
         return {
             "success": True, 
@@ -180,6 +403,7 @@ class Database:
             "bank": users[user_id_str]["bank"]
         }
     
+    @_locked
     def withdraw(self, user_id, amount):
         """Withdraw money from bank to wallet."""
         users = self.load_json(self.users_file)
@@ -193,7 +417,7 @@ class Database:
             
         users[user_id_str]["bank"] -= amount
         users[user_id_str]["wallet"] += amount
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [user_id])
         
         return {
             "success": True, 
@@ -201,6 +425,7 @@ class Database:
             "bank": users[user_id_str]["bank"]
         }
     
+    @_locked
     def transfer(self, sender_id, recipient_id, amount):
         """Transfer money from one user to another."""
         users = self.load_json(self.users_file)
@@ -221,7 +446,7 @@ class Database:
         # Transfer the money
         users[sender_id_str]["wallet"] -= amount
         users[recipient_id_str]["wallet"] += amount
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [sender_id, recipient_id])
         
         return {
             "success": True,
@@ -229,6 +454,7 @@ class Database:
             "recipient_wallet": users[recipient_id_str]["wallet"]
         }
     
+    @_locked
     def create_company(self, owner_id, company_name, creator_role_id=None):
         """Create a new company with the given owner and name.
         
@@ -240,9 +466,9 @@ class Database:
         data = self.load_json(self.companies_file)
         
         # Check if company name already exists
-        for company in data["companies"]:
-            if company["name"].lower() == company_name.lower():
-                return {"success": False, "message": "A company with this name already exists"}
+        self._build_company_name_index(data)
+        if company_name.casefold() in Database._company_names:
+            return {"success": False, "message": "A company with this name already exists"}
         
         # Check if user already owns a company
         for company in data["companies"]:
@@ -259,36 +485,49 @@ class Database:
             "owner_id": owner_id,
             "employees": [],
             "created_at": datetime.now(),
-            "creator_role_id": creator_role_id
+            "creator_role_id": creator_role_id,
+            "treasury": 0
         }
         
         data["companies"].append(new_company)
-        self.save_json(self.companies_file, data)
         
-        # Update user's company_id
-        self.update_user_company(owner_id, company_id)
+        # Update owner's company_id in the same save
+        users = self.load_json(self.users_file)
+        self._set_user_company(users, owner_id, company_id)
+        self.save_json_files({self.companies_file: data, self.users_file: users})
+        
+        self._refresh_company_bonus(new_company)
+        self._refresh_company_stats(new_company)
+        self._index_company_name(new_company)
         
         return {"success": True, "company_id": company_id}
     
     def get_company_by_id(self, company_id):
         """Get a company by its ID."""
-        data = self.load_json(self.companies_file)
-        
-        for company in data["companies"]:
-            if company["id"] == company_id:
-                return company
-                
-        return None
+        self._build_company_name_index()
+        return Database._company_records.get(company_id)
     
     def get_company_by_name(self, company_name):
-        """Get a company by its name."""
-        data = self.load_json(self.companies_file)
-        
-        for company in data["companies"]:
-            if company["name"].lower() == company_name.lower():
-                return company
-                
-        return None
+        """Get a company by its name (case-insensitive)."""
+        self._build_company_name_index()
+        company = Database._company_names.get(company_name.casefold())
+        if company is None:
+            return None
+        return Database._company_records.get(company["id"])
+    
+    def search_company_names(self, prefix, limit=25):
+        """Get up to limit company names starting with prefix (case-insensitive), sorted."""
+        self._build_company_name_index()
+        key = prefix.casefold()
+        index = Database._company_name_index
+        
+        names = []
+        for i in range(bisect.bisect_left(index, (key,)), len(index)):
+            name_key = index[i][0]
+            if not name_key.startswith(key) or len(names) >= limit:
+                break
+            names.append(Database._company_names[name_key]["name"])
+        return names
     
     def get_user_company(self, user_id):
         """Get the company a user belongs to (as owner or employee)."""
@@ -316,17 +555,21 @@ class Database:
                 
         return None
     
+    @_locked
     def update_user_company(self, user_id, company_id):
         """Update a user's company ID."""
         users = self.load_json(self.users_file)
+        self._set_user_company(users, user_id, company_id)
+        self.save_json(self.users_file, users)
+    
+    def _set_user_company(self, users, user_id, company_id):
+        """Set a user's company ID in loaded users data, creating the user if needed."""
         user_id_str = str(user_id)
-        
         if user_id_str not in users:
-            self.get_or_create_user(user_id)
-            
+            users[user_id_str] = self._new_user()
         users[user_id_str]["company_id"] = company_id
-        self.save_json(self.users_file, users)
     
+    @_locked
     def add_employee_to_company(self, company_id, user_id):
         """Add a user as an employee to a company.
         
@@ -357,12 +600,15 @@ class Database:
         current_member_count = len(data["companies"][company_index]["employees"]) + 1  # +1 for owner
         unlocked_bonus = current_member_count == 5  # Will become 6 members after addition
         
-        # Add user to company
+        # Add user to company and update their company_id in one save
         data["companies"][company_index]["employees"].append(user_id)
-        self.save_json(self.companies_file, data)
+        users = self.load_json(self.users_file)
+        self._set_user_company(users, user_id, company_id)
+        self.save_json_files({self.companies_file: data, self.users_file: users})
         
-        # Update user's company_id
-        self.update_user_company(user_id, company_id)
+        self._refresh_company_bonus(data["companies"][company_index])
+        self._refresh_company_stats(data["companies"][company_index])
+        self._refresh_company_record(data["companies"][company_index])
         
         result = {"success": True, "unlocked_bonus": unlocked_bonus}
         
@@ -373,6 +619,7 @@ class Database:
             
         return result
     
+    @_locked
     def remove_employee_from_company(self, company_id, user_id):
         """Remove a user from a company."""
         data = self.load_json(self.companies_file)
@@ -390,15 +637,19 @@ class Database:
         if user_id not in data["companies"][company_index]["employees"]:
             return {"success": False, "message": "User is not an employee of this company"}
             
-        # Remove user from company
+        # Remove user from company and clear their company_id in one save
         data["companies"][company_index]["employees"].remove(user_id)
-        self.save_json(self.companies_file, data)
+        users = self.load_json(self.users_file)
+        self._set_user_company(users, user_id, None)
+        self.save_json_files({self.companies_file: data, self.users_file: users})
         
-        # Update user's company_id
-        self.update_user_company(user_id, None)
+        self._refresh_company_bonus(data["companies"][company_index])
+        self._refresh_company_stats(data["companies"][company_index])
+        self._refresh_company_record(data["companies"][company_index])
         
         return {"success": True}
     
+    @_locked
     def delete_company(self, company_id):
         """Delete a company and update all related users."""
         data = self.load_json(self.companies_file)
@@ -414,16 +665,21 @@ class Database:
         if company_index is None:
             return {"success": False, "message": "Company not found"}
             
-        # Update owner's company_id
-        self.update_user_company(company["owner_id"], None)
+        users = self.load_json(self.users_file)
         
-        # Update all employees' company_id
-        for employee_id in company["employees"]:
-            self.update_user_company(employee_id, None)
+        # Clear the owner's and every employee's company_id
+        for member_id in [company["owner_id"], *company["employees"]]:
+            self._set_user_company(users, member_id, None)
+            
+        # Whatever is left in the treasury goes back to the owner
+        users[str(company["owner_id"])]["wallet"] += company.get("treasury", 0)
             
-        # Remove company
+        # Remove company, both files are saved together
         data["companies"].pop(company_index)
-        self.save_json(self.companies_file, data)
+        self.save_json_files({self.companies_file: data, self.users_file: users}, [company["owner_id"]])
+        self._drop_company_bonus(company_id)
+        self._drop_company_stats(company_id)
+        self._unindex_company_name(company)
         
         return {"success": True}
     
@@ -432,6 +688,84 @@ class Database:
         data = self.load_json(self.companies_file)
         return data["companies"]
     
+    @_locked
+    def fund_company_treasury(self, company_id, user_id, amount):
+        """Move money from a user's wallet into a company's treasury."""
+        data = self.load_json(self.companies_file)
+        company = next((c for c in data["companies"] if c["id"] == company_id), None)
+        if company is None:
+            return {"success": False, "message": "Company not found"}
+            
+        users = self.load_json(self.users_file)
+        result = self._apply_wallet_changes(users, {user_id: -amount})
+        if not result["success"]:
+            return result
+            
+        company["treasury"] = company.get("treasury", 0) + amount
+        self.save_json_files({self.companies_file: data, self.users_file: users}, [user_id])
+        self._refresh_company_record(company)
+        self.log_transaction(user_id, None, amount, "treasury", f"Funded {company['name']} treasury")
+        
+        return {"success": True, "treasury": company["treasury"], "wallet": result["balances"][user_id]}
+    
+    @_locked
+    def run_payroll(self, company_id, payments, from_treasury=False):
+        """Pay company members from the owner's wallet or the company treasury in one batch.
+        
+        Args:
+            company_id: The company paying
+            payments: dict mapping member IDs to the amount they get
+            from_treasury: Pay from the company treasury instead of the owner's wallet
+            
+        Returns:
+            dict: success status, the total paid and the source's remaining balance
+        """
+        data = self.load_json(self.companies_file)
+        company = next((c for c in data["companies"] if c["id"] == company_id), None)
+        if company is None:
+            return {"success": False, "message": "Company not found"}
+            
+        members = set(company["employees"]) | {company["owner_id"]}
+        if any(user_id not in members for user_id in payments):
+            return {"success": False, "message": "Payroll can only pay company members"}
+        if any(amount <= 0 for amount in payments.values()):
+            return {"success": False, "message": "Payroll amounts must be positive"}
+            
+        total = sum(payments.values())
+        changes = dict(payments)
+        
+        if from_treasury:
+            if company.get("treasury", 0) < total:
+                return {"success": False, "message": "Not enough money in the company treasury"}
+        else:
+            changes[company["owner_id"]] = changes.get(company["owner_id"], 0) - total
+            
+        users = self.load_json(self.users_file)
+        result = self._apply_wallet_changes(users, changes)
+        if not result["success"]:
+            return result
+            
+        if from_treasury:
+            company["treasury"] -= total
+            self.save_json_files({self.companies_file: data, self.users_file: users}, changes)
+            self._refresh_company_record(company)
+            remaining = company["treasury"]
+        else:
+            self.save_json(self.users_file, users, changes)
+            remaining = result["balances"][company["owner_id"]]
+            
+        # One ledger entry per recipient, written together. Treasury pay never touched the owner's wallet
+        sender_id = None if from_treasury else company["owner_id"]
+        source = "company treasury" if from_treasury else "wallet"
+        self.log_transactions([
+            {"sender_id": sender_id, "recipient_id": user_id, "amount": amount,
+             "type": "payroll", "message": f"{company['name']} payroll ({source})"}
+            for user_id, amount in payments.items()
+        ])
+        
+        return {"success": True, "total": total, "remaining": remaining}
+    
+    @_locked
     def update_activity(self, user_id):
         """Update a user's activity and give them a bonus if they're in a company."""
         users = self.load_json(self.users_file)
@@ -445,54 +779,249 @@ class Database:
         
         # Check if user has a company
         if user["company_id"] is not None:
+            self._record_company_activity(user["company_id"], now)
+            
             # Check if last activity was more than 1 hour ago
             if user["last_activity"] and datetime.fromisoformat(user["last_activity"]) < now - timedelta(hours=1):
-                # Get company info to determine bonus amount
-                company = self.get_company_by_id(user["company_id"])
-                if company:
-                    # Default bonus
-                    bonus_amount = 10
-                    
-                    # Calculate bonus based on creator role and company size
-                    if "creator_role_id" in company:
-                        # Level 35 role (25$ bonus)
-                        if company["creator_role_id"] == 1352694494797234237:
-                            bonus_amount = 25
-                        # Level 50 role (50$ bonus)
-                        elif company["creator_role_id"] == 1352694494813749299:
-                            bonus_amount = 50
-                    
-                    # Additional bonus for companies with more than 5 members
-                    total_members = len(company.get("employees", [])) + 1  # +1 for owner
-                    if total_members > 5:
-                        bonus_amount += 25
-                        
-                    # Give activity bonus
-                    user["wallet"] += bonus_amount
-                else:
-                    # Default bonus if company not found
-                    user["wallet"] += 10
+                # Give activity bonus
+                user["wallet"] += self.get_company_bonus(user["company_id"])
                 
         # Update last activity
         user["last_activity"] = now.isoformat()
-        self.save_json(self.users_file, users)
+        self.save_json(self.users_file, users, [user_id])
+    
+    @staticmethod
+    def calculate_company_bonus(company):
+        """Calculate the hourly activity bonus for a company's members."""
+        # Base bonus based on creator role
+        bonus_amount = COMPANY_ROLE_BONUSES.get(company.get("creator_role_id"), ACTIVITY_BONUS)
+        
+        # Additional bonus for companies with more than 5 members
+        total_members = len(company.get("employees", [])) + 1  # +1 for owner
+        if total_members > LARGE_COMPANY_SIZE:
+            bonus_amount += LARGE_COMPANY_BONUS
+            
+        return bonus_amount
+    
+    def get_company_bonus(self, company_id):
+        """Get the activity bonus for a company from the precomputed table."""
+        if Database._company_bonus_table is None:
+            data = self.load_json(self.companies_file)
+            Database._company_bonus_table = {
+                company["id"]: self.calculate_company_bonus(company)
+                for company in data["companies"]
+            }
+            
+        # Default bonus if company not found
+        return Database._company_bonus_table.get(company_id, ACTIVITY_BONUS)
+    
+    def _refresh_company_bonus(self, company):
+        """Recompute a company's bonus after its membership or creator role changed."""
+        if Database._company_bonus_table is not None:
+            Database._company_bonus_table[company["id"]] = self.calculate_company_bonus(company)
+    
+    def _drop_company_bonus(self, company_id):
+        """Forget a deleted company's bonus."""
+        if Database._company_bonus_table is not None:
+            Database._company_bonus_table.pop(company_id, None)
+    
+    @_locked
+    def get_company_directory(self, sort_by="wealth", page=1, per_page=10):
+        """Get one page of companies sorted by an aggregate.
+        
+        Args:
+            sort_by: "wealth", "members", "activity" (last 24h) or "name"
+            page: Page number, starting at 1
+            per_page: Companies per page
+            
+        Returns:
+            dict: the page's companies with their aggregates, the page number and page count
+        """
+        self.build_company_stats()
+        data = self.load_json(self.companies_file)
+        now = datetime.now()
+        
+        entries = []
+        for company in data["companies"]:
+            stats = Database._company_stats.get(company["id"])
+            if stats is None:
+                continue
+            entries.append({
+                "id": company["id"],
+                "name": company["name"],
+                "owner_id": company["owner_id"],
+                "members": len(stats["members"]),
+                "wealth": stats["wealth"],
+                "activity": self._company_activity(stats, now)
+            })
+            
+        if sort_by == "name":
+            entries.sort(key=lambda entry: entry["name"].casefold())
+        else:
+            entries.sort(key=lambda entry: entry[sort_by], reverse=True)
+            
+        pages = max(1, -(-len(entries) // per_page))
+        page = min(max(1, page), pages)
+        start = (page - 1) * per_page
+        
+        return {
+            "companies": entries[start:start + per_page],
+            "total": len(entries),
+            "page": page,
+            "pages": pages
+        }
+    
+    @_locked
+    def build_company_stats(self):
+        """Build the company aggregates from companies.json and users.json if they aren't built yet."""
+        if Database._company_stats is not None:
+            return
+            
+        data = self.load_json(self.companies_file)
+        users = self.load_json(self.users_file) or {}
+        
+        Database._company_stats = {}
+        Database._company_members = {}
+        for company in data["companies"]:
+            Database._company_stats[company["id"]] = {"members": set(), "wealth": 0, "activity": {}}
+            for user_id in [company["owner_id"], *company["employees"]]:
+                user = users.get(str(user_id))
+                self._add_company_member(company["id"], user_id, user["wallet"] + user["bank"] if user else 0)
+                
+        # From here on wealth follows every users.json write
+        self.add_balance_listener(Database._update_company_wealth)
+    
+    def _add_company_member(self, company_id, user_id, total):
+        stats = Database._company_stats[company_id]
+        stats["members"].add(user_id)
+        stats["wealth"] += total
+        Database._company_members[user_id] = [company_id, total]
+    
+    def _remove_company_member(self, company_id, user_id):
+        stats = Database._company_stats[company_id]
+        stats["members"].discard(user_id)
+        member = Database._company_members.pop(user_id, None)
+        if member is not None:
+            stats["wealth"] -= member[1]
+    
+    def _refresh_company_stats(self, company):
+        """Bring a company's aggregates in line with its current membership."""
+        if Database._company_stats is None:
+            return
+            
+        stats = Database._company_stats.setdefault(company["id"], {"members": set(), "wealth": 0, "activity": {}})
+        members = {company["owner_id"], *company["employees"]}
+        
+        for user_id in stats["members"] - members:
+            self._remove_company_member(company["id"], user_id)
+        for user_id in members - stats["members"]:
+            self._add_company_member(company["id"], user_id, Database._saved_totals.get(str(user_id), 0))
     
-    def get_leaderboard(self):
-        """Get leaderboard data sorted by total wealth."""
+    def _drop_company_stats(self, company_id):
+        """Forget a deleted company's aggregates."""
+        if Database._company_stats is None:
+            return
+            
+        stats = Database._company_stats.pop(company_id, None)
+        if stats is not None:
+            for user_id in stats["members"]:
+                Database._company_members.pop(user_id, None)
+    
+    @staticmethod
+    def _update_company_wealth(changes):
+        """Balance listener that keeps each company's combined member wealth current."""
+        for user_id, total in changes.items():
+            member = Database._company_members.get(user_id)
+            if member is None:
+                continue
+            company_id, old_total = member
+            Database._company_stats[company_id]["wealth"] += total - old_total
+            member[1] = total
+    
+    def _record_company_activity(self, company_id, now):
+        """Count one activity update in the company's hourly bucket."""
+        if Database._company_stats is None or company_id not in Database._company_stats:
+            return
+            
+        activity = Database._company_stats[company_id]["activity"]
+        hour = int(now.timestamp() // 3600)
+        activity[hour] = activity.get(hour, 0) + 1
+        
+        # Only the last 24 hourly buckets are ever read
+        for old_hour in [h for h in activity if h <= hour - 24]:
+            del activity[old_hour]
+    
+    @staticmethod
+    def _company_activity(stats, now):
+        """Sum a company's activity over the last 24 hours."""
+        hour = int(now.timestamp() // 3600)
+        return sum(count for h, count in stats["activity"].items() if h > hour - 24)
+    
+    def _build_company_name_index(self, data=None):
+        """Build the company name index from companies.json if it isn't built yet."""
+        if Database._company_name_index is not None:
+            return
+        if data is None:
+            data = self.load_json(self.companies_file)
+            
+        Database._company_names = {
+            company["name"].casefold(): {"id": company["id"], "name": company["name"]}
+            for company in data["companies"]
+        }
+        Database._company_records = {company["id"]: company for company in data["companies"]}
+        Database._company_name_index = sorted(
+            (key, company["id"]) for key, company in Database._company_names.items()
+        )
+    
+    def _index_company_name(self, company):
+        """Add a new company to the name index."""
+        if Database._company_name_index is not None:
+            key = company["name"].casefold()
+            Database._company_names[key] = {"id": company["id"], "name": company["name"]}
+            Database._company_records[company["id"]] = company
+            bisect.insort(Database._company_name_index, (key, company["id"]))
+    
+    def _unindex_company_name(self, company):
+        """Remove a deleted company from the name index."""
+        if Database._company_name_index is not None:
+            key = company["name"].casefold()
+            Database._company_names.pop(key, None)
+            Database._company_records.pop(company["id"], None)
+            i = bisect.bisect_left(Database._company_name_index, (key, company["id"]))
+            if i < len(Database._company_name_index) and Database._company_name_index[i] == (key, company["id"]):
+                Database._company_name_index.pop(i)
+    
+    def _refresh_company_record(self, company):
+        """Replace a company's record in the index after it was saved."""
+        if Database._company_records is not None:
+            Database._company_records[company["id"]] = company
+    
+    def get_leaderboard(self, user_ids=None, limit=None):
+        """Get leaderboard data sorted by total wealth.
+        
+        Args:
+            user_ids: Only rank these users (e.g. the members of a guild)
+            limit: Only return the top entries
+        """
         users = self.load_json(self.users_file)
         
         # Convert to list and add user_id as a field
         users_list = []
         for user_id, data in users.items():
+            if user_ids is not None and int(user_id) not in user_ids:
+                continue
             user_data = data.copy()
             user_data["user_id"] = int(user_id)
             users_list.append(user_data)
             
         # Sort by total wealth (wallet + bank)
+        if limit is not None:
+            return heapq.nlargest(limit, users_list, key=lambda x: x["wallet"] + x["bank"])
         users_list.sort(key=lambda x: x["wallet"] + x["bank"], reverse=True)
         
         return users_list
     
+    @_locked
     def add_timeout_log(self, moderator_id, user_id, duration):
         """Add a timeout log entry."""
         logs = self.load_json(self.timeout_logs_file)
@@ -527,6 +1056,7 @@ class Database:
                 "next_id": 1
             })
             
+    @_locked
     def create_money_request(self, requester_id, recipient_id, amount, reason=None):
         """Create a money request from one user to another.
         
@@ -590,6 +1120,7 @@ class Database:
                 
         return None
         
+    @_locked
     def resolve_money_request(self, request_id, accept=True):
         """Resolve a money request by accepting or rejecting it.
         
@@ -643,6 +1174,21 @@ class Database:
         
     def log_transaction(self, sender_id, recipient_id, amount, transaction_type, message=None):
         """Log a money transaction for notification purposes."""
+        self.log_transactions([{
+            "sender_id": sender_id,
+            "recipient_id": recipient_id,
+            "amount": amount,
+            "type": transaction_type,
+            "message": message
+        }])
+        
+    @_locked
+    def log_transactions(self, entries):
+        """Log several money transactions with a single history rewrite.
+        
+        Args:
+            entries: list of dicts with sender_id, recipient_id, amount, type and optional message
+        """
         history_file = 'data/transaction_history.json'
         
         # Load transaction history
@@ -650,27 +1196,35 @@ class Database:
             self.save_json(history_file, {"transactions": [], "next_id": 1})
             
         history = self.load_json(history_file)
-        
-        # Create transaction record
-        transaction = {
-            "id": history["next_id"],
-            "sender_id": sender_id,
-            "recipient_id": recipient_id,
-            "amount": amount,
-            "type": transaction_type,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Add transaction and increment ID
-        history["transactions"].append(transaction)
-        history["next_id"] += 1
+        timestamp = datetime.now().isoformat()
+        
+        for entry in entries:
+            # Create transaction record
+            transaction = {
+                "id": history["next_id"],
+                "sender_id": entry["sender_id"],
+                "recipient_id": entry["recipient_id"],
+                "amount": entry["amount"],
+                "type": entry["type"],
+                "message": entry.get("message"),
+                "timestamp": timestamp
+            }
+            
+            # Add transaction and increment ID
+            history["transactions"].append(transaction)
+            history["next_id"] += 1
         
         # Save updated history
         self.save_json(history_file, history)
         
-    def get_user_transactions(self, user_id, limit=10):
-        """Get transaction history for a user."""
+    def get_user_transactions(self, user_id, limit=10, before_id=None):
+        """Get transaction history for a user, newest first.
+        
+        Args:
+            user_id: The user's ID
+            limit: Maximum number of transactions to return
+            before_id: Cursor, only return transactions older than this ID
+        """
         history_file = 'data/transaction_history.json'
         
         if not os.path.exists(history_file):
@@ -678,12 +1232,14 @@ class Database:
             
         history = self.load_json(history_file)
         
-        # Get transactions where user is sender or recipient
-        user_transactions = [
-            t for t in history["transactions"]
-            if t["sender_id"] == user_id or t["recipient_id"] == user_id
-        ]
-        
-        # Sort by timestamp (newest first) and limit
-        user_transactions.sort(key=lambda x: x["timestamp"], reverse=True)
-        return user_transactions[:limit]
+        # Transactions are appended with increasing IDs, so walk back from the end
+        user_transactions = []
+        for t in reversed(history["transactions"]):
+            if before_id is not None and t["id"] >= before_id:
+                continue
+            if t["sender_id"] == user_id or t["recipient_id"] == user_id:
+                user_transactions.append(t)
+                if len(user_transactions) >= limit:
+                    break
+                    
+        return user_transactions
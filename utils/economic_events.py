@@ -7,10 +7,11 @@ such as multiplying message rewards, investment returns, etc.
 import os
 import json
 import random
+import asyncio
 from datetime import datetime, timedelta
 import logging
-import openai
 from random import choice, uniform, randint
+from utils.llm import llm_gateway, LLMError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,6 +39,11 @@ class EconomicEventManager:
     def __init__(self):
         """Initialize the event manager."""
         self.active_events = []
+        
+        # Cached composed multiplier, valid until the earliest event end time
+        self._multiplier = 1.0
+        self._next_expiry = None
+        
         self.load_events()
     
     def load_events(self):
@@ -63,6 +69,7 @@ class EconomicEventManager:
                         self.active_events = []
                     
                     # Clean up expired events
+                    self._refresh_cache()
                     self._remove_expired_events()
             else:
                 # Create file with empty events
@@ -70,6 +77,7 @@ class EconomicEventManager:
         except Exception as e:
             logger.error(f"Error loading economic events: {e}")
             self.active_events = []
+            self._refresh_cache()
     
     def save_events(self):
         """Save events to file."""
@@ -79,14 +87,34 @@ class EconomicEventManager:
         except Exception as e:
             logger.error(f"Error saving economic events: {e}")
     
+    def _refresh_cache(self):
+        """Recompute the cached multiplier and the next expiry after events change."""
+        # Start with base multiplier of 1.0
+        multiplier = 1.0
+        next_expiry = None
+        
+        # Apply each event's multiplier and track the earliest end time
+        for event in self.active_events:
+            multiplier *= event['multiplier']
+            end_time = datetime.fromisoformat(event['end_time'])
+            if next_expiry is None or end_time < next_expiry:
+                next_expiry = end_time
+        
+        self._multiplier = multiplier
+        self._next_expiry = next_expiry
+    
     def _remove_expired_events(self):
-        """Remove expired events."""
+        """Remove expired events (only does work once the next event has ended)."""
         now = datetime.now()
+        if self._next_expiry is None or now < self._next_expiry:
+            return
+        
         self.active_events = [
             event for event in self.active_events
             if datetime.fromisoformat(event['end_time']) > now
         ]
         self.save_events()
+        self._refresh_cache()
     
     def get_active_events(self):
         """Get all active events."""
@@ -94,19 +122,11 @@ class EconomicEventManager:
         return self.active_events
     
     def get_current_multiplier(self):
-        """Calculate the current economy multiplier based on active events."""
+        """Get the current economy multiplier based on active events."""
         self._remove_expired_events()
-        
-        # Start with base multiplier of 1.0
-        multiplier = 1.0
-        
-        # Apply each event's multiplier
-        for event in self.active_events:
-            multiplier *= event['multiplier']
-        
-        return multiplier
+        return self._multiplier
     
-    def generate_event_with_ai(self, event_type=None):
+    async def generate_event_with_ai(self, event_type=None):
         """Use OpenAI to generate a creative economic event."""
         try:
             # Use provided event type or choose randomly
@@ -117,14 +137,10 @@ class EconomicEventManager:
             if event_type not in EVENT_TYPES:
                 event_type = random.choice(EVENT_TYPES)
             
-            # Set up the API key
-            api_key = os.environ.get('OPENAI_API_KEY')
-            if not api_key:
+            if not llm_gateway.enabled:
                 logger.warning("OpenAI API key not found, using fallback event generation")
                 return self.generate_fallback_event(event_type)
             
-            openai.api_key = api_key
-            
             # Choose multiplier based on event type
             min_mult, max_mult = EVENT_MULTIPLIERS[event_type]
             multiplier = round(random.uniform(min_mult, max_mult), 2)
@@ -158,51 +174,38 @@ class EconomicEventManager:
             Keep it engaging and creative, but brief. Focus on how it would impact a virtual economy.
             """
             
-            # Call the OpenAI API
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an economy simulation expert that generates creative economic events."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.7
-            )
+            # Call the OpenAI API through the shared gateway
+            try:
+                event_data = await llm_gateway.complete_json(
+                    "events",
+                    [
+                        {"role": "system", "content": "You are an economy simulation expert that generates creative economic events."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model="gpt-3.5-turbo",
+                    max_tokens=150,
+                    temperature=0.7
+                )
+            except LLMError as e:
+                # Fall back to standard event if we couldn't get or parse the AI response
+                logger.warning(f"Could not generate event with OpenAI: {e}")
+                return self.generate_fallback_event(event_type)
             
-            # Extract the content from the response
-            content = response.choices[0].message.content
+            # Create event with generated data
+            now = datetime.now()
+            end_time = now + timedelta(hours=duration_hours)
             
-            # Try to parse JSON from the response
-            try:
-                # Find JSON object in the response
-                start = content.find('{')
-                end = content.rfind('}') + 1
-                if start >= 0 and end > start:
-                    json_str = content[start:end]
-                    event_data = json.loads(json_str)
-                    
-                    # Create event with generated data
-                    now = datetime.now()
-                    end_time = now + timedelta(hours=duration_hours)
-                    
-                    event = {
-                        'id': len(self.active_events) + 1,
-                        'title': event_data.get('title', 'Market Shift'),
-                        'description': event_data.get('description', 'A shift in the market is affecting the economy.'),
-                        'impact': event_type,
-                        'multiplier': multiplier,
-                        'start_time': now.isoformat(),
-                        'end_time': end_time.isoformat()
-                    }
-                    
-                    return event
-            except json.JSONDecodeError:
-                logger.warning("Could not parse JSON from OpenAI response")
-            except Exception as e:
-                logger.error(f"Error processing OpenAI response: {e}")
+            event = {
+                'id': len(self.active_events) + 1,
+                'title': event_data.get('title', 'Market Shift'),
+                'description': event_data.get('description', 'A shift in the market is affecting the economy.'),
+                'impact': event_type,
+                'multiplier': multiplier,
+                'start_time': now.isoformat(),
+                'end_time': end_time.isoformat()
+            }
             
-            # Fall back to standard event if we couldn't process the AI response
-            return self.generate_fallback_event(event_type)
+            return event
         
         except Exception as e:
             logger.error(f"Error generating event with AI: {e}")
@@ -282,22 +285,34 @@ class EconomicEventManager:
         
         return event
     
-    def generate_event(self, event_type=None):
+    async def generate_event_async(self, event_type=None):
         """Generate a new economic event and add it to active events."""
         try:
             # Try to generate with AI first
-            event = self.generate_event_with_ai(event_type)
+            event = await self.generate_event_with_ai(event_type)
             
             # Add to active events
             self.active_events.append(event)
             self.save_events()
+            self._refresh_cache()
             
             return event
         except Exception as e:
             logger.error(f"Error generating event: {e}")
             raise
     
-    def generate_random_events(self, chance=0.1, max_events=3):
+    def generate_event(self, event_type=None):
+        """Generate a new economic event from synchronous code (the web dashboard)."""
+        async def generate():
+            try:
+                return await self.generate_event_async(event_type)
+            finally:
+                # The HTTP session belongs to this short-lived loop
+                await llm_gateway.aclose()
+        
+        return asyncio.run(generate())
+    
+    async def generate_random_events(self, chance=0.1, max_events=3):
         """Randomly generate events based on chance."""
         self._remove_expired_events()
         
@@ -307,7 +322,7 @@ class EconomicEventManager:
         
         # Check if we should generate a new event
         if random.random() < chance:
-            return self.generate_event()
+            return await self.generate_event_async()
         
         return None
     
@@ -321,4 +336,5 @@ class EconomicEventManager:
     def remove_event(self, event_id):
         """Remove an event by its ID."""
         self.active_events = [e for e in self.active_events if e['id'] != event_id]
-        self.save_events()
\ No newline at end of file
+        self.save_events()
+        self._refresh_cache()
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+Shared async gateway for OpenAI chat completions.
+
+Quests, economic events and bet resolution all go through one gateway
+that owns a pooled HTTP client, limits how many requests each caller may
+have in flight, enforces a deadline per call, retries transient failures
+with backoff and opens a circuit breaker when the API keeps failing so
+callers drop straight into their non-AI fallbacks.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import aiohttp
+
+from utils.config import LLM_CONCURRENCY, LLM_DEADLINES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when a completion could not be obtained or parsed."""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calls after repeated failures and lets one probe through after a cool-down."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False  # A half-open probe is in flight
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Return False if a call must be rejected, "probe" for the one half-open probe, else True."""
+        state = self.state
+        if state == "open":
+            return False
+        if state == "half-open":
+            if self.probing:
+                return False
+            self.probing = True
+            return "probe"
+        return True
+
+    def release(self, permit):
+        """Mark a call let through by allow() as finished, whatever its outcome."""
+        if permit == "probe":
+            self.probing = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.state == "half-open":
+            self.opened_at = time.monotonic()
+
+
+class LLMGateway:
+    """Pooled, rate-limited async client for JSON chat completions."""
+
+    def __init__(self, api_key=None, base_url=None, limits=None, deadlines=None,
+                 default_limit=2, default_deadline=30, max_retries=2, breaker=None):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.limits = limits if limits is not None else LLM_CONCURRENCY
+        self.deadlines = deadlines if deadlines is not None else LLM_DEADLINES
+        self.default_limit = default_limit
+        self.default_deadline = default_deadline
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+
+        # Sessions and semaphores belong to one event loop (the Flask dashboard uses its own)
+        self._loop_state = {}
+
+    @property
+    def enabled(self):
+        """Whether an API key is configured."""
+        return bool(self.api_key)
+
+    def _state(self):
+        """Get the session and per-caller semaphores for the running loop."""
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None or state["session"].closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=sum(self.limits.values()) or self.default_limit),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+            state = {"session": session, "semaphores": {}}
+            self._loop_state[loop] = state
+        return state
+
+    def _semaphore(self, state, caller):
+        semaphore = state["semaphores"].get(caller)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(caller, self.default_limit))
+            state["semaphores"][caller] = semaphore
+        return semaphore
+
+    async def aclose(self):
+        """Close the HTTP session of the running loop."""
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state["session"].close()
+
+    async def complete_json(self, caller, messages, model="gpt-4o", required_keys=(), deadline=None, **params):
+        """Request a chat completion and return its content parsed as a JSON object.
+
+        Args:
+            caller: Name used for the concurrency limit and deadline ("quests", "events", "betting")
+            messages: Chat messages to send
+            model: Model name
+            required_keys: Keys the returned object must contain
+            deadline: Seconds allowed for the whole call including retries
+            **params: Extra request fields (temperature, max_tokens, response_format, ...)
+
+        Raises:
+            LLMError: On missing API key, open circuit, timeout, HTTP failure or bad JSON
+        """
+        if not self.enabled:
+            raise LLMError("OPENAI_API_KEY not set")
+        permit = self.breaker.allow()
+        if not permit:
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        timeout = deadline or self.deadlines.get(caller, self.default_deadline)
+        payload = {"model": model, "messages": messages, **params}
+
+        try:
+            content = await asyncio.wait_for(self._request(caller, payload), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            raise LLMError(f"{caller} completion exceeded its {timeout}s deadline")
+        except LLMError:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.breaker.release(permit)
+
+        self.breaker.record_success()
+        return self.parse_json(content, required_keys)
+
+    async def _request(self, caller, payload):
+        """POST the completion with retries and return the message content."""
+        state = self._state()
+        url = f"{self.base_url}/chat/completions"
+
+        async with self._semaphore(state, caller):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with state["session"].post(url, json=payload) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            return data["choices"][0]["message"]["content"]
+
+                        body = await response.text()
+                        if response.status not in RETRY_STATUSES:
+                            raise LLMError(f"LLM request failed with HTTP {response.status}: {body[:200]}")
+                        error = LLMError(f"LLM request failed with HTTP {response.status}")
+                except aiohttp.ClientError as e:
+                    error = LLMError(f"LLM request failed: {e}")
+                except (KeyError, IndexError, ValueError) as e:
+                    raise LLMError(f"Unexpected LLM response: {e}")
+
+                if attempt < self.max_retries:
+                    # Exponential backoff with jitter
+                    await asyncio.sleep((2 ** attempt) * 0.5 + random.uniform(0, 0.5))
+
+            raise error
+
+    @staticmethod
+    def parse_json(content, required_keys=()):
+        """Parse a JSON object from completion text, tolerating text around it."""
+        try:
+            result = json.loads(content)
+        except (TypeError, json.JSONDecodeError):
+            # Find JSON object in the response
+            start = content.find('{') if content else -1
+            end = content.rfind('}') + 1 if content else 0
+            if start < 0 or end <= start:
+                raise LLMError("No JSON object in LLM response")
+            try:
+                result = json.loads(content[start:end])
+            except json.JSONDecodeError:
+                raise LLMError("Could not parse JSON from LLM response")
+
+        if not isinstance(result, dict):
+            raise LLMError("LLM response is not a JSON object")
+
+        missing = [key for key in required_keys if key not in result]
+        if missing:
+            raise LLMError(f"LLM response is missing {', '.join(missing)}")
+
+        return result
+
+
+# Shared gateway used by every caller
+llm_gateway = LLMGateway()
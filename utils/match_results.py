@@ -0,0 +1,94 @@
+"""
+Shared cache of sports match results.
+
+Bets on the same fixture are often phrased differently ("India vs Australia
+IPL today" / "who wins australia v. india, ipl?"). Descriptions are reduced
+to a match key of sport and teams; a result fetched for one bet is reused
+for every other bet on that fixture whose end time falls in the same
+window, until the entry expires. Concurrent lookups of one key share a
+single fetch.
+"""
+
+import asyncio
+import logging
+import re
+import time
+
+from utils.bet_options import extract_teams
+from utils.config import MATCH_RESULT_TTL, MATCH_RESULT_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Sport keywords and the sport they stand for
+SPORT_ALIASES = {
+    'cricket': 'cricket', 'ipl': 'cricket', 't20': 'cricket',
+    'football': 'football', 'soccer': 'football',
+    'basketball': 'basketball', 'nba': 'basketball',
+    'tennis': 'tennis', 'baseball': 'baseball', 'hockey': 'hockey', 'golf': 'golf',
+    'racing': 'racing', 'boxing': 'boxing', 'ufc': 'ufc'
+}
+SPORT_PATTERN = re.compile(r'\b(' + '|'.join(SPORT_ALIASES) + r')\b')
+
+
+def match_key(description):
+    """Reduce a bet description to (sport, teams), or None if it names no teams."""
+    desc_lower = description.lower()
+    teams = extract_teams(desc_lower)
+    if len(teams) < 2:
+        return None
+
+    sport = SPORT_PATTERN.search(desc_lower)
+    return (SPORT_ALIASES[sport.group(1)] if sport else None, tuple(sorted(teams[:2])))
+
+
+class MatchResultCache:
+    """TTL cache of match results keyed by match key, with one fetch per key in flight."""
+
+    def __init__(self, ttl=MATCH_RESULT_TTL, window=MATCH_RESULT_WINDOW):
+        self.ttl = ttl
+        self.window = window
+        self.results = {}  # {key: {"end_time": datetime, "result": dict, "expires": monotonic time}}
+        self.pending = {}  # {(key, end_time): future of an in-flight fetch}
+
+    def get(self, key, end_time):
+        """Get the cached result of a match ending around end_time, or None."""
+        entry = self.results.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] <= time.monotonic():
+            del self.results[key]
+            return None
+        if abs((entry["end_time"] - end_time).total_seconds()) > self.window:
+            # Same teams, different fixture
+            return None
+        return entry["result"]
+
+    def put(self, key, end_time, result):
+        """Cache a match result."""
+        self.results[key] = {"end_time": end_time, "result": result, "expires": time.monotonic() + self.ttl}
+
+    async def get_or_fetch(self, key, end_time, fetch):
+        """Get a cached result, or await fetch() once for every caller asking for the same match."""
+        result = self.get(key, end_time)
+        if result is not None:
+            return result
+
+        # Bets ending at different times may be different fixtures, so they don't share a fetch
+        pending_key = (key, end_time.date())
+        future = self.pending.get(pending_key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[pending_key] = future
+        try:
+            result = await fetch()
+            if result is not None:
+                self.put(key, end_time, result)
+            future.set_result(result)
+        finally:
+            del self.pending[pending_key]
+            if not future.done():
+                # The fetch failed or was cancelled, waiters retry on their own schedule
+                future.set_result(None)
+        return result
@@ -0,0 +1,148 @@
+"""
+Staged processing pipeline for incoming Discord messages.
+
+Every message the bot sees goes through a single ordered list of stages
+(ignore bots, make sure the user exists, activity bonus, event rewards).
+Stages share one MessageContext so lookups done by an earlier stage are
+reused by the later ones, and every stage records its own latency
+histogram.
+
+Only the filter stages run before command dispatch; the rest run in a
+background task so command latency does not include them.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Stage priorities (lower runs first)
+PRIORITY_FILTER = 0
+PRIORITY_USER = 10
+PRIORITY_ACTIVITY = 20
+PRIORITY_REWARDS = 30
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram for a single pipeline stage."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is the overflow bucket
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms):
+        """Record one observation in milliseconds."""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if elapsed_ms <= bound:
+                index = i
+                break
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def percentile(self, pct):
+        """Estimate a percentile (0-100) as the upper bound of its bucket."""
+        if self.count == 0:
+            return 0.0
+
+        target = self.count * pct / 100
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self):
+        """Return a plain dict summary of the histogram."""
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": dict(zip([*map(str, self.buckets), "inf"], self.counts))
+        }
+
+
+class MessageContext:
+    """Per-message state shared by every pipeline stage."""
+
+    def __init__(self, message):
+        self.message = message
+        self.author_id = message.author.id
+        self.guild_id = message.guild.id if message.guild else None
+        self.data = {}        # Free-form values stages want to hand to later stages
+        self.stopped = False
+
+    def stop(self):
+        """Skip all remaining stages for this message."""
+        self.stopped = True
+
+
+class MessagePipeline:
+    """Ordered list of message stages with per-stage latency tracking."""
+
+    def __init__(self):
+        self.stages = []  # [(priority, name, func)] kept sorted by priority
+        self.histograms = {}
+        self.tasks = set()  # Background runs of the non-filter stages, kept so they are not collected
+
+    def register(self, name, func, priority=PRIORITY_REWARDS):
+        """Register a stage. func(ctx) may be a plain function or a coroutine function."""
+        self.unregister(name)
+        self.stages.append((priority, name, func))
+        self.stages.sort(key=lambda stage: stage[0])
+        self.histograms.setdefault(name, LatencyHistogram())
+
+    def unregister(self, name):
+        """Remove a stage by name if it is registered."""
+        self.stages = [stage for stage in self.stages if stage[1] != name]
+
+    async def filter(self, message):
+        """Run only the filter stages for a message and return the context."""
+        ctx = MessageContext(message)
+        await self._run_stages(ctx, [stage for stage in self.stages if stage[0] <= PRIORITY_FILTER])
+        return ctx
+
+    def run_in_background(self, ctx):
+        """Run the stages after the filters for an already filtered message in a background task."""
+        stages = [stage for stage in self.stages if stage[0] > PRIORITY_FILTER]
+        task = asyncio.create_task(self._run_stages(ctx, stages))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _run_stages(self, ctx, stages):
+        """Run stages in order until one of them stops the message."""
+        for _, name, func in stages:
+            start = time.perf_counter()
+            try:
+                result = func(ctx)
+                if inspect.isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in message stage '{name}': {e}")
+            finally:
+                self.histograms[name].observe((time.perf_counter() - start) * 1000)
+
+            if ctx.stopped:
+                break
+
+    def stats(self):
+        """Return latency snapshots for every registered stage, in run order."""
+        return {name: self.histograms[name].snapshot() for _, name, _ in self.stages}
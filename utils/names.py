@@ -0,0 +1,77 @@
+"""
+Bounded cache of display names for user IDs.
+
+Resolves a whole batch of IDs at once: cached names first, then members
+the guild already has cached, then one gateway member query for the rest,
+then the bot's user cache. IDs that cannot be resolved (users who left and
+share no guild with the bot) fall back to "User <id>".
+"""
+
+import logging
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Gateway member queries accept at most this many IDs
+MAX_QUERY_IDS = 100
+
+
+class NameCache:
+    """LRU cache of (guild_id, user_id) -> display name."""
+
+    def __init__(self, bot, maxsize=2000):
+        self.bot = bot
+        self.maxsize = maxsize
+        self.names = OrderedDict()
+
+    def _store(self, key, name):
+        self.names[key] = name
+        self.names.move_to_end(key)
+        while len(self.names) > self.maxsize:
+            self.names.popitem(last=False)
+
+    async def resolve(self, guild, user_ids):
+        """Get {user_id: display name} for a batch of user IDs."""
+        guild_id = guild.id if guild else None
+        names = {}
+        missing = []
+
+        for user_id in dict.fromkeys(user_ids):
+            key = (guild_id, user_id)
+            if key in self.names:
+                self.names.move_to_end(key)
+                names[user_id] = self.names[key]
+                continue
+
+            member = guild.get_member(user_id) if guild else None
+            if member:
+                names[user_id] = member.display_name
+                self._store(key, member.display_name)
+            else:
+                missing.append(user_id)
+
+        # One gateway query for members who are not in the member cache
+        if missing and guild:
+            for start in range(0, len(missing), MAX_QUERY_IDS):
+                try:
+                    members = await guild.query_members(user_ids=missing[start:start + MAX_QUERY_IDS])
+                except (discord.ClientException, discord.HTTPException, TimeoutError) as e:
+                    logger.warning(f"Could not query members of guild {guild_id}: {e}")
+                    break
+                for member in members:
+                    names[member.id] = member.display_name
+                    self._store((guild_id, member.id), member.display_name)
+
+        for user_id in missing:
+            if user_id in names:
+                continue
+            user = self.bot.get_user(user_id)
+            name = user.display_name if user else f"User {user_id}"
+            names[user_id] = name
+            # Don't pin placeholders, the user may become resolvable later
+            if user:
+                self._store((guild_id, user_id), name)
+
+        return names
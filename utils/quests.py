@@ -1,21 +1,18 @@
-import os
 import logging
 import random
 import asyncio
-import json
-from openai import OpenAI
+from collections import deque
+from utils.config import QUEST_POOL_SIZE, QUEST_POOL_LOW_WATER
+from utils.llm import llm_gateway, LLMError
 
 class QuestGenerator:
     """Class for generating random quests using OpenAI API."""
     
     def __init__(self):
-        self.api_key = os.environ.get("OPENAI_API_KEY")
-        self.client = None
+        self.llm = llm_gateway
         
-        if not self.api_key:
+        if not self.llm.enabled:
             logging.warning("OPENAI_API_KEY not set! Using fallback quest generation.")
-        else:
-            self.client = OpenAI(api_key=self.api_key)
             
         # Fallback quests in case API isn't available
         self.fallback_quests = [
@@ -31,26 +28,51 @@ class QuestGenerator:
             {"title": "Community Cleaner", "description": "Find and report any old messages that break the server rules.", "reward": 85, "time_limit": 40},
         ]
         
+        # AI-generated quests ready to hand out, refilled in the background
+        self.pool = deque()
+        self.pool_size = QUEST_POOL_SIZE
+        self.low_water = QUEST_POOL_LOW_WATER
+        self._refill_task = None
+        
+    def start(self):
+        """Start filling the quest pool (call once the event loop is running)."""
+        self._schedule_refill()
+        
     async def generate_quest(self, username):
-        """Generate a random quest for a user."""
-        # Try to use OpenAI if available
-        if self.client:
-            try:
-                return await self._generate_quest_with_openai(username)
-            except Exception as e:
-                logging.error(f"Error generating quest with OpenAI: {e}")
-                # Fall back to pre-defined quests
+        """Get a random quest for a user from the pool without waiting on OpenAI."""
+        quest = self.pool.popleft() if self.pool else None
+        self._schedule_refill()
+        
+        if quest:
+            return {**quest, "quest_description": f"Hey {username}! {quest['quest_description']}"}
                 
-        # Use fallback quest generation
+        # Pool is empty, use fallback quest generation
         return self._generate_fallback_quest(username)
     
-    async def _generate_quest_with_openai(self, username):
+    def _schedule_refill(self):
+        """Start a background refill if the pool is below its low-water mark."""
+        if not self.llm.enabled or len(self.pool) >= self.low_water:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill_pool())
+    
+    async def _refill_pool(self):
+        """Generate quests until the pool is full."""
+        while len(self.pool) < self.pool_size:
+            try:
+                self.pool.append(await self._generate_quest_with_openai())
+            except (LLMError, ValueError, TypeError) as e:
+                logging.error(f"Error generating quest with OpenAI: {e}")
+                # Try again on the next quest request
+                break
+    
+    async def _generate_quest_with_openai(self):
         """Generate a quest using OpenAI API."""
         # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
         
-        prompt = f"""Generate a fun Discord economy bot quest for user '{username}'. 
-        The quest should be something the user can do in a Discord server.
+        prompt = """Generate a fun Discord economy bot quest. 
+        The quest should be something a user can do in a Discord server.
         
         Return the result as a JSON object with these fields:
         - quest_title: A catchy title for the quest
@@ -61,28 +83,22 @@ class QuestGenerator:
         Be creative and make the quest engaging but achievable within the time limit.
         """
         
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                max_tokens=500
-            )
-            
-            # Parse the response
-            quest_data = json.loads(response.choices[0].message.content)
-            
-            # Format the quest
-            return {
-                "quest_title": quest_data["quest_title"],
-                "quest_description": quest_data["quest_description"],
-                "reward": int(quest_data["reward"]),
-                "time_limit": int(quest_data["time_limit"])
-            }
-            
-        except Exception as e:
-            logging.error(f"Error in OpenAI quest generation: {str(e)}")
-            raise
+        quest_data = await self.llm.complete_json(
+            "quests",
+            [{"role": "user", "content": prompt}],
+            model="gpt-4o",
+            required_keys=("quest_title", "quest_description", "reward", "time_limit"),
+            response_format={"type": "json_object"},
+            max_tokens=500
+        )
+        
+        # Format the quest
+        return {
+            "quest_title": quest_data["quest_title"],
+            "quest_description": quest_data["quest_description"],
+            "reward": int(quest_data["reward"]),
+            "time_limit": int(quest_data["time_limit"])
+        }
     
     def _generate_fallback_quest(self, username):
         """Generate a quest using pre-defined templates when OpenAI is unavailable."""
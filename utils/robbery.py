@@ -0,0 +1,100 @@
+"""
+Robbery coordinator.
+
+Robbers gather in a lobby per (guild, target). Lobbies expire if not
+enough people join in time, and once the lobby is full the target is
+debited and every robber credited in one atomic wallet batch.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from utils.config import MIN_ROBBERS, ROBBERY_COOLDOWN, ROBBERY_LOBBY_TTL, ROBBERY_MIN_AMOUNT
+
+
+class RobberyCoordinator:
+    """Tracks robbery lobbies and settles full ones."""
+
+    def __init__(self, db, cooldowns, min_robbers=MIN_ROBBERS, lobby_ttl=ROBBERY_LOBBY_TTL,
+                 cooldown=ROBBERY_COOLDOWN):
+        self.db = db
+        self.cooldowns = cooldowns
+        self.min_robbers = min_robbers
+        self.lobby_ttl = lobby_ttl
+        self.cooldown = cooldown
+        self.lobbies = {}  # {(guild_id, target_id): {"users": [user_ids], "expires": datetime}}
+
+    def _prune(self, now):
+        """Drop lobbies that ran out of time."""
+        expired = [key for key, lobby in self.lobbies.items() if lobby["expires"] <= now]
+        for key in expired:
+            del self.lobbies[key]
+
+    def join(self, guild_id, target_id, user_id):
+        """Join (or open) the lobby to rob a target, settling it once it is full.
+
+        Returns:
+            dict: success status and either a failure reason ("self",
+            "recently_robbed", "already_joined", "empty_wallet"), the number of
+            robbers still needed, or the settled robbery (robbers, amount, split)
+        """
+        if user_id == target_id:
+            return {"success": False, "reason": "self"}
+
+        if self.cooldowns.is_active("robbed", None, target_id):
+            return {"success": False, "reason": "recently_robbed"}
+
+        now = datetime.now()
+        self._prune(now)
+
+        key = (guild_id, target_id)
+        lobby = self.lobbies.setdefault(key, {"users": [], "expires": now + timedelta(seconds=self.lobby_ttl)})
+
+        if user_id in lobby["users"]:
+            return {"success": False, "reason": "already_joined"}
+
+        lobby["users"].append(user_id)
+        if len(lobby["users"]) < self.min_robbers:
+            return {
+                "success": True,
+                "complete": False,
+                "needed": self.min_robbers - len(lobby["users"]),
+                "expires": lobby["expires"]
+            }
+
+        # The lobby is full, it is settled one way or another
+        del self.lobbies[key]
+        return self.settle(target_id, lobby["users"])
+
+    def settle(self, target_id, robbers):
+        """Take 10-25% of the target's wallet and split it between the robbers in one batch."""
+        wallet = self.db.get_or_create_user(target_id)["wallet"]
+        if wallet <= 0:
+            return {"success": False, "reason": "empty_wallet"}
+
+        rob_amount = int(wallet * random.uniform(0.1, 0.25))
+        rob_amount = min(max(rob_amount, ROBBERY_MIN_AMOUNT), wallet)
+        split_amount = rob_amount // len(robbers)
+
+        # Only what is actually handed out leaves the target's wallet
+        changes = {robber_id: split_amount for robber_id in robbers}
+        changes[target_id] = -split_amount * len(robbers)
+
+        result = self.db.apply_wallet_changes(changes)
+        if not result["success"]:
+            return {"success": False, "reason": "empty_wallet"}
+
+        self.db.log_transactions([
+            {"sender_id": target_id, "recipient_id": robber_id, "amount": split_amount,
+             "type": "robbery", "message": "Robbery split"}
+            for robber_id in robbers
+        ])
+        self.cooldowns.set("robbed", None, target_id, self.cooldown)
+
+        return {
+            "success": True,
+            "complete": True,
+            "robbers": list(robbers),
+            "amount": split_amount * len(robbers),
+            "split": split_amount
+        }
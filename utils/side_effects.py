@@ -0,0 +1,106 @@
+"""
+Bounded worker queue for per-message economy side effects.
+
+Message handling only enqueues the blocking database work (user creation,
+activity bonus, random rewards); a small pool of workers runs it off the
+event loop. High priority jobs wait for room in the queue (backpressure),
+low priority jobs are merged with an identical pending job or dropped when
+the queue is full.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.message_pipeline import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = "high"
+PRIORITY_LOW = "low"
+
+
+class SideEffectQueue:
+    """Bounded queue of blocking jobs processed by background workers."""
+
+    def __init__(self, maxsize=1000, workers=2):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.num_workers = workers
+        self.workers = []
+        # The JSON files are rewritten as a whole, so jobs run one at a time and in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="side-effects")
+        self.pending_merge_keys = set()
+
+        # Metrics
+        self.processed = 0
+        self.dropped = 0
+        self.merged = 0
+        self.failed = 0
+        self.lag = LatencyHistogram()
+
+    def start(self):
+        """Start the worker tasks (safe to call again after a reconnect)."""
+        self.workers = [worker for worker in self.workers if not worker.done()]
+        while len(self.workers) < self.num_workers:
+            self.workers.append(asyncio.create_task(self._worker()))
+
+    def stop(self):
+        """Cancel the worker tasks."""
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    async def submit(self, func, *args, priority=PRIORITY_HIGH, merge_key=None):
+        """Queue func(*args) to run off the event loop.
+
+        Returns False if a low priority job was merged or dropped.
+        """
+        if priority == PRIORITY_LOW:
+            # An identical job is already waiting, it will do the same work
+            if merge_key is not None and merge_key in self.pending_merge_keys:
+                self.merged += 1
+                return False
+
+            try:
+                self.queue.put_nowait((time.perf_counter(), merge_key, func, args))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return False
+        else:
+            # Wait for room in the queue
+            await self.queue.put((time.perf_counter(), merge_key, func, args))
+
+        if merge_key is not None:
+            self.pending_merge_keys.add(merge_key)
+        return True
+
+    async def _worker(self):
+        """Run queued jobs in the executor until cancelled."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            enqueued_at, merge_key, func, args = await self.queue.get()
+            self.pending_merge_keys.discard(merge_key)
+            self.lag.observe((time.perf_counter() - enqueued_at) * 1000)
+
+            try:
+                await loop.run_in_executor(self.executor, func, *args)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error running side effect {getattr(func, '__name__', func)}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def metrics(self):
+        """Return a plain dict of queue metrics."""
+        return {
+            "depth": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "failed": self.failed,
+            "lag": self.lag.snapshot()
+        }
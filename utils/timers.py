@@ -0,0 +1,195 @@
+"""
+Durable one-shot timer service.
+
+Timers are kept in a min-heap ordered by due time and persisted to a JSON
+file, so scheduled work (quest outcomes, ...) survives restarts. A single
+background task sleeps until the earliest timer is due, then hands every
+due timer to its handler in batches and commits the file once per batch.
+
+A timer is only removed once its handler succeeded; timers whose handler
+failed (or has not been registered) are retried later with a backoff. A
+handler that writes other files can save them together with the timer
+removal through commit(), so a crash can't apply its work twice.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from utils.config import TIMER_RETRY_BASE, TIMER_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Path to timer data file
+TIMER_DATA_FILE = "data/timers.json"
+
+
+class TimerService:
+    """Persistent one-shot timers grouped by kind."""
+
+    def __init__(self, data_file=TIMER_DATA_FILE, batch_size=500, save_files=None):
+        self.data_file = data_file
+        self.batch_size = batch_size
+        self.save_files = save_files  # Atomic multi-file save ({path: data}) used by commit()
+        self.timers = {}    # {timer_id: {"id", "kind", "due", "payload"}}
+        self.heap = []      # [(due, timer_id)], cancelled ids are skipped lazily
+        self.handlers = {}  # {kind: async handler(list of timers)}
+        self.next_id = 1
+        self._wakeup = asyncio.Event()
+        self.load_timers()
+
+    def load_timers(self):
+        """Load pending timers from file."""
+        try:
+            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+
+            if not os.path.exists(self.data_file):
+                self.save_timers()
+                return
+
+            with open(self.data_file, 'r') as f:
+                data = json.load(f)
+
+            self.next_id = data.get("next_id", 1)
+            for timer in data.get("timers", []):
+                timer["due"] = datetime.fromisoformat(timer["due"])
+                self.timers[timer["id"]] = timer
+                self.heap.append((timer["due"], timer["id"]))
+            heapq.heapify(self.heap)
+        except Exception as e:
+            logger.error(f"Error loading timers: {e}")
+            self.timers = {}
+            self.heap = []
+
+    def _file_data(self, exclude=()):
+        """Get the timer file contents, leaving out the given timer IDs."""
+        timers = [
+            {**timer, "due": timer["due"].isoformat()}
+            for timer in self.timers.values() if timer["id"] not in exclude
+        ]
+        return {"next_id": self.next_id, "timers": timers}
+
+    def save_timers(self):
+        """Write all pending timers to file."""
+        try:
+            temp_file = f"{self.data_file}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(self._file_data(), f)
+            os.replace(temp_file, self.data_file)
+        except Exception as e:
+            logger.error(f"Error saving timers: {e}")
+
+    def commit(self, timers, files):
+        """Remove settled timers and save them with a handler's other files in one atomic write."""
+        settled = {timer["id"] for timer in timers}
+        self.save_files({**files, self.data_file: self._file_data(exclude=settled)})
+        for timer_id in settled:
+            self.timers.pop(timer_id, None)
+
+    def register_handler(self, kind, handler):
+        """Register the coroutine function that settles due timers of a kind."""
+        self.handlers[kind] = handler
+
+    def schedule(self, kind, due, payload):
+        """Schedule a timer and return its ID."""
+        timer_id = self.next_id
+        self.next_id += 1
+
+        self.timers[timer_id] = {"id": timer_id, "kind": kind, "due": due, "payload": payload}
+        heapq.heappush(self.heap, (due, timer_id))
+        self.save_timers()
+
+        # Wake the run loop in case this timer is now the earliest
+        self._wakeup.set()
+        return timer_id
+
+    def cancel(self, timer_id):
+        """Cancel a pending timer."""
+        if self.timers.pop(timer_id, None) is not None:
+            self.save_timers()
+            return True
+        return False
+
+    def pending(self, kind=None):
+        """Get pending timers, optionally only of one kind."""
+        return [timer for timer in self.timers.values() if kind is None or timer["kind"] == kind]
+
+    def _pop_due(self, now):
+        """Pop up to batch_size due timers off the heap."""
+        due = []
+        while self.heap and self.heap[0][0] <= now and len(due) < self.batch_size:
+            _, timer_id = heapq.heappop(self.heap)
+            timer = self.timers.get(timer_id)
+            if timer is not None:
+                due.append(timer)
+        return due
+
+    async def process_due(self):
+        """Settle every due timer, committing the timer file once per batch."""
+        while True:
+            batch = self._pop_due(datetime.now())
+            if not batch:
+                return
+
+            # Group by kind so each handler gets its timers in one call
+            by_kind = {}
+            for timer in batch:
+                by_kind.setdefault(timer["kind"], []).append(timer)
+
+            settled = []
+            for kind, timers in by_kind.items():
+                handler = self.handlers.get(kind)
+                if handler is None:
+                    logger.warning(f"No handler for {len(timers)} due '{kind}' timers")
+                    self._retry_later(timers)
+                    continue
+                try:
+                    await handler(timers)
+                except Exception as e:
+                    logger.error(f"Error settling '{kind}' timers: {e}")
+                    self._retry_later(timers)
+                    continue
+                settled.extend(timers)
+
+            # Handlers that committed their timers already removed them
+            for timer in settled:
+                self.timers.pop(timer["id"], None)
+            self.save_timers()
+
+    def _retry_later(self, timers):
+        """Reschedule timers that could not be settled, backing off on every failure."""
+        now = datetime.now()
+        for timer in timers:
+            if timer["id"] not in self.timers:
+                # Committed by the handler before it failed
+                continue
+            timer["attempts"] = timer.get("attempts", 0) + 1
+            delay = min(TIMER_RETRY_BASE * 2 ** (timer["attempts"] - 1), TIMER_RETRY_DELAY)
+            timer["due"] = now + timedelta(seconds=delay)
+            heapq.heappush(self.heap, (timer["due"], timer["id"]))
+
+    async def run(self):
+        """Sleep until the next timer is due and settle it, forever."""
+        while True:
+            self._wakeup.clear()
+
+            # Drop cancelled timers from the top of the heap
+            while self.heap and self.heap[0][1] not in self.timers:
+                heapq.heappop(self.heap)
+
+            if not self.heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = (self.heap[0][0] - datetime.now()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process_due()